@@ -7,7 +7,13 @@ from mysql_mimic.auth import (
     NoLoginAuthPlugin,
     AuthPlugin,
 )
-from mysql_mimic.results import AllowedResult, ResultColumn, ResultSet
+from mysql_mimic.cursor import PagedRows
+from mysql_mimic.results import (
+    AllowedResult,
+    ColumnarResultSet,
+    ResultColumn,
+    ResultSet,
+)
 from mysql_mimic.session import Session
 from mysql_mimic.server import MysqlServer
 from mysql_mimic.types import ColumnType
@@ -1,7 +1,30 @@
 import asyncio
 import logging
+import random
+from functools import lru_cache
+from time import perf_counter, time
+from collections import deque
+from concurrent.futures import Executor
 from ssl import SSLContext
-from typing import Optional, Dict, Any, Iterator, AsyncIterator
+from typing import (
+    Optional,
+    Dict,
+    Any,
+    Iterable,
+    Iterator,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Sequence,
+    Tuple,
+    List,
+    Union,
+    AsyncIterable,
+    Awaitable,
+    ContextManager,
+)
+
+from sqlglot import expressions as exp
 
 from mysql_mimic.auth import (
     AuthInfo,
@@ -21,17 +44,51 @@ from mysql_mimic.packets import (
     parse_com_field_list,
     make_column_definition_41,
 )
-from mysql_mimic.prepared import PreparedStatement, REGEX_PARAM
-from mysql_mimic.results import ensure_result_set, ResultSet
+from mysql_mimic.parse_cache import ParseCache
+from mysql_mimic.prepared import PreparedStatement
+from mysql_mimic.results import (
+    ensure_result_set,
+    ResultSet,
+    ColumnarResultSet,
+    ResultColumn,
+    EncodedResultSet,
+    RecordingResultSet,
+)
 from mysql_mimic import types, packets, context
-from mysql_mimic.schema import com_field_list_to_show_statement
+from mysql_mimic.schema import InfoSchemaCache, com_field_list_to_show_statement
 from mysql_mimic.session import BaseSession
-from mysql_mimic.stream import MysqlStream, ConnectionClosed
+from mysql_mimic.cursor import Cursor
+from mysql_mimic.digest import Digest, DigestSummary, digest
+from mysql_mimic.metrics import ServerMetrics
+from mysql_mimic import tracing
+from mysql_mimic.slow_log import SlowQuery, SlowQueryLog
+from mysql_mimic.stream import (
+    MysqlStream,
+    ConnectionClosed,
+    ZlibCompressor,
+    ZstdCompressor,
+    encode_binary_rows,
+    encode_text_rows,
+)
 from mysql_mimic.types import Capabilities
 from mysql_mimic.utils import seq, aiterate, cooperative_iterate
+from mysql_mimic.variables import GlobalVariables
 
 logger = logging.getLogger(__name__)
 
+# Result sets with at least this many rows are encoded in the encode executor, if any
+ENCODE_OFFLOAD_THRESHOLD = 100_000
+
+# Maximum number of batches being encoded in the encode executor at once
+ENCODE_OFFLOAD_CONCURRENCY = 4
+
+# Number of distinct result set shapes whose column definitions are cached
+COLUMN_DEFINITIONS_CACHE_SIZE = 1024
+
+EncodeRows = Callable[
+    [bytearray, Sequence[Sequence[Any]], Sequence[ResultColumn], int], int
+]
+
 
 class Connection:
     _MAX_PREPARED_STMT_ID = 2**32
@@ -44,12 +101,36 @@ class Connection:
         identity_provider: IdentityProvider,
         server_capabilities: Capabilities = DEFAULT_SERVER_CAPABILITIES,
         ssl: Optional[SSLContext] = None,
+        parse_cache: Optional[ParseCache] = None,
+        encode_executor: Optional[Executor] = None,
+        metrics: Optional[ServerMetrics] = None,
+        tracer: Any = None,
+        digests: Optional[DigestSummary] = None,
+        slow_log: Optional[SlowQueryLog] = None,
+        global_variables: Optional[GlobalVariables] = None,
+        info_schema_cache: Optional[InfoSchemaCache] = None,
     ):
         self.stream = stream
         self.session = session
         self.control = control
         self.identity_provider = identity_provider
         self.ssl = ssl
+        self.parse_cache = parse_cache
+        self.encode_executor = encode_executor
+        self.encode_offload_threshold = ENCODE_OFFLOAD_THRESHOLD
+        self.encode_offload_concurrency = ENCODE_OFFLOAD_CONCURRENCY
+        # Read the next window of cursors in the background. See `Cursor`.
+        self.cursor_prefetch = False
+        # Coalesce responses to commands the client sends back to back
+        self.pipelining = True
+        self.metrics = metrics
+        self.tracer = tracer
+        self.digests = digests
+        self.slow_log = slow_log
+        self.global_variables = global_variables
+        self.info_schema_cache = info_schema_cache
+        self._bytes_received = 0
+        self._bytes_sent = 0
 
         # Authentication plugins can reuse the initial handshake data.
         # This let's clients reuse the nonce when performing COM_CHANGE_USER, skipping a round trip.
@@ -71,10 +152,39 @@ class Connection:
         self.prepared_stmt_seq = seq(self._MAX_PREPARED_STMT_ID)
         self.prepared_stmts: Dict[int, PreparedStatement] = {}
 
+        # Digest of the statement the current command executes, if digests are taken,
+        # and the number of rows it sent
+        self.statement_digest: Optional[Digest] = None
+        self.rows_sent = 0
+
+        # Statement the current command executes and the time spent in each stage
+        # of handling it, for the slow query log
+        self.statement_sql: Optional[str] = None
+        self.statement_expression: Optional[exp.Expression] = None
+        self.stages: Dict[str, float] = {}
+        self._statement_start = 0.0
+        self._statement_timestamp = 0.0
+        self._statement_received = 0
+        self._statement_sent = 0
+
+        # Command byte of the command being handled
+        self.command: Optional[int] = None
+
         self.connection_id: int = 0
         self._kill: Optional[KillKind] = None
+        self._command_running = False
         self._task: Optional[asyncio.Task] = None
 
+    @property
+    def timed(self) -> bool:
+        """Whether stages of handling commands are timed"""
+        return self.metrics is not None or self.slow_log is not None
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        if self.metrics:
+            self.metrics.observe_stage(stage, seconds)
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
     @property
     def server_charset(self) -> CharacterSet:
         return CharacterSet[str(self.session.variables.get("character_set_results"))]
@@ -114,9 +224,21 @@ class Connection:
             else:
                 raise
         finally:
+            for stmt in self.prepared_stmts.values():
+                await self.close_cursor(stmt)
+            if self.metrics:
+                self.metrics.prepared_statements.dec(len(self.prepared_stmts))
+                self._observe_stream(self.metrics)
             await self.session.close()
 
     def kill(self, kind: KillKind = KillKind.CONNECTION) -> None:
+        if kind == KillKind.QUERY:
+            for stmt in self.prepared_stmts.values():
+                if stmt.cursor is not None:
+                    stmt.cursor.cancel()
+            if not self._command_running:
+                # Only the open cursors are running
+                return
         if self._task:
             self._kill = kind
             self._task.cancel()
@@ -169,6 +291,15 @@ class Connection:
         )
         self.stream.reset_seq()
 
+        # Compression starts after the client receives the authentication OK packet.
+        # MySQL prefers zlib if the client sets both flags.
+        if Capabilities.CLIENT_COMPRESS in self.capabilities:
+            self.stream.enable_compression(ZlibCompressor())
+        elif Capabilities.CLIENT_ZSTD_COMPRESSION_ALGORITHM in self.capabilities:
+            self.stream.enable_compression(
+                ZstdCompressor(level=self.zstd_compression_level or 3)
+            )
+
     async def handle_change_user(self, data: bytes) -> None:
         com_change_user = packets.parse_com_change_user(
             capabilities=self.capabilities,
@@ -287,71 +418,245 @@ class Connection:
 
     async def command_phase(self) -> None:
         """https://dev.mysql.com/doc/internals/en/command-phase.html"""
+        try:
+            await self._command_loop()
+        finally:
+            self.stream.coalesce = False
+
+    async def _command_loop(self) -> None:
         while True:
+            received = self.stream.bytes_received
             try:
                 data = await self.stream.read()
             except ConnectionClosed:
                 logger.info("Connection closed")
                 return
-            try:
-                command = data[0]
-                rest = data[1:]
-
-                if command == types.Commands.COM_QUERY:
-                    await self.handle_query(rest)
-                elif command == types.Commands.COM_STMT_PREPARE:
-                    await self.handle_stmt_prepare(rest)
-                elif command == types.Commands.COM_STMT_SEND_LONG_DATA:
-                    await self.handle_stmt_send_long_data(rest)
-                elif command == types.Commands.COM_STMT_EXECUTE:
-                    await self.handle_stmt_execute(rest)
-                elif command == types.Commands.COM_STMT_FETCH:
-                    await self.handle_stmt_fetch(rest)
-                elif command == types.Commands.COM_STMT_RESET:
-                    await self.handle_stmt_reset(rest)
-                elif command == types.Commands.COM_STMT_CLOSE:
-                    await self.handle_stmt_close(rest)
-                elif command == types.Commands.COM_PING:
-                    await self.handle_ping(rest)
-                elif command == types.Commands.COM_CHANGE_USER:
-                    await self.handle_change_user(rest)
-                elif command == types.Commands.COM_RESET_CONNECTION:
-                    await self.handle_reset_connection(rest)
-                elif command == types.Commands.COM_DEBUG:
-                    await self.handle_debug(rest)
-                elif command == types.Commands.COM_QUIT:
-                    return
-                elif command == types.Commands.COM_INIT_DB:
-                    await self.handle_init_db(rest)
-                elif command == types.Commands.COM_FIELD_LIST:
-                    await self.handle_field_list(rest)
-                else:
-                    raise MysqlError(
-                        f"Unsupported Command: {hex(command)}",
-                        ErrorCode.UNKNOWN_COM_ERROR,
-                    )
+            self._command_running = True
+            # Coalesce responses while the client sends more commands without waiting.
+            # COM_CHANGE_USER may need to exchange auth packets with the client.
+            self.stream.coalesce = (
+                self.pipelining
+                and data[:1] != bytes((types.Commands.COM_CHANGE_USER,))
+                and self.stream.has_packet()
+            )
+            sent = self.stream.bytes_sent
+            start = perf_counter()
+            failed = False
+            self._start_statement(received)
+            command_span = self._command_span(data) if self.tracer else tracing.NO_SPAN
+            with command_span as span:
+                try:
+                    command = self.command = data[0]
+                    rest = data[1:]
+
+                    handler: Callable[[bytes], Awaitable[None]]
+                    if command == types.Commands.COM_QUERY:
+                        handler = self.handle_query
+                    elif command == types.Commands.COM_STMT_PREPARE:
+                        handler = self.handle_stmt_prepare
+                    elif command == types.Commands.COM_STMT_SEND_LONG_DATA:
+                        handler = self.handle_stmt_send_long_data
+                    elif command == types.Commands.COM_STMT_EXECUTE:
+                        handler = self.handle_stmt_execute
+                    elif command == types.Commands.COM_STMT_FETCH:
+                        handler = self.handle_stmt_fetch
+                    elif command == types.Commands.COM_STMT_RESET:
+                        handler = self.handle_stmt_reset
+                    elif command == types.Commands.COM_STMT_CLOSE:
+                        handler = self.handle_stmt_close
+                    elif command == types.Commands.COM_PING:
+                        handler = self.handle_ping
+                    elif command == types.Commands.COM_CHANGE_USER:
+                        handler = self.handle_change_user
+                    elif command == types.Commands.COM_RESET_CONNECTION:
+                        handler = self.handle_reset_connection
+                    elif command == types.Commands.COM_DEBUG:
+                        handler = self.handle_debug
+                    elif command == types.Commands.COM_QUIT:
+                        return
+                    elif command == types.Commands.COM_INIT_DB:
+                        handler = self.handle_init_db
+                    elif command == types.Commands.COM_FIELD_LIST:
+                        handler = self.handle_field_list
+                    else:
+                        raise MysqlError(
+                            f"Unsupported Command: {hex(command)}",
+                            ErrorCode.UNKNOWN_COM_ERROR,
+                        )
 
-            except MysqlError as e:
-                logger.error(e)
-                await self.stream.write(self.error(msg=e.msg, code=e.code))
-            except asyncio.CancelledError:
-                if self._kill == KillKind.QUERY:
-                    logger.info("Query killed on connection %s", self.connection_id)
-                    if self._task and hasattr(self._task, "uncancel"):  # python >=3.11
-                        self._task.uncancel()
-                    await self.stream.write(
-                        self.error(
-                            msg="Query was killed", code=ErrorCode.SESSION_WAS_KILLED
+                    if self.tracer is None:
+                        await handler(rest)
+                    else:
+                        with self.tracer.start_as_current_span(
+                            f"mysql.{handler.__name__}",
+                            attributes={tracing.CONNECTION_ID: self.connection_id},
+                        ):
+                            await handler(rest)
+
+                except MysqlError as e:
+                    failed = True
+                    logger.error(e)
+                    if span is not None:
+                        tracing.record_error(span, e, e.code)
+                    await self.stream.write(self.error(msg=e.msg, code=e.code))
+                except asyncio.CancelledError as e:
+                    failed = True
+                    if self._kill == KillKind.QUERY:
+                        logger.info("Query killed on connection %s", self.connection_id)
+                        if span is not None:
+                            tracing.record_error(span, e, ErrorCode.SESSION_WAS_KILLED)
+                        if self._task and hasattr(
+                            self._task, "uncancel"
+                        ):  # python >=3.11
+                            self._task.uncancel()
+                        for stmt in self.prepared_stmts.values():
+                            if stmt.cursor is not None and stmt.cursor.cancelled:
+                                await self.close_cursor(stmt)
+                        await self.stream.write(
+                            self.error(
+                                msg="Query was killed",
+                                code=ErrorCode.SESSION_WAS_KILLED,
+                            )
                         )
-                    )
-                    self._kill = None
-                else:
-                    raise
-            except Exception as e:  # pylint: disable=broad-except
-                logger.exception(e)
-                await self.stream.write(self.error(msg=e))
-            finally:
-                self.stream.reset_seq()
+                        self._kill = None
+                    else:
+                        raise
+                except Exception as e:  # pylint: disable=broad-except
+                    failed = True
+                    logger.exception(e)
+                    if span is not None:
+                        tracing.record_error(span, e, ErrorCode.UNKNOWN_ERROR)
+                    await self.stream.write(self.error(msg=e))
+                finally:
+                    self._command_running = False
+                    self.stream.reset_seq()
+                    if self.stream.coalesce and not self.stream.has_packet():
+                        self.stream.coalesce = False
+                        await self.stream.flush()
+                    if self.metrics:
+                        self._observe_command(self.metrics, data, start, failed)
+                    self._end_statement(failed)
+                    if span is not None:
+                        span.set_attribute(
+                            tracing.BYTES_RECEIVED,
+                            self.stream.bytes_received - received,
+                        )
+                        span.set_attribute(
+                            tracing.BYTES_SENT, self.stream.bytes_sent - sent
+                        )
+
+    def _start_statement(self, received: int) -> None:
+        """Reset the stats of the statement that's executed next"""
+        self.statement_digest = None
+        self.rows_sent = 0
+        self.statement_sql = self.statement_expression = None
+        if self.slow_log is not None:
+            self.stages = {}
+        self._statement_start = perf_counter()
+        self._statement_timestamp = time()
+        self._statement_received = received
+        self._statement_sent = self.stream.bytes_sent
+
+    def _end_statement(self, failed: bool) -> None:
+        """Record the digest and slow query log entry of the statement that was executed"""
+        latency = perf_counter() - self._statement_start
+        if self.digests and self.statement_digest:
+            self.digests.record(
+                schema=self.session.database,
+                statement_digest=self.statement_digest,
+                latency=latency,
+                rows_sent=self.rows_sent,
+                error=failed,
+            )
+        if self.slow_log is not None and self.statement_sql is not None:
+            self._log_slow_query(
+                self.slow_log,
+                self._statement_timestamp,
+                latency,
+                self.stream.bytes_received - self._statement_received,
+                self.stream.bytes_sent - self._statement_sent,
+                failed,
+            )
+
+    def _command_span(self, data: bytes) -> ContextManager[Any]:
+        assert self.tracer is not None
+        return self.tracer.start_as_current_span(
+            "mysql.command",
+            attributes={
+                tracing.DB_SYSTEM: "mysql",
+                tracing.CONNECTION_ID: self.connection_id,
+                tracing.COMMAND: _command_name(data[0] if data else -1),
+            },
+        )
+
+    def _observe_command(
+        self, metrics: ServerMetrics, data: bytes, start: float, failed: bool
+    ) -> None:
+        command = _command_name(data[0] if data else -1)
+        metrics.commands.labels(command).inc()
+        metrics.command_duration.labels(command).observe(perf_counter() - start)
+        if failed:
+            metrics.command_errors.labels(command).inc()
+        self._observe_stream(metrics)
+
+    def _observe_stream(self, metrics: ServerMetrics) -> None:
+        stream = self.stream
+        metrics.received_bytes.inc(stream.bytes_received - self._bytes_received)
+        metrics.sent_bytes.inc(stream.bytes_sent - self._bytes_sent)
+        metrics.observe_buffer_size(stream.max_buffered)
+        self._bytes_received = stream.bytes_received
+        self._bytes_sent = stream.bytes_sent
+
+    def _observe_write(self, start: float, drain_start: float, rows: int) -> None:
+        drain = self.stream.drain_time - drain_start
+        self.observe_stage("encode", perf_counter() - start - drain)
+        self.observe_stage("drain", drain)
+        if self.metrics:
+            self.metrics.rows_sent.inc(rows)
+
+    def _log_slow_query(
+        self,
+        slow_log: SlowQueryLog,
+        timestamp: float,
+        query_time: float,
+        bytes_received: int,
+        bytes_sent: int,
+        failed: bool,
+    ) -> None:
+        variables = self.session.variables
+        if query_time < variables.get("long_query_time", 10.0):
+            return
+        rate_limit = variables.get("log_slow_rate_limit", 1)
+        if rate_limit > 1 and random.random() * rate_limit >= 1:
+            return
+
+        # Digests are only taken for every statement if something else needs them
+        statement_digest = self.statement_digest
+        if statement_digest is None and self.statement_expression is not None:
+            statement_digest = digest(
+                self.statement_expression, getattr(self.session, "dialect", "mysql")
+            )
+
+        peername = self.stream.writer.get_extra_info("peername")
+        assert self.statement_sql is not None
+        slow_log.write(
+            SlowQuery(
+                sql=self.statement_sql,
+                digest=statement_digest.digest if statement_digest else None,
+                digest_text=statement_digest.text if statement_digest else None,
+                connection_id=self.connection_id,
+                user=self.session.username,
+                host=peername[0] if isinstance(peername, tuple) else None,
+                database=self.session.database,
+                timestamp=timestamp,
+                query_time=query_time,
+                stages=self.stages,
+                rows_sent=self.rows_sent,
+                bytes_received=bytes_received,
+                bytes_sent=bytes_sent,
+                error=failed,
+            )
+        )
 
     async def handle_ping(self, data: bytes) -> None:  # pylint: disable=unused-argument
         """
@@ -421,6 +726,10 @@ class Connection:
             data=data,
         )
 
+        if Capabilities.CLIENT_MULTI_STATEMENTS in self.capabilities:
+            await self.multi_query(com_query.sql, com_query.query_attrs)
+            return
+
         result_set = await self.query(com_query.sql, com_query.query_attrs)
 
         if not result_set:
@@ -437,15 +746,18 @@ class Connection:
         """
         sql = self.client_charset.decode(data)
 
-        stmt_id = next(self.prepared_stmt_seq)
-        num_params = len(REGEX_PARAM.findall(sql))
-
-        stmt = PreparedStatement(
-            stmt_id=stmt_id,
+        stmt = PreparedStatement.create(
+            stmt_id=next(self.prepared_stmt_seq),
             sql=sql,
-            num_params=num_params,
+            plan=await self.session.prepare(sql),
         )
-        self.prepared_stmts[stmt_id] = stmt
+        if stmt.plan is not None:
+            description = await self.session.describe_prepared(stmt.plan)
+            if description is not None and len(description.params) == stmt.num_params:
+                stmt.description = description
+        self.prepared_stmts[stmt.stmt_id] = stmt
+        if self.metrics:
+            self.metrics.prepared_statements.inc()
 
         for packet in self.com_stmt_prepare_response(stmt):
             await self.stream.write(packet, drain=False)
@@ -481,43 +793,53 @@ class Connection:
 
         com_stmt_execute.stmt.param_buffers = None
 
-        result_set = await self.query(
-            com_stmt_execute.sql, com_stmt_execute.query_attrs
-        )
+        stmt = com_stmt_execute.stmt
+        await self.close_cursor(stmt)
+        if stmt.plan is not None:
+            logger.debug("Received prepared query: %s", com_stmt_execute.sql)
+            result_set = await ensure_result_set(
+                await self.session.handle_prepared_query(
+                    stmt.plan,
+                    com_stmt_execute.params,
+                    com_stmt_execute.sql,
+                    com_stmt_execute.query_attrs,
+                )
+            )
+        else:
+            result_set = await self.query(
+                com_stmt_execute.sql, com_stmt_execute.query_attrs
+            )
 
         if not result_set:
             await self.stream.write(self.ok())
             return
 
-        await self.stream.write(types.uint_len(len(result_set.columns)))
-
-        for column in result_set.columns:
-            await self.stream.write(
-                packets.make_column_definition_41(
-                    server_charset=self.server_charset,
-                    name=column.name,
-                    column_type=column.type,
-                    character_set=column.character_set,
-                )
-            )
-
-        async def gen_rows() -> AsyncIterator[bytes]:
-            async for r in cooperative_iterate(aiterate(result_set.rows)):
-                yield packets.make_binary_resultrow(r, result_set.columns)
-
-        rows = gen_rows()
+        header_pkts = self.result_metadata(result_set.columns, stmt)
 
         if com_stmt_execute.use_cursor:
-            com_stmt_execute.stmt.cursor = rows
+            stmt.cursor = Cursor(
+                result_set.rows, result_set.columns, prefetch=self.cursor_prefetch
+            )
+            self.stream.write_many(header_pkts)
             await self.stream.write(
                 self.ok_or_eof(flags=types.ServerStatus.SERVER_STATUS_CURSOR_EXISTS)
             )
         else:
-            if not self.deprecate_eof():
-                await self.stream.write(self.eof())
-            async for row in rows:
-                await self.stream.write(row)
-            await self.stream.write(self.ok_or_eof())
+            timed = self.timed
+            start, drain_start = perf_counter(), self.stream.drain_time
+            sent = self.stream.bytes_sent
+            with tracing.span(self.tracer, "mysql.encode") as span:
+                if not self.deprecate_eof():
+                    header_pkts.append(self.eof())
+                self.stream.write_many(header_pkts)
+                rows = await self.write_rows(result_set, binary=True)
+                self.rows_sent = rows
+                await self.stream.write(self.ok_or_eof(), drain=False)
+                if span is not None:
+                    span.set_attribute(tracing.ROWS, rows)
+            await self._drain_result(sent)
+            if timed:
+                self._observe_write(start, drain_start, rows)
 
     async def handle_stmt_fetch(self, data: bytes) -> None:
         """
@@ -528,27 +850,39 @@ class Connection:
         com_stmt_fetch = packets.parse_handle_stmt_fetch(data)
 
         stmt = self.get_stmt(com_stmt_fetch.stmt_id)
-        assert stmt.cursor is not None
-        count = 0
-
-        async for packet in cooperative_iterate(stmt.cursor):
-            if count >= com_stmt_fetch.num_rows:
-                break
-            await self.stream.write(packet, drain=False)
-            count += 1
-        await self.stream.drain()
-
-        done = count < com_stmt_fetch.num_rows
+        if stmt.cursor is None:
+            raise MysqlError(
+                f"The statement ({stmt.stmt_id}) has no open cursor.",
+                ErrorCode.STMT_HAS_NO_OPEN_CURSOR,
+            )
 
-        await self.stream.write(
-            self.ok_or_eof(
-                flags=(
-                    types.ServerStatus.SERVER_STATUS_LAST_ROW_SENT
-                    if done
-                    else types.ServerStatus.SERVER_STATUS_CURSOR_EXISTS
-                )
+        cursor = stmt.cursor
+        if cursor.cancelled:
+            await self.close_cursor(stmt)
+            raise MysqlError("Query was killed", ErrorCode.SESSION_WAS_KILLED)
+        rows = await cursor.fetch(com_stmt_fetch.num_rows)
+        timed = self.timed
+        start, drain_start = perf_counter(), self.stream.drain_time
+        sent = self.stream.bytes_sent
+        with tracing.span(self.tracer, "mysql.encode") as span:
+            await self.stream.write_rows(rows, cursor.columns, binary=True)
+            await self.stream.write(
+                self.ok_or_eof(
+                    flags=(
+                        types.ServerStatus.SERVER_STATUS_LAST_ROW_SENT
+                        if cursor.done
+                        else types.ServerStatus.SERVER_STATUS_CURSOR_EXISTS
+                    )
+                ),
+                drain=False,
             )
-        )
+            if span is not None:
+                span.set_attribute(tracing.ROWS, len(rows))
+        await self._drain_result(sent)
+        if timed:
+            self._observe_write(start, drain_start, len(rows))
+        if cursor.done:
+            await self.close_cursor(stmt)
 
     async def handle_stmt_reset(self, data: bytes) -> None:
         """
@@ -560,7 +894,7 @@ class Connection:
         com_stmt_reset = packets.parse_com_stmt_reset(data)
         stmt = self.get_stmt(com_stmt_reset.stmt_id)
         stmt.param_buffers = None
-        stmt.cursor = None
+        await self.close_cursor(stmt)
         await self.session.reset()
         await self.stream.write(self.ok())
 
@@ -571,7 +905,16 @@ class Connection:
         COM_STMT_CLOSE deallocates a prepared statement.
         """
         com_stmt_close = packets.parse_com_stmt_close(data)
-        self.prepared_stmts.pop(com_stmt_close.stmt_id, None)
+        stmt = self.prepared_stmts.pop(com_stmt_close.stmt_id, None)
+        if stmt:
+            await self.close_cursor(stmt)
+            if self.metrics:
+                self.metrics.prepared_statements.dec()
+
+    async def close_cursor(self, stmt: PreparedStatement) -> None:
+        if stmt.cursor is not None:
+            cursor, stmt.cursor = stmt.cursor, None
+            await cursor.close()
 
     def get_stmt(self, stmt_id: int) -> PreparedStatement:
         if stmt_id in self.prepared_stmts:
@@ -586,6 +929,32 @@ class Connection:
         )
         return result_set
 
+    async def multi_query(self, sql: str, query_attrs: Dict[str, str]) -> None:
+        """
+        Execute statements separated by semicolons, sending each result as it completes.
+
+        Every result but the last has SERVER_MORE_RESULTS_EXISTS set. A statement that
+        fails ends the response with an error, and the statements after it don't run.
+        Digests and slow query log entries are recorded for each statement.
+        """
+        logger.debug("Received query: %s", sql)
+
+        sent = False
+        async for result, more in self.session.handle_multi_query(sql, query_attrs):
+            flags = types.ServerStatus.SERVER_MORE_RESULTS_EXISTS if more else 0
+            result_set = await ensure_result_set(result)
+            if result_set:
+                await self.write_text_resultset(result_set, flags=flags)
+            else:
+                await self.stream.write(self.ok(flags=flags))
+            sent = True
+            if more:
+                # The last statement is recorded once the command completes
+                self._end_statement(failed=False)
+                self._start_statement(self.stream.bytes_received)
+        if not sent:
+            await self.stream.write(self.ok())
+
     def ok(self, **kwargs: Any) -> bytes:
         return packets.make_ok(
             capabilities=self.capabilities,
@@ -625,59 +994,303 @@ class Connection:
     def deprecate_eof(self) -> bool:
         return Capabilities.CLIENT_DEPRECATE_EOF in self.capabilities
 
-    async def write_text_resultset(self, result_set: ResultSet) -> None:
-        # Write header packets
+    def send_metadata(self) -> bool:
+        """
+        Whether result sets include column definitions.
+
+        Clients with CLIENT_OPTIONAL_RESULTSET_METADATA can opt out with
+        `SET resultset_metadata = NONE`.
+        """
+        return (
+            Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA not in self.capabilities
+            or str(self.session.variables.get("resultset_metadata", "FULL")).upper()
+            != "NONE"
+        )
+
+    def result_metadata(
+        self,
+        columns: Sequence[ResultColumn],
+        stmt: Optional[PreparedStatement] = None,
+    ) -> List[bytes]:
+        """
+        Packets that start a result set: the column count and column definitions.
+
+        Args:
+            columns: result columns
+            stmt: prepared statement the result set is for. Clients with
+                CLIENT_OPTIONAL_RESULTSET_METADATA keep the column definitions of
+                prepared statements, so they're only sent when they change.
+        """
+        send = self.send_metadata()
+        shape = _shape(columns)
+        if (
+            send
+            and stmt is not None
+            and Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA in self.capabilities
+        ):
+            send = stmt.result_shape != shape
+            stmt.result_shape = shape
+        if not send:
+            return [
+                packets.make_column_count(
+                    capabilities=self.capabilities,
+                    column_count=len(columns),
+                    metadata=types.ResultsetMetadata.RESULTSET_METADATA_NONE,
+                )
+            ]
         header_pkts = [
             packets.make_column_count(
-                capabilities=self.capabilities, column_count=len(result_set.columns)
+                capabilities=self.capabilities,
+                column_count=len(columns),
             )
         ]
-        for column in result_set.columns:
-            header_pkts.append(
-                packets.make_column_definition_41(
-                    server_charset=self.server_charset,
-                    name=column.name,
-                    column_type=column.type,
-                    character_set=column.character_set,
-                )
+        header_pkts.extend(_column_definitions(self.server_charset, shape))
+        return header_pkts
+
+    async def write_text_resultset(self, result_set: ResultSet, flags: int = 0) -> None:
+        """
+        Write a result set with the text protocol.
+
+        Args:
+            result_set: result set to write
+            flags: status flags of the packet that ends the result set
+        """
+        timed = self.timed
+        start, drain_start = perf_counter(), self.stream.drain_time
+        sent = self.stream.bytes_sent
+
+        with tracing.span(self.tracer, "mysql.encode") as span:
+            # Write header packets
+            header_pkts = self.result_metadata(result_set.columns)
+            if not self.deprecate_eof():
+                header_pkts.append(self.eof())
+            if (
+                isinstance(result_set, EncodedResultSet)
+                and result_set.fallback is not None
+                and result_set.seq_start
+                != (self.stream.seq.value + len(header_pkts)) & 0xFF
+            ):
+                # The encoded rows can't be written, so compute them again
+                result_set = await ensure_result_set(await result_set.fallback())
+                header_pkts = self.result_metadata(result_set.columns)
+                if not self.deprecate_eof():
+                    header_pkts.append(self.eof())
+            self.stream.write_many(header_pkts)
+
+            # Write rows
+            if isinstance(result_set, EncodedResultSet):
+                affected_rows = await self._write_encoded_rows(result_set)
+            elif isinstance(result_set, RecordingResultSet):
+                affected_rows = await self._write_recorded_rows(result_set)
+            elif isinstance(result_set, ColumnarResultSet):
+                affected_rows = 0
+                async for arrays in aiterate(result_set.batches):
+                    affected_rows += self.stream.write_text_columns(
+                        arrays, result_set.columns
+                    )
+                    await self.stream.drain_if_full()
+                    await asyncio.sleep(0)
+            else:
+                affected_rows = await self.write_rows(result_set)
+            self.rows_sent += affected_rows
+
+            await self.stream.write(
+                self.ok_or_eof(affected_rows=affected_rows, flags=flags), drain=False
             )
-        if not self.deprecate_eof():
-            header_pkts.append(self.eof())
-        self.stream.write_many(header_pkts)
+            if span is not None:
+                span.set_attribute(tracing.ROWS, affected_rows)
+
+        await self._drain_result(sent)
+        if timed:
+            self._observe_write(start, drain_start, affected_rows)
+
+    async def _write_encoded_rows(self, result_set: EncodedResultSet) -> int:
+        seq_start = self.stream.reserve_seq(result_set.row_count)
+        if seq_start != result_set.seq_start:
+            raise MysqlError(
+                f"Encoded rows start at sequence ID {result_set.seq_start}, "
+                f"not {seq_start}"
+            )
+        for packets in result_set.packets:
+            self.stream.write_framed(packets)
+            await self.stream.drain_if_full()
+        return result_set.row_count
 
-        # Write rows
+    async def _write_recorded_rows(self, result_set: RecordingResultSet) -> int:
+        seq_start = self.stream.seq.value
+        count = 0
+        async for batch, _ in self._row_batches(result_set.rows):
+            buf = bytearray()
+            encode_text_rows(
+                buf, batch, result_set.columns, self.stream.reserve_seq(len(batch))
+            )
+            result_set.record(buf)
+            self.stream.write_framed(buf)
+            await self.stream.drain_if_full()
+            count += len(batch)
+        result_set.complete(seq_start, count)
+        return count
+
+    async def _drain_result(self, sent: int) -> None:
+        """
+        Flush the rest of a result set.
+
+        Args:
+            sent: `stream.bytes_sent` before the result set was written
+        """
+        with tracing.span(self.tracer, "mysql.drain") as span:
+            await self.stream.drain()
+            if span is not None:
+                # Large result sets are partially flushed while they're encoded
+                span.set_attribute(tracing.BYTES_SENT, self.stream.bytes_sent - sent)
+
+    async def write_rows(self, result_set: ResultSet, binary: bool = False) -> int:
+        """
+        Write all rows of a result set in batches, yielding to the event loop between batches.
+
+        If `encode_executor` is set, batches of large result sets are encoded there,
+        several at a time. Sequence IDs are still assigned here, in order.
+
+        Returns the number of rows written.
+        """
         cols = result_set.columns
-        if isinstance(result_set.rows, (list, tuple)):
-            affected_rows = len(result_set.rows)
+        encode = encode_binary_rows if binary else encode_text_rows
+        loop = asyncio.get_running_loop()
+        pending: Deque[asyncio.Future] = deque()
+        count = 0
+        try:
+            async for batch, offload in self._row_batches(result_set.rows):
+                if offload and self.encode_executor is not None:
+                    seq_start = self.stream.reserve_seq(len(batch))
+                    pending.append(
+                        loop.run_in_executor(
+                            self.encode_executor,
+                            _encode_rows,
+                            encode,
+                            batch,
+                            cols,
+                            seq_start,
+                        )
+                    )
+                    if len(pending) >= self.encode_offload_concurrency:
+                        await self._write_encoded(pending.popleft())
+                else:
+                    while pending:
+                        await self._write_encoded(pending.popleft())
+                    await self.stream.write_rows(batch, cols, binary)
+                count += len(batch)
+            while pending:
+                await self._write_encoded(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+        return count
+
+    async def _write_encoded(self, future: asyncio.Future) -> None:
+        self.stream.write_framed(await future)
+        await self.stream.drain_if_full()
+
+    async def _row_batches(
+        self, rows: Union[Iterable[Sequence[Any]], AsyncIterable[Sequence[Any]]]
+    ) -> AsyncIterator[Tuple[Sequence[Sequence[Any]], bool]]:
+        """
+        Split rows into batches.
+
+        Yields:
+            (batch, whether the batch should be offloaded to the encode executor)
+        """
+        if isinstance(rows, (list, tuple)):
+            offload = len(rows) >= self.encode_offload_threshold
             batch_size = 10_000
-            for i in range(0, affected_rows, batch_size):
-                self.stream.write_text_rows(result_set.rows[i : i + batch_size], cols)
-                if i + batch_size < affected_rows:
+            for i in range(0, len(rows), batch_size):
+                if i:
                     await asyncio.sleep(0)
-        else:
-            affected_rows = 0
-            batch = []
-            async for row in cooperative_iterate(aiterate(result_set.rows)):
-                affected_rows += 1
-                batch.append(packets.make_text_resultset_row(row, cols))
-                if len(batch) >= 1000:
-                    self.stream.write_many(batch)
-                    batch = []
-            if batch:
-                self.stream.write_many(batch)
-
-        await self.stream.write(
-            self.ok_or_eof(affected_rows=affected_rows), drain=False
-        )
-        await self.stream.drain()
+                yield rows[i : i + batch_size], offload
+            return
+
+        count = 0
+        batch = []
+        async for row in cooperative_iterate(aiterate(rows)):
+            batch.append(row)
+            if len(batch) >= 1000:
+                count += len(batch)
+                yield batch, count >= self.encode_offload_threshold
+                batch = []
+        if batch:
+            yield batch, count + len(batch) >= self.encode_offload_threshold
 
     def com_stmt_prepare_response(
         self, statement: PreparedStatement
     ) -> Iterator[bytes]:
-        yield packets.make_com_stmt_prepare_ok(statement)
+        description = statement.description
+        columns = description.columns if description else []
+        if Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA not in self.capabilities:
+            metadata = None
+        elif self.send_metadata():
+            metadata = types.ResultsetMetadata.RESULTSET_METADATA_FULL
+            # The client keeps these, so executions only send them if they change
+            statement.result_shape = _shape(columns) if columns else None
+        else:
+            yield packets.make_com_stmt_prepare_ok(
+                statement,
+                types.ResultsetMetadata.RESULTSET_METADATA_NONE,
+                num_columns=len(columns),
+            )
+            return
+        yield packets.make_com_stmt_prepare_ok(
+            statement, metadata, num_columns=len(columns)
+        )
         if statement.num_params:
-            for _ in range(statement.num_params):
-                yield packets.make_column_definition_41(
-                    server_charset=self.server_charset, name="?"
-                )
+            if description:
+                params = _shape(description.params)
+            else:
+                params = (("?", types.ColumnType.VARCHAR, CharacterSet.utf8mb4),)
+                params *= statement.num_params
+            yield from _column_definitions(self.server_charset, params)
             yield self.eof()
+        if columns:
+            yield from _column_definitions(self.server_charset, _shape(columns))
+            yield self.eof()
+
+
+def _encode_rows(
+    encode: EncodeRows,
+    rows: Sequence[Sequence[Any]],
+    columns: Sequence[ResultColumn],
+    seq_start: int,
+) -> bytearray:
+    """Encode rows into a new buffer. This runs in the encode executor."""
+    buf = bytearray()
+    encode(buf, rows, columns, seq_start)
+    return buf
+
+
+def _shape(
+    columns: Sequence[ResultColumn],
+) -> Tuple[Tuple[str, types.ColumnType, CharacterSet], ...]:
+    return tuple((c.name, c.type, c.character_set) for c in columns)
+
+
+@lru_cache(maxsize=COLUMN_DEFINITIONS_CACHE_SIZE)
+def _column_definitions(
+    server_charset: CharacterSet,
+    shape: Tuple[Tuple[str, types.ColumnType, CharacterSet], ...],
+) -> Tuple[bytes, ...]:
+    """Column definition packets of a result set, cached by the shape of its columns"""
+    return tuple(
+        packets.make_column_definition_41(
+            server_charset=server_charset,
+            name=name,
+            column_type=column_type,
+            character_set=character_set,
+        )
+        for name, column_type, character_set in shape
+    )
+
+
+@lru_cache(maxsize=None)
+def _command_name(command: int) -> str:
+    try:
+        return types.Commands(command).name
+    except ValueError:
+        return "UNKNOWN"
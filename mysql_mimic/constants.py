@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from enum import auto, Enum
+from importlib.util import find_spec
 
 from mysql_mimic.types import Capabilities
 
@@ -17,8 +18,16 @@ DEFAULT_SERVER_CAPABILITIES = (
     | Capabilities.CLIENT_ODBC
     | Capabilities.CLIENT_INTERACTIVE
     | Capabilities.CLIENT_IGNORE_SPACE
+    | Capabilities.CLIENT_COMPRESS
+    | Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA
+    | Capabilities.CLIENT_MULTI_STATEMENTS
+    | Capabilities.CLIENT_MULTI_RESULTS
 )
 
+# zstd compression requires the optional `zstandard` package
+if find_spec("zstandard") is not None:
+    DEFAULT_SERVER_CAPABILITIES |= Capabilities.CLIENT_ZSTD_COMPRESSION_ALGORITHM
+
 
 class KillKind(Enum):
     # Terminate the statement the connection is currently executing, but leave the connection itself intact
@@ -27,6 +36,8 @@ class KillKind(Enum):
     CONNECTION = auto()
 
 
+PERFORMANCE_SCHEMA = "performance_schema"
+
 INFO_SCHEMA = {
     "information_schema": {
         "character_sets": {
@@ -396,4 +407,20 @@ INFO_SCHEMA = {
             "max_user_connections": "INT",
         },
     },
+    PERFORMANCE_SCHEMA: {
+        "events_statements_summary_by_digest": {
+            "schema_name": "TEXT",
+            "digest": "TEXT",
+            "digest_text": "TEXT",
+            "count_star": "INT",
+            "sum_timer_wait": "INT",
+            "min_timer_wait": "INT",
+            "avg_timer_wait": "INT",
+            "max_timer_wait": "INT",
+            "sum_errors": "INT",
+            "sum_rows_sent": "INT",
+            "first_seen": "TEXT",
+            "last_seen": "TEXT",
+        },
+    },
 }
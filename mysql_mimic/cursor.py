@@ -0,0 +1,187 @@
+"""
+Server-side cursors.
+
+A prepared statement executed with a cursor (COM_STMT_EXECUTE with CURSOR_TYPE_READ_ONLY)
+doesn't send its rows right away. The client fetches them in windows of `num_rows` with
+COM_STMT_FETCH instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+)
+
+from mysql_mimic.utils import aiterate, iterate_pages
+
+if TYPE_CHECKING:
+    from mysql_mimic.results import ResultColumn
+
+
+class PagedRows:
+    """
+    Rows of a result set that a backend fetches in pages.
+
+    Return an instance as the rows of a result to receive the number of rows each
+    COM_STMT_FETCH asks for, so the backend can fetch pages of a matching size.
+    Results that aren't fetched with a cursor are read in pages of `page_size`.
+
+    If column types need to be inferred, they are inferred from the first page.
+    """
+
+    page_size = 1000
+
+    def __init__(self) -> None:
+        self._unread: List[Sequence[Any]] = []
+        self._done = False
+
+    async def fetch(self, num_rows: int) -> Sequence[Sequence[Any]]:
+        """
+        Fetch the next page of rows.
+
+        Args:
+            num_rows: number of rows to fetch
+        Returns:
+            Up to `num_rows` rows. Returning fewer rows ends the result.
+        """
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        """Called once all rows are read, or when the client closes the cursor early"""
+
+    async def read(self, num_rows: int) -> Sequence[Sequence[Any]]:
+        """Read the next `num_rows` rows, including any rows that were peeked at"""
+        rows = self._unread[:num_rows]
+        del self._unread[:num_rows]
+        if len(rows) < num_rows and not self._done:
+            wanted = num_rows - len(rows)
+            page = await self.fetch(wanted)
+            if len(page) < wanted:
+                self._done = True
+                await self.close()
+            rows.extend(page)
+        return rows
+
+    async def peek(self) -> Sequence[Sequence[Any]]:
+        """Read the first page, leaving it to be read again"""
+        rows = await self.read(self.page_size)
+        self._unread[:0] = rows
+        return rows
+
+    def __aiter__(self) -> AsyncIterator[Sequence[Any]]:
+        return iterate_pages(self.read, self.page_size)
+
+
+class Cursor:
+    """
+    Server-side cursor over the rows of a result set.
+
+    Rows are read a window at a time. With `prefetch`, the next window of async rows is
+    read in the background while the client processes one window, so backend latency
+    overlaps with the round trip. The rows are then read concurrently with the client's
+    other commands. Sequences are sliced as they are fetched.
+
+    Args:
+        rows: rows of the result set
+        columns: columns of the result set
+        prefetch: read the next window in the background
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Sequence[Any]] | AsyncIterable[Sequence[Any]],
+        columns: Sequence[ResultColumn],
+        prefetch: bool = False,
+    ):
+        self.columns = columns
+        self.prefetch = prefetch and not isinstance(rows, (list, tuple))
+        self._rows = rows
+        self._iterator: Optional[AsyncIterator[Sequence[Any]]] = None
+        if isinstance(rows, PagedRows) or isinstance(rows, (list, tuple)):
+            pass
+        elif isinstance(rows, AsyncIterable):
+            self._iterator = rows.__aiter__()
+        else:
+            self._iterator = aiterate(rows)
+        self._pos = 0
+        self._buffer: List[Sequence[Any]] = []
+        self._next: Optional[asyncio.Task] = None
+        self._exhausted = False
+        self.cancelled = False
+
+    @property
+    def done(self) -> bool:
+        """Whether all rows have been fetched"""
+        return self._exhausted and not self._buffer and self._next is None
+
+    async def fetch(self, num_rows: int) -> Sequence[Sequence[Any]]:
+        """
+        Fetch the next window of rows.
+
+        Returns:
+            Up to `num_rows` rows
+        """
+        if self._next is not None:
+            task, self._next = self._next, None
+            self._buffer.extend(await task)
+        if len(self._buffer) < num_rows and not self._exhausted:
+            self._buffer.extend(await self._read(num_rows - len(self._buffer)))
+
+        rows = self._buffer[:num_rows]
+        del self._buffer[:num_rows]
+
+        if self.prefetch and not self._exhausted and not self._buffer:
+            self._next = asyncio.create_task(self._read(num_rows))
+        return rows
+
+    def cancel(self) -> None:
+        """Stop reading the next window in the background, e.g. when the query is killed"""
+        self.cancelled = True
+        if self._next is not None:
+            self._next.cancel()
+
+    async def close(self) -> None:
+        """Stop reading rows and release the underlying iterator"""
+        if self._next is not None:
+            self._next.cancel()
+            try:
+                await self._next
+            except (asyncio.CancelledError, Exception):  # pylint: disable=broad-except
+                pass
+            self._next = None
+        if not self._exhausted:
+            self._exhausted = True
+            if isinstance(self._rows, PagedRows):
+                await self._rows.close()
+            elif self._iterator is not None and hasattr(self._iterator, "aclose"):
+                await self._iterator.aclose()
+        self._buffer = []
+
+    async def _read(self, num_rows: int) -> List[Sequence[Any]]:
+        if isinstance(self._rows, (list, tuple)):
+            rows = list(self._rows[self._pos : self._pos + num_rows])
+            self._pos += len(rows)
+            if self._pos >= len(self._rows):
+                self._exhausted = True
+        elif isinstance(self._rows, PagedRows):
+            rows = list(await self._rows.read(num_rows))
+        else:
+            assert self._iterator is not None
+            rows = []
+            async for row in self._iterator:
+                rows.append(row)
+                if len(rows) >= num_rows:
+                    break
+                if len(rows) % 10_000 == 0:
+                    await asyncio.sleep(0)
+        if len(rows) < num_rows:
+            self._exhausted = True
+        return rows
@@ -0,0 +1,249 @@
+"""
+Statement digests.
+
+Like MySQL's statement digests, statements that only differ by their literal values
+normalize to the same text, e.g. `SELECT a FROM t WHERE b = ?`, and have the same digest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from time import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlglot import Dialect, expressions as exp
+from sqlglot.dialects import MySQL
+from sqlglot.dialects.dialect import DialectType
+
+# Lists of values are collapsed into this, e.g. `IN (...)`
+_ELLIPSIS = "..."
+
+# Maximum number of normalized statements to keep, keyed by digest
+TEXT_CACHE_SIZE = 4096
+
+_texts: OrderedDict[Tuple[Hashable, str], str] = OrderedDict()
+
+
+@dataclass(frozen=True)
+class Digest:
+    """
+    Args:
+        digest: SHA-256 hash of the statement's structure, as hex
+        text: normalized statement
+    """
+
+    digest: str
+    text: str
+
+
+def normalize(expression: exp.Expression, dialect: DialectType = MySQL) -> str:
+    """
+    Normalize a statement by replacing literals with `?`.
+
+    Lists of values in `IN (...)` and `VALUES (...)` are collapsed, so statements
+    with different numbers of values normalize to the same text.
+
+    The expression isn't modified.
+    """
+    normalized = expression.transform(_normalize_node)
+    return normalized.sql(dialect=Dialect.get_or_raise(dialect))
+
+
+def digest(expression: exp.Expression, dialect: DialectType = MySQL) -> Digest:
+    """
+    Get the digest of a statement.
+
+    The digest is a hash of the AST with literals removed, which is much faster than
+    generating the normalized text. Normalized text is only generated the first time
+    a digest is seen.
+    """
+    hexdigest = fingerprint(expression)
+    key = (dialect, hexdigest)
+    text = _texts.get(key)
+    if text is None:
+        text = _texts[key] = normalize(expression, dialect)
+        if len(_texts) > TEXT_CACHE_SIZE:
+            _texts.popitem(last=False)
+    else:
+        _texts.move_to_end(key)
+    return Digest(digest=hexdigest, text=text)
+
+
+def fingerprint(expression: exp.Expression, literals: bool = False) -> str:
+    """
+    SHA-256 hash of a statement's structure, as hex.
+
+    Args:
+        expression: the statement
+        literals: include literals, so only statements that are the same
+            except for formatting and case of keywords have the same hash.
+    """
+    parts: List[str] = []
+    _fingerprint(expression, parts, literals)
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class DigestSummary:
+    """
+    Statement statistics aggregated by schema and digest, like MySQL's
+    `performance_schema.events_statements_summary_by_digest`.
+
+    Once `maxsize` digests are recorded, statements with new digests are aggregated
+    into a single row with a NULL schema and digest, like MySQL does.
+
+    Args:
+        maxsize: maximum number of rows
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._rows: Dict[Tuple[Optional[str], Optional[str]], _DigestStats] = {}
+
+    def record(
+        self,
+        schema: Optional[str],
+        statement_digest: Digest,
+        latency: float,
+        rows_sent: int,
+        error: bool,
+    ) -> None:
+        """
+        Record a statement.
+
+        Args:
+            schema: default database of the statement
+            statement_digest: digest of the statement
+            latency: time to execute the statement, including sending its result, in seconds
+            rows_sent: number of rows sent
+            error: whether the statement failed
+        """
+        key: Tuple[Optional[str], Optional[str]] = (schema, statement_digest.digest)
+        stats = self._rows.get(key)
+        if stats is None:
+            if len(self._rows) >= self.maxsize:
+                key = (None, None)
+                stats = self._rows.get(key)
+            if stats is None:
+                text = statement_digest.text if key[1] is not None else None
+                stats = self._rows[key] = _DigestStats(text)
+        stats.record(int(latency * 1e12), rows_sent, error)
+
+    def rows(self) -> List[Tuple[Any, ...]]:
+        """Rows of `performance_schema.events_statements_summary_by_digest`"""
+        return [
+            (
+                schema,  # schema_name
+                hexdigest,  # digest
+                stats.text,  # digest_text
+                stats.count,  # count_star
+                stats.sum_timer_wait,  # sum_timer_wait
+                stats.min_timer_wait,  # min_timer_wait
+                stats.sum_timer_wait // stats.count,  # avg_timer_wait
+                stats.max_timer_wait,  # max_timer_wait
+                stats.errors,  # sum_errors
+                stats.rows_sent,  # sum_rows_sent
+                _format_time(stats.first_seen),  # first_seen
+                _format_time(stats.last_seen),  # last_seen
+            )
+            for (schema, hexdigest), stats in self._rows.items()
+        ]
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+
+class _DigestStats:
+    __slots__ = (
+        "text",
+        "count",
+        "sum_timer_wait",
+        "min_timer_wait",
+        "max_timer_wait",
+        "errors",
+        "rows_sent",
+        "first_seen",
+        "last_seen",
+    )
+
+    def __init__(self, text: Optional[str]):
+        self.text = text
+        self.count = 0
+        self.sum_timer_wait = 0
+        self.min_timer_wait = 0
+        self.max_timer_wait = 0
+        self.errors = 0
+        self.rows_sent = 0
+        self.first_seen = self.last_seen = time()
+
+    def record(self, timer_wait: int, rows_sent: int, error: bool) -> None:
+        if not self.count or timer_wait < self.min_timer_wait:
+            self.min_timer_wait = timer_wait
+        self.max_timer_wait = max(self.max_timer_wait, timer_wait)
+        self.count += 1
+        self.sum_timer_wait += timer_wait
+        self.rows_sent += rows_sent
+        self.errors += error
+        self.last_seen = time()
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _is_value(node: exp.Expression) -> bool:
+    return isinstance(node, (exp.Literal, exp.Placeholder, exp.Null, exp.Boolean)) or (
+        isinstance(node, exp.Neg) and isinstance(node.this, exp.Literal)
+    )
+
+
+def _is_literal(node: exp.Expression) -> bool:
+    return isinstance(node, exp.Literal) or (
+        isinstance(node, exp.Neg) and isinstance(node.this, exp.Literal)
+    )
+
+
+def _fingerprint(node: exp.Expression, parts: List[str], literals: bool) -> None:
+    """Serialize an AST into `parts`. Without literals, the same way `normalize` does."""
+    if not literals and _is_literal(node):
+        parts.append("?")
+        return
+    parts.append(node.key)
+    parts.append("(")
+    for key, value in node.args.items():
+        if value is None or value is False or value == []:
+            continue
+        parts.append(key)
+        if isinstance(value, exp.Expression):
+            _fingerprint(value, parts, literals)
+        elif isinstance(value, list):
+            if key == "expressions" and not literals:
+                if isinstance(node, exp.In) and all(_is_value(v) for v in value):
+                    parts.append(_ELLIPSIS)
+                    continue
+                if isinstance(node, exp.Values):
+                    value = value[:1]
+            parts.append("[")
+            for v in value:
+                if isinstance(v, exp.Expression):
+                    _fingerprint(v, parts, literals)
+                else:
+                    parts.append(str(v))
+            parts.append("]")
+        else:
+            parts.append(str(value))
+    parts.append(")")
+
+
+def _normalize_node(node: exp.Expression) -> exp.Expression:
+    # Nodes are transformed before their children
+    if _is_literal(node):
+        return exp.Placeholder()
+    if isinstance(node, exp.In) and node.expressions:
+        if all(_is_value(e) for e in node.expressions):
+            node.set("expressions", [exp.Var(this=_ELLIPSIS)])
+    if isinstance(node, exp.Values) and len(node.expressions) > 1:
+        node.set("expressions", node.expressions[:1])
+    return node
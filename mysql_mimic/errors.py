@@ -16,6 +16,7 @@ class ErrorCode(IntEnum):
     UNKNOWN_ERROR = 1105
     WRONG_VALUE_FOR_VAR = 1231
     NOT_SUPPORTED_YET = 1235
+    STMT_HAS_NO_OPEN_CURSOR = 1421
     MALFORMED_PACKET = 1835
     USER_DOES_NOT_EXIST = 3162
     SESSION_WAS_KILLED = 3169
@@ -0,0 +1,94 @@
+"""
+Answer trivial statements without parsing them.
+
+Connection pools and drivers send the same handful of statements over and over,
+e.g. `SELECT 1`, `SET autocommit=1` or `ROLLBACK`. Fast paths recognize these with
+regular expressions and answer them directly, skipping sqlglot and the middleware chain.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Awaitable, List, Optional, Union, Pattern, Match
+
+from mysql_mimic.results import AllowedResult
+
+FastPathHandler = Callable[[Match[str]], Awaitable[AllowedResult]]
+
+# Leading whitespace and comments.
+# Optimizer hints (/*+ ... */) and executable comments (/*! ... */) aren't comments.
+_LEADING = re.compile(r"(?:\s+|/\*(?![!+]).*?\*/|(?:--\s|#)[^\n]*(?:\n|$))*", re.DOTALL)
+_TRAILING = re.compile(r"[\s;]*$")
+
+_VARIABLE = r"@@(?:(?:SESSION|LOCAL|GLOBAL)\.)?\w+"
+_INT = r"[1-9]\d*|0"
+_NAME = r"[a-zA-Z_]\w*"
+
+SELECT_INTS = re.compile(rf"SELECT\s+((?:{_INT})(?:\s*,\s*(?:{_INT}))*)", re.IGNORECASE)
+SELECT_VARIABLES = re.compile(
+    rf"SELECT\s+({_VARIABLE}(?:\s*,\s*{_VARIABLE})*)(?:\s+LIMIT\s+(\d+))?",
+    re.IGNORECASE,
+)
+SET_VARIABLE = re.compile(
+    rf"SET\s+(?:(?:SESSION|LOCAL)\s+|@@(?:(?:SESSION|LOCAL)\.)?)?({_NAME})\s*=\s*"
+    rf"(\d+|'[^'\\]*'|TRUE|FALSE|NULL|ON|OFF|DEFAULT)",
+    re.IGNORECASE,
+)
+SET_NAMES = re.compile(
+    rf"SET\s+NAMES\s+({_NAME})(?:\s+COLLATE\s+({_NAME}))?", re.IGNORECASE
+)
+TRANSACTION = re.compile(
+    r"(?:ROLLBACK|COMMIT|BEGIN|START\s+TRANSACTION)(?:\s+WORK)?", re.IGNORECASE
+)
+
+
+@dataclass
+class FastPath:
+    """
+    Template for a statement that can be answered without parsing it.
+
+    Args:
+        pattern: regular expression that must match the entire statement, once leading
+            comments, surrounding whitespace and trailing semicolons are removed.
+            Strings are compiled case-insensitive.
+        handler: called with the match. It can return None to fall back to the
+            normal path, so return `[], []` for statements that don't have a result.
+    """
+
+    pattern: Union[str, Pattern[str]]
+    handler: FastPathHandler
+
+    def __post_init__(self) -> None:
+        if isinstance(self.pattern, str):
+            self.pattern = re.compile(self.pattern, re.IGNORECASE)
+
+    def match(self, statement: str) -> Optional[Match[str]]:
+        assert not isinstance(self.pattern, str)
+        return self.pattern.fullmatch(statement)
+
+
+def strip(sql: str) -> str:
+    """Remove leading comments, surrounding whitespace and trailing semicolons"""
+    start = _LEADING.match(sql).end()  # type: ignore[union-attr]
+    end = _TRAILING.search(sql, start).start()  # type: ignore[union-attr]
+    return sql[start:end]
+
+
+async def answer(fast_paths: List[FastPath], sql: str) -> Optional[AllowedResult]:
+    """
+    Try to answer a statement with fast paths.
+
+    Returns:
+        The result of the first matching fast path that handles the statement, or None.
+    """
+    if not fast_paths:
+        return None
+    statement = strip(sql)
+    for fast_path in fast_paths:
+        m = fast_path.match(statement)
+        if m:
+            result = await fast_path.handler(m)
+            if result is not None:
+                return result
+    return None
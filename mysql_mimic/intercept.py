@@ -41,7 +41,7 @@ def value_to_expression(value: Any) -> exp.Expression:
     return exp.Literal.string(str(value))
 
 
-def expression_to_value(expression: exp.Expression) -> Any:
+def expression_to_value(expression: exp.Expression, bare_words: bool = False) -> Any:
     if expression == exp.true():
         return True
     if expression == exp.false():
@@ -61,6 +61,12 @@ def expression_to_value(expression: exp.Expression) -> Any:
         return True
     if expression.name == "OFF":
         return False
+    if bare_words and (
+        isinstance(expression, exp.Var)
+        or (isinstance(expression, exp.Column) and not expression.table)
+    ):
+        # E.g. SET resultset_metadata = NONE
+        return expression.name
     raise MysqlError(
         "Complex expressions in variables not supported yet",
         code=ErrorCode.NOT_SUPPORTED_YET,
@@ -0,0 +1,345 @@
+"""
+Server metrics.
+
+Metrics are kept in a `Registry`, which renders them in the Prometheus text format.
+The registry API mirrors `prometheus_client`, so another registry can be plugged in,
+as long as its `counter`, `gauge` and `histogram` methods return metrics with
+`labels(...)`, `inc`, `set` and `observe` methods.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+)
+
+# Stages of handling a query, for `mysql_mimic_stage_duration_seconds`
+STAGES = ("parse", "middleware", "query", "encode", "drain")
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any) -> Any:
+        """Get the child metric for a combination of label values"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"Expected labels {self.labelnames} for {self.name}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError()
+
+    def _samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError()
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self._samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class _Value:
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for key, child in self._children.items():
+            yield self.name, dict(zip(self.labelnames, key)), child.value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for key, child in self._children.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip([*self.buckets, math.inf], child.counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                yield f"{self.name}_bucket", {**labels, "le": le}, cumulative
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """Collection of metrics that renders in the Prometheus text format"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return "".join(m.render() for m in self._metrics.values())
+
+    def _register(self, metric: Any) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+class ServerMetrics:
+    """
+    Metrics of a MysqlServer.
+
+    Args:
+        registry: registry to create the metrics in. Defaults to a new `Registry`.
+        buckets: latency histogram buckets, in seconds
+    """
+
+    def __init__(
+        self, registry: Any = None, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.registry = registry if registry is not None else Registry()
+        r = self.registry
+        self.commands = r.counter(
+            "mysql_mimic_commands_total", "Commands received", ["command"]
+        )
+        self.command_errors = r.counter(
+            "mysql_mimic_command_errors_total",
+            "Commands that returned an error",
+            ["command"],
+        )
+        self.command_duration = r.histogram(
+            "mysql_mimic_command_duration_seconds",
+            "Time to handle a command",
+            ["command"],
+            buckets=buckets,
+        )
+        self.stage_duration = r.histogram(
+            "mysql_mimic_stage_duration_seconds",
+            "Time spent in each stage of handling a query",
+            ["stage"],
+            buckets=buckets,
+        )
+        self.received_bytes = r.counter(
+            "mysql_mimic_received_bytes_total", "Bytes received from clients"
+        )
+        self.sent_bytes = r.counter(
+            "mysql_mimic_sent_bytes_total", "Bytes sent to clients"
+        )
+        self.rows_sent = r.counter("mysql_mimic_rows_sent_total", "Result rows sent")
+        self.connections = r.gauge("mysql_mimic_connections", "Open connections")
+        self.connections_total = r.counter(
+            "mysql_mimic_connections_total", "Connections accepted"
+        )
+        self.prepared_statements = r.gauge(
+            "mysql_mimic_prepared_statements", "Open prepared statements"
+        )
+        self.write_buffer_high_water = r.gauge(
+            "mysql_mimic_write_buffer_high_water_bytes",
+            "Largest write buffer of any connection",
+        )
+
+        # Label lookups are cached, since they're on the request path
+        self._stages = {stage: self.stage_duration.labels(stage) for stage in STAGES}
+        self._buffer_high_water = 0
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        child = self._stages.get(stage)
+        if child is None:
+            child = self._stages[stage] = self.stage_duration.labels(stage)
+        child.observe(seconds)
+
+    def observe_buffer_size(self, size: int) -> None:
+        if size > self._buffer_high_water:
+            self._buffer_high_water = size
+            self.write_buffer_high_water.set(size)
+
+
+class StageTimer:
+    """
+    Measures a stage of handling a query with `observe_stage`.
+
+    Args:
+        metrics: `ServerMetrics`, or a `Connection`, which also keeps the stage
+            timings of the current command
+        stage: name of the stage
+    """
+
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: Any, stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> StageTimer:
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.metrics.observe_stage(self.stage, perf_counter() - self.start)
+
+
+async def start_metrics_server(
+    registry: Any, host: Optional[str] = None, port: int = 9104
+) -> asyncio.base_events.Server:
+    """
+    Serve `registry.render()` over HTTP at /metrics, on the running event loop.
+
+    Returns:
+        The asyncio server
+    """
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            method, path, *_ = request.split(b"\r\n", 1)[0].decode().split(" ")
+            if method == "GET" and path.split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = registry.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        except ConnectionError:
+            pass
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to serve metrics")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host=host, port=port)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -5,7 +5,7 @@ from typing import Optional, Dict, Any, Sequence, Callable, Tuple, List, Union
 from mysql_mimic.charset import Collation, CharacterSet
 from mysql_mimic.constants import DEFAULT_SERVER_CAPABILITIES
 from mysql_mimic.errors import ErrorCode, get_sqlstate, MysqlError
-from mysql_mimic.prepared import PreparedStatement, REGEX_PARAM
+from mysql_mimic.prepared import PreparedStatement
 from mysql_mimic.results import NullBitmap, ResultColumn
 from mysql_mimic.types import (
     Capabilities,
@@ -89,6 +89,7 @@ class ComStmtExecute:
     query_attrs: Dict[str, str]
     stmt: PreparedStatement
     use_cursor: bool
+    params: Sequence[Any] = ()
 
 
 @dataclass
@@ -325,11 +326,15 @@ def parse_com_query(
     )
 
 
-def make_column_count(capabilities: Capabilities, column_count: int) -> bytes:
+def make_column_count(
+    capabilities: Capabilities,
+    column_count: int,
+    metadata: ResultsetMetadata = ResultsetMetadata.RESULTSET_METADATA_FULL,
+) -> bytes:
     parts = []
 
     if Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA in capabilities:
-        parts.append(uint_1(ResultsetMetadata.RESULTSET_METADATA_FULL))
+        parts.append(uint_1(metadata))
 
     parts.append(uint_len(column_count))
 
@@ -397,15 +402,23 @@ def make_text_resultset_row(
     return b"".join(parts)
 
 
-def make_com_stmt_prepare_ok(statement: PreparedStatement) -> bytes:
-    return _concat(
+def make_com_stmt_prepare_ok(
+    statement: PreparedStatement,
+    metadata: Optional[ResultsetMetadata] = None,
+    num_columns: int = 0,
+) -> bytes:
+    parts = [
         uint_1(0),  # OK
         uint_4(statement.stmt_id),
-        uint_2(0),  # number of columns
+        uint_2(num_columns),
         uint_2(statement.num_params),
         uint_1(0),  # filler
         uint_2(0),  # number of warnings
-    )
+    ]
+    # Only with CLIENT_OPTIONAL_RESULTSET_METADATA
+    if metadata is not None:
+        parts.append(uint_1(metadata))
+    return _concat(*parts)
 
 
 def parse_com_stmt_send_long_data(data: bytes) -> ComStmtSendLongData:
@@ -428,14 +441,15 @@ def parse_com_stmt_execute(
     stmt = get_stmt(stmt_id)
     use_cursor, param_count_available = _read_cursor_flags(r)
     read_uint_4(r)  # iteration count. Always 1.
-    sql, query_attrs = _interpolate_params(
+    params, query_attrs = _read_stmt_params(
         capabilities, client_charset, r, stmt, param_count_available
     )
     return ComStmtExecute(
-        sql=sql,
+        sql=stmt.interpolate(params),
         query_attrs=query_attrs,
         stmt=stmt,
         use_cursor=use_cursor,
+        params=params,
     )
 
 
@@ -496,14 +510,14 @@ def _read_cursor_flags(reader: io.BytesIO) -> Tuple[bool, bool]:
     raise MysqlError(f"Unsupported cursor flags: {flags}", ErrorCode.NOT_SUPPORTED_YET)
 
 
-def _interpolate_params(
+def _read_stmt_params(
     capabilities: Capabilities,
     client_charset: CharacterSet,
     reader: io.BytesIO,
     stmt: PreparedStatement,
     param_count_available: bool,
-) -> Tuple[str, Dict[str, str]]:
-    sql = stmt.sql
+) -> Tuple[List[Any], Dict[str, str]]:
+    params: List[Any] = []
     query_attrs = {}
     parameter_count = stmt.num_params
 
@@ -516,28 +530,16 @@ def _interpolate_params(
     if parameter_count > 0:
         # When there are query attributes, they are combined with statement parameters.
         # The statement parameters will be first, query attributes second.
-        params = _read_params(
+        named_params = _read_params(
             capabilities, client_charset, reader, parameter_count, stmt.param_buffers
         )
 
-        for _, value in params[: stmt.num_params]:
-            sql = REGEX_PARAM.sub(_encode_param_as_sql(value), sql, 1)
-
-        query_attrs = {k: v for k, v in params[stmt.num_params :] if k is not None}
-
-    return sql, query_attrs
-
+        params = [value for _, value in named_params[: stmt.num_params]]
+        query_attrs = {
+            k: v for k, v in named_params[stmt.num_params :] if k is not None
+        }
 
-def _encode_param_as_sql(param: Any) -> str:
-    if isinstance(param, str):
-        return f"'{param}'"
-    if param is None:
-        return "NULL"
-    if param is True:
-        return "TRUE"
-    if param is False:
-        return "FALSE"
-    return str(param)
+    return params, query_attrs
 
 
 def _read_params(
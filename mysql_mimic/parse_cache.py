@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Tuple, Hashable, cast
+
+from sqlglot import Dialect, expressions as exp
+from sqlglot.dialects.dialect import DialectType
+
+
+@dataclass(frozen=True)
+class ParseCacheInfo:
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ParseCache:
+    """
+    LRU cache of parsed SQL statements.
+
+    A server shares one cache across all of its sessions.
+
+    Middlewares are free to modify expressions in place, so cached trees are never
+    handed out. Every lookup returns copies.
+
+    Args:
+        maxsize: maximum number of statements to cache. 0 disables caching.
+        max_sql_length: statements longer than this aren't cached.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_sql_length: int = 8192):
+        self.maxsize = maxsize
+        self.max_sql_length = max_sql_length
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[Tuple[Hashable, str], List[exp.Expression]] = (
+            OrderedDict()
+        )
+
+    def parse(self, dialect: DialectType, sql: str) -> List[exp.Expression]:
+        """
+        Parse SQL, using cached expressions if possible.
+
+        Args:
+            dialect: sqlglot dialect
+            sql: SQL string
+        Returns:
+            Copies of the parsed statements
+        """
+        key = (dialect, sql)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return [e.copy() for e in cached]  # type: ignore[misc]
+
+        self.misses += 1
+        expressions = cast(
+            List[exp.Expression],
+            [e for e in Dialect.get_or_raise(dialect).parse(sql) if e],
+        )
+        if self.maxsize > 0 and len(sql) <= self.max_sql_length:
+            self._cache[key] = [e.copy() for e in expressions]  # type: ignore[misc]
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return expressions
+
+    def info(self) -> ParseCacheInfo:
+        return ParseCacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            maxsize=self.maxsize,
+            currsize=len(self._cache),
+        )
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -1,10 +1,298 @@
 import re
-from dataclasses import dataclass
-from typing import Optional, Dict, AsyncIterable
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Sequence, Any, Tuple, cast
+
+from sqlglot import Dialect, expressions as exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.annotate_types import annotate_types
+from sqlglot.optimizer.qualify import qualify
+from sqlglot.schema import MappingSchema
+from sqlglot.tokens import TokenType
+
+from mysql_mimic.cursor import Cursor
+from mysql_mimic.results import ResultColumn
+from mysql_mimic.types import ColumnType
 
 # Borrowed from mysql-connector-python
 REGEX_PARAM = re.compile(r"""\?(?=(?:[^"'`]*["'`][^"'`]*["'`])*[^"'`]*$)""")
 
+# Comment used to tag placeholder tokens with their position while parsing
+_PARAM_TAG = "__mysql_mimic_param_"
+
+
+@dataclass
+class PreparedPlan:
+    """
+    Statements parsed once at prepare time.
+
+    Args:
+        expressions: parsed statements, with `exp.Placeholder` nodes for parameters
+        param_indexes: for each placeholder, in `find_all` order, the index of its parameter
+    """
+
+    expressions: List[exp.Expression]
+    param_indexes: List[int]
+
+    @property
+    def num_params(self) -> int:
+        return len(self.param_indexes)
+
+    def bind(self, params: Sequence[Any]) -> List[exp.Expression]:
+        """Bind parameter values as literals into copies of the statements"""
+        param_indexes = iter(self.param_indexes)
+        bound = []
+        for expression in self.expressions:
+            expression = expression.copy()
+            for placeholder in list(expression.find_all(exp.Placeholder, bfs=False)):
+                literal = param_to_literal(params[next(param_indexes)])
+                literal.comments = placeholder.comments
+                if placeholder is expression:
+                    expression = literal
+                else:
+                    placeholder.replace(literal)
+            bound.append(expression)
+        return bound
+
+
+def make_plan(dialect: Dialect, sql: str) -> Optional[PreparedPlan]:
+    """
+    Parse a prepared statement.
+
+    sqlglot doesn't keep placeholders in textual order (e.g. `LIMIT ?, ?`), so each
+    placeholder token is tagged with its position before parsing.
+
+    Returns:
+        The plan, or None if the statement can't be planned, in which case parameters
+        should be interpolated into the SQL of each execution instead.
+    """
+    try:
+        tokens = dialect.tokenize(sql)
+        num_params = 0
+        for token in tokens:
+            if token.token_type == TokenType.PLACEHOLDER:
+                token.comments = [*token.comments, f"{_PARAM_TAG}{num_params}"]
+                num_params += 1
+        expressions = cast(
+            List[exp.Expression],
+            [e for e in dialect.parser().parse(tokens, sql) if e],
+        )
+    except SqlglotError:
+        return None
+
+    param_indexes = []
+    for expression in expressions:
+        for node in expression.walk(bfs=False):
+            comments = node.comments or []
+            tags = [c for c in comments if c.startswith(_PARAM_TAG)]
+            if tags and not isinstance(node, exp.Placeholder):
+                # The parser moves comments to some parent nodes, e.g. aliases
+                child = node.this
+                if len(tags) != 1 or not isinstance(child, exp.Placeholder):
+                    return None
+                node.comments = [c for c in comments if c != tags[0]] or None
+                child.comments = [*(child.comments or []), tags[0]]
+
+        for placeholder in expression.find_all(exp.Placeholder, bfs=False):
+            if placeholder.this:
+                # Named placeholder
+                return None
+            comments = placeholder.comments or []
+            tags = [c for c in comments if c.startswith(_PARAM_TAG)]
+            if len(tags) != 1:
+                return None
+            param_indexes.append(int(tags[0][len(_PARAM_TAG) :]))
+            placeholder.comments = [c for c in comments if c != tags[0]] or None
+
+    if sorted(param_indexes) != list(range(num_params)):
+        return None
+
+    return PreparedPlan(expressions=expressions, param_indexes=param_indexes)
+
+
+@dataclass
+class PreparedDescription:
+    """
+    Types reported to the client when it prepares a statement.
+
+    Args:
+        params: a column for each parameter, in order. The names are ignored.
+        columns: result columns, or an empty list if they aren't known
+    """
+
+    params: List[ResultColumn]
+    columns: List[ResultColumn]
+
+
+_TYPES = {
+    exp.DataType.Type.BOOLEAN: ColumnType.TINY,
+    exp.DataType.Type.TINYINT: ColumnType.TINY,
+    exp.DataType.Type.UTINYINT: ColumnType.TINY,
+    exp.DataType.Type.SMALLINT: ColumnType.SHORT,
+    exp.DataType.Type.USMALLINT: ColumnType.SHORT,
+    exp.DataType.Type.MEDIUMINT: ColumnType.INT24,
+    exp.DataType.Type.UMEDIUMINT: ColumnType.INT24,
+    exp.DataType.Type.INT: ColumnType.LONG,
+    exp.DataType.Type.UINT: ColumnType.LONG,
+    exp.DataType.Type.BIGINT: ColumnType.LONGLONG,
+    exp.DataType.Type.UBIGINT: ColumnType.LONGLONG,
+    exp.DataType.Type.FLOAT: ColumnType.FLOAT,
+    exp.DataType.Type.DOUBLE: ColumnType.DOUBLE,
+    exp.DataType.Type.DECIMAL: ColumnType.DECIMAL,
+    exp.DataType.Type.DATE: ColumnType.DATE,
+    exp.DataType.Type.DATETIME: ColumnType.DATETIME,
+    exp.DataType.Type.TIMESTAMP: ColumnType.TIMESTAMP,
+    exp.DataType.Type.TIME: ColumnType.TIME,
+    exp.DataType.Type.YEAR: ColumnType.YEAR,
+    exp.DataType.Type.CHAR: ColumnType.STRING,
+    exp.DataType.Type.VARCHAR: ColumnType.STRING,
+    exp.DataType.Type.TINYTEXT: ColumnType.STRING,
+    exp.DataType.Type.TEXT: ColumnType.STRING,
+    exp.DataType.Type.MEDIUMTEXT: ColumnType.STRING,
+    exp.DataType.Type.LONGTEXT: ColumnType.STRING,
+    exp.DataType.Type.BINARY: ColumnType.BLOB,
+    exp.DataType.Type.VARBINARY: ColumnType.BLOB,
+    exp.DataType.Type.TINYBLOB: ColumnType.BLOB,
+    exp.DataType.Type.BLOB: ColumnType.BLOB,
+    exp.DataType.Type.MEDIUMBLOB: ColumnType.BLOB,
+    exp.DataType.Type.LONGBLOB: ColumnType.BLOB,
+    exp.DataType.Type.JSON: ColumnType.JSON,
+}
+
+# Comparisons whose parameters take the type of the other operand
+_COMPARISONS = (exp.EQ, exp.NEQ, exp.NullSafeEQ, exp.GT, exp.GTE, exp.LT, exp.LTE)
+
+
+def describe_plan(
+    plan: PreparedPlan,
+    dialect: Dialect,
+    schema: dict,
+    db: Optional[str] = None,
+) -> Optional[PreparedDescription]:
+    """
+    Infer the types of a prepared statement's parameters and result columns.
+
+    Parameters are typed by what they're compared with, inserted into, or used for,
+    e.g. `LIMIT ?`. Parameters with no known type are described as strings.
+    Result columns are only described if the types of all of them are known.
+
+    Args:
+        plan: plan of the statement
+        dialect: dialect the statement was parsed with
+        schema: mapping of {db: {table: {column: column_type}}}, or any other
+            depth accepted by `Session.schema`
+        db: current database
+    Returns:
+        The description, or None if the plan has more than one statement.
+    """
+    if len(plan.expressions) != 1:
+        return None
+    expression = plan.expressions[0].copy()
+    placeholders = len(list(expression.find_all(exp.Placeholder)))
+
+    try:
+        mapping = MappingSchema(schema, dialect=dialect)
+        if isinstance(expression, exp.Query):
+            # Like MySQL, name expressions after their SQL instead of `_col_0`
+            for select in expression.selects:
+                if not isinstance(select, (exp.Alias, exp.Column, exp.Star)):
+                    select.replace(exp.alias_(select.copy(), select.sql(dialect)))
+        expression = qualify(expression, dialect=dialect, db=db, schema=mapping)
+        expression = annotate_types(expression, schema=mapping, dialect=dialect)
+    except SqlglotError:
+        return None
+
+    nodes = list(expression.find_all(exp.Placeholder, bfs=False))
+    if len(nodes) != placeholders:
+        return None
+    # Columns of UPDATE, DELETE and INSERT statements aren't qualified
+    table = (
+        expression.this if isinstance(expression, (exp.Update, exp.Delete)) else None
+    )
+    param_types = [ColumnType.STRING] * plan.num_params
+    for index, placeholder in zip(plan.param_indexes, nodes):
+        param_types[index] = (
+            _param_type(placeholder, mapping, table) or ColumnType.STRING
+        )
+    params = [ResultColumn(name="?", type=type_) for type_ in param_types]
+
+    columns: List[ResultColumn] = []
+    if isinstance(expression, exp.Query):
+        for select in expression.selects:
+            type_ = _column_type(select.type)
+            if type_ is None:
+                columns = []
+                break
+            columns.append(ResultColumn(name=select.alias_or_name, type=type_))
+
+    return PreparedDescription(params=params, columns=columns)
+
+
+def _param_type(
+    placeholder: exp.Placeholder,
+    schema: MappingSchema,
+    table: Optional[exp.Expression],
+) -> Optional[ColumnType]:
+    parent = placeholder.parent
+    if isinstance(parent, _COMPARISONS):
+        other = parent.right if placeholder is parent.left else parent.left
+        return _operand_type(cast(exp.Expression, other), schema, table)
+    if isinstance(parent, (exp.In, exp.Between)) and placeholder is not parent.this:
+        return _operand_type(parent.this, schema, table)
+    if isinstance(parent, (exp.Limit, exp.Offset)):
+        return ColumnType.LONGLONG
+    if isinstance(parent, exp.Tuple) and isinstance(parent.parent, exp.Values):
+        insert = parent.parent.parent
+        if isinstance(insert, exp.Insert) and isinstance(insert.this, exp.Schema):
+            columns = insert.this.expressions
+            position = placeholder.index or 0
+            if position < len(columns):
+                return _operand_type(columns[position], schema, insert.this.this)
+    return None
+
+
+def _operand_type(
+    node: exp.Expression, schema: MappingSchema, table: Optional[exp.Expression]
+) -> Optional[ColumnType]:
+    type_ = _column_type(node.type)
+    if type_ is None and isinstance(node, (exp.Column, exp.Identifier)):
+        if not isinstance(table, exp.Table):
+            return None
+        try:
+            return _column_type(schema.get_column_type(table, node.name))
+        except SqlglotError:
+            return None
+    return type_
+
+
+def _column_type(data_type: Optional[exp.DataType]) -> Optional[ColumnType]:
+    if data_type is None:
+        return None
+    return _TYPES.get(data_type.this)
+
+
+def param_to_literal(param: Any) -> exp.Expression:
+    if param is None:
+        return exp.null()
+    if param is True:
+        return exp.true()
+    if param is False:
+        return exp.false()
+    if isinstance(param, str):
+        return exp.Literal.string(param)
+    return exp.Literal.number(param)
+
+
+def param_to_sql(param: Any) -> str:
+    if isinstance(param, str):
+        return f"'{param}'"
+    if param is None:
+        return "NULL"
+    if param is True:
+        return "TRUE"
+    if param is False:
+        return "FALSE"
+    return str(param)
+
 
 @dataclass
 class PreparedStatement:
@@ -12,4 +300,37 @@ class PreparedStatement:
     sql: str
     num_params: int
     param_buffers: Optional[Dict[int, bytearray]] = None
-    cursor: Optional[AsyncIterable[bytes]] = None
+    cursor: Optional[Cursor] = None
+    # SQL split around parameters, for interpolating parameter values
+    sql_parts: List[str] = field(default_factory=list)
+    plan: Optional[PreparedPlan] = None
+    # Types reported to the client at prepare time
+    description: Optional[PreparedDescription] = None
+    # Shape of the result columns the client last received for this statement,
+    # so clients with CLIENT_OPTIONAL_RESULTSET_METADATA don't receive them again
+    result_shape: Optional[Tuple[Any, ...]] = None
+
+    @classmethod
+    def create(
+        cls, stmt_id: int, sql: str, plan: Optional[PreparedPlan] = None
+    ) -> "PreparedStatement":
+        sql_parts = REGEX_PARAM.split(sql)
+        num_params = len(sql_parts) - 1
+        if plan is not None and plan.num_params != num_params:
+            plan = None
+        return cls(
+            stmt_id=stmt_id,
+            sql=sql,
+            num_params=num_params,
+            sql_parts=sql_parts,
+            plan=plan,
+        )
+
+    def interpolate(self, params: Sequence[Any]) -> str:
+        """Interpolate parameter values into the statement's SQL"""
+        parts = self.sql_parts or [self.sql]
+        sql = [parts[0]]
+        for i, part in enumerate(parts[1:]):
+            sql.append(param_to_sql(params[i]) if i < len(params) else "?")
+            sql.append(part)
+        return "".join(sql)
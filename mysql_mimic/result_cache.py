@@ -0,0 +1,315 @@
+"""
+Result cache.
+
+Caches result sets of text protocol queries as encoded row packets, so a hit skips
+both `Session.query` and encoding the rows. Entries expire after a TTL, and the
+least recently used entries are evicted when the cache exceeds its byte budget.
+
+One cache is shared by every session that uses its middleware:
+
+    class MySession(Session):
+        def __init__(self):
+            super().__init__()
+            self.middlewares.append(CACHE.middleware(self))
+
+Results are keyed by the statement, including its literals, the current database
+and the session variables in `ResultCache.variables`. They are shared by users,
+so don't cache queries whose results depend on the user, unless the key includes
+something that identifies them. Statements that reach the middleware are cached if
+`cacheable` returns True, which by default is any query, e.g. SELECT or UNION, that
+doesn't read system variables or call functions like NOW(), RAND() or CONNECTION_ID().
+
+Prepared statements use the binary protocol, so they aren't cached.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlglot import expressions as exp
+
+from mysql_mimic import types
+from mysql_mimic.digest import fingerprint
+from mysql_mimic.results import (
+    AllowedResult,
+    EncodedResultSet,
+    RecordingResultSet,
+    ResultColumn,
+    ensure_result_set,
+)
+
+if TYPE_CHECKING:
+    from mysql_mimic.session import Middleware, Query, Session
+
+# Session variables that change how results are computed or encoded
+DEFAULT_VARIABLES = (
+    "character_set_results",
+    "collation_connection",
+    "sql_mode",
+    "time_zone",
+)
+
+
+class CacheEntry:
+    """
+    Cached result set.
+
+    Args:
+        columns: result columns
+        packets: text protocol row packets, framed with sequence IDs from `seq_start`
+        seq_start: sequence ID of the first row packet
+        rows: number of rows
+        tables: (database, table) pairs the statement reads from, for invalidation
+        expires: `time.monotonic()` when the entry expires
+    """
+
+    __slots__ = ("columns", "packets", "seq_start", "rows", "tables", "expires", "size")
+
+    def __init__(
+        self,
+        columns: Sequence[ResultColumn],
+        packets: List[bytes],
+        seq_start: int,
+        rows: int,
+        tables: FrozenSet[Tuple[str, str]],
+        expires: float,
+    ):
+        self.columns = columns
+        self.packets = packets
+        self.seq_start = seq_start
+        self.rows = rows
+        self.tables = tables
+        self.expires = expires
+        self.size = sum(len(p) for p in packets)
+
+
+# Functions whose results differ between executions of the same statement
+NONDETERMINISTIC_FUNCTIONS = frozenset(
+    {
+        "CONNECTION_ID",
+        "CURRENT_ROLE",
+        "FOUND_ROWS",
+        "LAST_INSERT_ID",
+        "NOW",
+        "RANDOM_BYTES",
+        "ROW_COUNT",
+        "SESSION_USER",
+        "SLEEP",
+        "SYSDATE",
+        "SYSTEM_USER",
+        "UNIX_TIMESTAMP",
+        "USER",
+        "UTC_DATE",
+        "UTC_TIME",
+        "UUID_SHORT",
+    }
+)
+
+_NONDETERMINISTIC_EXPRESSIONS = (
+    exp.CurrentDate,
+    exp.CurrentSchema,
+    exp.CurrentTime,
+    exp.CurrentTimestamp,
+    exp.CurrentUser,
+    exp.Localtime,
+    exp.Rand,
+    exp.SessionParameter,
+    exp.Parameter,
+    exp.UtcTimestamp,
+    exp.Uuid,
+)
+
+
+def is_query(expression: exp.Expression) -> bool:
+    return isinstance(expression, exp.Query)
+
+
+def is_deterministic_query(expression: exp.Expression) -> bool:
+    """Whether a statement is a query that doesn't read variables or call functions
+    like NOW(), whose results differ between executions"""
+    if not is_query(expression):
+        return False
+    for node in expression.walk():
+        if isinstance(node, _NONDETERMINISTIC_EXPRESSIONS) or (
+            isinstance(node, exp.Anonymous)
+            and node.name.upper() in NONDETERMINISTIC_FUNCTIONS
+        ):
+            return False
+    return True
+
+
+class ResultCache:
+    """
+    Cache of encoded result sets, shared by sessions.
+
+    Args:
+        max_bytes: maximum total size of cached row packets
+        ttl: seconds until entries expire
+        max_entry_bytes: maximum size of a single entry. Results that are larger
+            are streamed to the client without being cached.
+            Defaults to a tenth of `max_bytes`.
+        variables: names of session variables to include in cache keys
+        cacheable: function that returns whether a statement's result can be cached
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 2**20,
+        ttl: float = 60.0,
+        max_entry_bytes: Optional[int] = None,
+        variables: Iterable[str] = DEFAULT_VARIABLES,
+        cacheable: Callable[[exp.Expression], bool] = is_deterministic_query,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entry_bytes = (
+            max_bytes // 10 if max_entry_bytes is None else max_entry_bytes
+        )
+        self.variables = tuple(variables)
+        self.cacheable = cacheable
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def middleware(self, session: Session) -> Middleware:
+        """
+        Middleware for `session` that answers queries from the cache.
+
+        Append it to `Session.middlewares`, so the built-in middlewares handle
+        SET, SHOW, INFORMATION_SCHEMA, etc. before it.
+        """
+
+        async def result_cache(q: Query) -> AllowedResult:
+            return await self.query(session, q)
+
+        return result_cache
+
+    async def query(self, session: Session, q: Query) -> AllowedResult:
+        connection = session.connection
+        # Only the text protocol's row packets are cached
+        if connection.command != types.Commands.COM_QUERY or not self.cacheable(
+            q.expression
+        ):
+            return await q.next()
+
+        # The client's capabilities decide how many packets come before the rows,
+        # and so the sequence IDs of the cached row packets. Results of multiple
+        # statements also start after the packets of the previous results.
+        key = (
+            fingerprint(q.expression, literals=True),
+            session.database,
+            connection.deprecate_eof(),
+            connection.send_metadata(),
+            connection.stream.seq.value,
+            tuple(session.variables.get(name) for name in self.variables),
+        )
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return EncodedResultSet(
+                packets=entry.packets,
+                seq_start=entry.seq_start,
+                row_count=entry.rows,
+                columns=entry.columns,
+                fallback=q.next,
+            )
+        self.misses += 1
+
+        result_set = await ensure_result_set(await q.next())
+        if not result_set:
+            return result_set
+        tables = frozenset(
+            ((t.db or session.database or "").lower(), t.name.lower())
+            for t in q.expression.find_all(exp.Table)
+        )
+
+        def on_complete(packets: List[bytes], seq_start: int, rows: int) -> None:
+            self.put(
+                key,
+                CacheEntry(
+                    columns=result_set.columns,
+                    packets=packets,
+                    seq_start=seq_start,
+                    rows=rows,
+                    tables=tables,
+                    expires=monotonic() + self.ttl,
+                ),
+            )
+
+        return RecordingResultSet(result_set, self.max_entry_bytes, on_complete)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: CacheEntry) -> None:
+        if entry.size > self.max_entry_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, table: str, database: Optional[str] = None) -> int:
+        """
+        Remove entries of statements that read from a table.
+
+        Args:
+            table: table name
+            database: database of the table. Defaults to any database.
+        Returns:
+            Number of entries removed
+        """
+        table = table.lower()
+        db = database.lower() if database is not None else None
+        keys = [
+            key
+            for key, entry in self._entries.items()
+            if any(t == table and (db is None or d == db) for d, t in entry.tables)
+        ]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def invalidate_if(self, predicate: Callable[[CacheEntry], bool]) -> int:
+        """
+        Remove entries for which `predicate` returns True.
+
+        Returns:
+            Number of entries removed
+        """
+        keys = [key for key, entry in self._entries.items() if predicate(entry)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        self.size -= self._entries.pop(key).size
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import io
+import itertools
 import struct
 from dataclasses import dataclass
 from datetime import datetime, date, timedelta
@@ -15,13 +16,17 @@ from typing import (
     Tuple,
     Dict,
     AsyncIterable,
+    Mapping,
+    Awaitable,
     cast,
 )
 
+from mysql_mimic import arrow
 from mysql_mimic.errors import MysqlError
 from mysql_mimic.types import ColumnType, str_len, uint_1, uint_2, uint_4
 from mysql_mimic.charset import CharacterSet
-from mysql_mimic.utils import aiterate, anext_compat, chain_async
+from mysql_mimic.cursor import PagedRows
+from mysql_mimic.utils import aiterate, anext_compat, chain_async, iterate_columns
 
 Encoder = Callable[[Any, "ResultColumn"], bytes]
 
@@ -58,6 +63,7 @@ class ResultColumn:
         self.use_default_text_encoder = (
             text_encoder is None and default_text is _text_encode_str
         )
+        self.use_default_binary_encoder = binary_encoder is None
 
     def text_encode(self, val: Any) -> bytes:
         return self.text_encoder(self, val)
@@ -65,6 +71,20 @@ class ResultColumn:
     def binary_encode(self, val: Any) -> bytes:
         return self.binary_encoder(self, val)
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Compiled classes can't be pickled from their __dict__, e.g. for a ProcessPoolExecutor
+        default_text = _TEXT_ENCODERS.get(self.type) or _unsupported
+        return (
+            ResultColumn,
+            (
+                self.name,
+                self.type,
+                self.character_set,
+                None if self.text_encoder is default_text else self.text_encoder,
+                None if self.use_default_binary_encoder else self.binary_encoder,
+            ),
+        )
+
     def __repr__(self) -> str:
         return f"ResultColumn({self.name} {self.type.name})"
 
@@ -78,6 +98,152 @@ class ResultSet:
         return bool(self.columns)
 
 
+class ColumnarResultSet(ResultSet):
+    """
+    Result set backed by batches of column arrays instead of row tuples.
+
+    Each batch is a sequence with one array per column, in column order.
+    Arrays can be lists, NumPy arrays, or pyarrow arrays. The text protocol
+    encodes these a column at a time, without transposing them into rows.
+
+    Args:
+        batches: iterable or async iterable of column batches
+        columns: result columns
+    """
+
+    def __init__(
+        self,
+        batches: Iterable[Sequence[Any]] | AsyncIterable[Sequence[Any]],
+        columns: Sequence[ResultColumn],
+    ):
+        super().__init__(rows=iterate_columns(batches, _to_pylist), columns=columns)
+        self.batches = batches
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> ColumnarResultSet:
+        """
+        Create a result set from a mapping of column names to column arrays.
+
+        Column types are inferred from the array dtypes, where available.
+        All arrays must have the same length.
+        """
+        lengths = {name: len(values) for name, values in data.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"Columns have different lengths: {lengths}")
+        columns = [
+            ResultColumn(name=str(name), type=infer_column_type(values))
+            for name, values in data.items()
+        ]
+        return cls(batches=[list(data.values())], columns=columns)
+
+    @classmethod
+    def from_arrow(cls, data: Any) -> ColumnarResultSet:
+        """
+        Create a result set from a pyarrow Table, RecordBatch, RecordBatchReader,
+        or iterable of RecordBatches.
+
+        Column types are inferred from the arrow schema.
+        """
+        schema: Any = getattr(data, "schema", None)
+        if hasattr(data, "to_batches"):
+            batches: Iterable[Any] = data.to_batches()
+        elif hasattr(data, "num_rows"):
+            batches = [data]
+        elif schema is None:
+            it = iter(data)
+            first = next(it, None)
+            if first is None:
+                return cls(batches=[], columns=[])
+            schema = first.schema
+            batches = itertools.chain([first], it)
+        else:
+            batches = data
+
+        columns = [
+            ResultColumn(name=field.name, type=arrow.column_type(field.type))
+            for field in schema
+        ]
+        return cls(
+            batches=(batch.columns for batch in batches),
+            columns=columns,
+        )
+
+
+class EncodedResultSet(ResultSet):
+    """
+    Result set of text protocol rows that are already encoded and framed,
+    e.g. by a `mysql_mimic.result_cache.ResultCache`.
+
+    The connection writes the packets as they are, so they must have been framed
+    with the sequence IDs the rows of this result set get, starting with `seq_start`.
+    If the rows would start at another sequence ID, the connection writes the result
+    of `fallback` instead.
+
+    Args:
+        packets: framed row packets
+        seq_start: sequence ID of the first row packet
+        row_count: number of rows
+        columns: result columns
+        fallback: function that computes the result without the encoded packets
+    """
+
+    def __init__(
+        self,
+        packets: Sequence[bytes],
+        seq_start: int,
+        row_count: int,
+        columns: Sequence[ResultColumn],
+        fallback: Optional[Callable[[], Awaitable[AllowedResult]]] = None,
+    ):
+        super().__init__(rows=(), columns=columns)
+        self.packets = packets
+        self.seq_start = seq_start
+        self.row_count = row_count
+        self.fallback = fallback
+
+
+class RecordingResultSet(ResultSet):
+    """
+    Result set that records its rows as the connection encodes them for the text protocol.
+
+    Rows are still streamed to the client as they're encoded. If they're all written,
+    `on_complete` is called with the framed row packets, the sequence ID of the first
+    row packet, and the number of rows. Recording stops, and `on_complete` isn't
+    called, if the packets exceed `max_size` bytes.
+
+    Args:
+        result_set: result set to record
+        max_size: maximum size of the recorded packets
+        on_complete: called after all rows are written
+    """
+
+    def __init__(
+        self,
+        result_set: ResultSet,
+        max_size: int,
+        on_complete: Callable[[List[bytes], int, int], None],
+    ):
+        super().__init__(rows=result_set.rows, columns=result_set.columns)
+        self.max_size = max_size
+        self.on_complete = on_complete
+        self.packets: List[bytes] = []
+        self.size = 0
+
+    def record(self, packets: bytes | bytearray) -> None:
+        """Record a batch of framed row packets"""
+        if self.size > self.max_size:
+            return
+        self.size += len(packets)
+        if self.size > self.max_size:
+            self.packets = []
+        else:
+            self.packets.append(bytes(packets))
+
+    def complete(self, seq_start: int, row_count: int) -> None:
+        if self.size <= self.max_size:
+            self.on_complete(self.packets, seq_start, row_count)
+
+
 AllowedColumn = Union[ResultColumn, str]
 AllowedResult = Union[
     ResultSet,
@@ -123,7 +289,9 @@ async def _ensure_result_cols(
     # Copy the columns
     columns = list(columns)
 
-    arows = aiterate(rows)
+    # Paged rows are inferred from their first page, which is read again later
+    paged = isinstance(rows, PagedRows)
+    arows = aiterate(await rows.peek() if isinstance(rows, PagedRows) else rows)
 
     # Keep track of rows we've consumed from the iterator so we can add them back
     peeks = []
@@ -160,8 +328,8 @@ async def _ensure_result_cols(
 
     # Add the consumed rows back in to the iterator
     assert all(isinstance(col, ResultColumn) for col in columns)
-    if isinstance(rows, (list, tuple)):
-        # For sync sequences, return the original data as-is (peeks came from it)
+    if paged or isinstance(rows, (list, tuple)):
+        # For sync sequences and paged rows, return the original rows as-is (peeks came from them)
         return ResultSet(rows=rows, columns=cast(Sequence[ResultColumn], columns))
     return ResultSet(
         rows=chain_async(peeks, arows), columns=cast(Sequence[ResultColumn], columns)
@@ -404,6 +572,117 @@ def infer_type(val: Any) -> ColumnType:
     return ColumnType.VARCHAR
 
 
+# NumPy dtype kinds
+_NUMPY_TO_MYSQL_TYPE = {
+    "b": ColumnType.TINY,
+    "i": ColumnType.LONGLONG,
+    "u": ColumnType.LONGLONG,
+    "f": ColumnType.DOUBLE,
+    "M": ColumnType.DATETIME,
+    "m": ColumnType.TIME,
+    "U": ColumnType.STRING,
+    "S": ColumnType.BLOB,
+}
+
+
+def infer_column_type(values: Any) -> ColumnType:
+    """Infer the type of an entire column, preferring the array's dtype over its values"""
+    if hasattr(values, "to_pylist"):
+        return arrow.column_type(values.type)
+    dtype = getattr(values, "dtype", None)
+    if dtype is not None:
+        type_ = _NUMPY_TO_MYSQL_TYPE.get(dtype.kind)
+        if type_ is not None:
+            return type_
+    for val in _to_pylist(values):
+        if val is not None:
+            return infer_type(val)
+    return ColumnType.NULL
+
+
+def _to_pylist(values: Any) -> List[Any]:
+    """Convert a column array to a list of Python values"""
+    if isinstance(values, list):
+        return values
+    if hasattr(values, "to_pylist"):
+        return cast(List[Any], values.to_pylist())
+    dtype = getattr(values, "dtype", None)
+    if dtype is not None:
+        # datetime64/timedelta64 only convert to Python objects at microsecond precision
+        if dtype.kind == "M":
+            values = values.astype("datetime64[us]")
+        elif dtype.kind == "m":
+            values = values.astype("timedelta64[us]")
+        return cast(List[Any], values.tolist())
+    return list(values)
+
+
+def text_encode_column(values: Any, col: ResultColumn) -> List[Optional[bytes]]:
+    """
+    Encode an entire column of values for the text protocol.
+
+    Numbers are converted to strings in bulk and pyarrow arrays are cast
+    with arrow compute kernels, taking NULLs from the validity bitmap.
+
+    Returns:
+        encoded values, with None for NULLs
+    """
+    if hasattr(values, "to_pylist"):
+        encoded = text_encode_arrow(values, col)
+        if encoded is not None:
+            return cast(List[Optional[bytes]], encoded.to_pylist())
+    values = _to_pylist(values)
+
+    nulls = values.count(None)
+    if nulls == len(values):
+        return [None] * nulls
+    present = [v for v in values if v is not None] if nulls else values
+
+    if col.codec != "utf8":
+        encoded = [col.text_encoder(col, v) for v in present]
+    elif col.text_encoder is _text_encode_tiny:
+        encoded = _bulk_str(map(int, present))
+    elif not col.use_default_text_encoder:
+        encoded = [col.text_encoder(col, v) for v in present]
+    else:
+        kinds = set(map(type, present))
+        if kinds <= {int, float}:
+            encoded = _bulk_str(present)
+        elif kinds == {str}:
+            encoded = [v.encode("utf-8") for v in present]
+        elif kinds == {bytes}:
+            encoded = present
+        else:
+            encoded = [_text_encode_str(col, v) for v in present]
+
+    if not nulls:
+        return cast(List[Optional[bytes]], encoded)
+    it = iter(encoded)
+    return [None if v is None else next(it) for v in values]
+
+
+def _bulk_str(values: Iterable[Any]) -> List[bytes]:
+    # str() of a number never contains a newline, so all values can be
+    # converted and encoded with a single join/split.
+    return "\n".join(map(str, values)).encode("utf-8").split(b"\n")
+
+
+def text_encode_arrow(values: Any, col: ResultColumn) -> Optional[Any]:
+    """
+    Encode a pyarrow array for the text protocol with arrow compute kernels.
+
+    Returns:
+        binary array of encoded values, or None if the column can't be encoded this way
+    """
+    if col.codec != "utf8":
+        return None
+    if col.text_encoder is _text_encode_tiny:
+        return arrow.text_encode(values, as_int=True)
+    if col.use_default_text_encoder:
+        return arrow.text_encode(values)
+    return None
+
+
 class NullBitmap:
     """See https://dev.mysql.com/doc/internals/en/null-bitmap.html"""
 
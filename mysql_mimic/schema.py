@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import re
-from collections import defaultdict
+from functools import lru_cache
+from collections import OrderedDict, defaultdict
 from itertools import chain
-from dataclasses import dataclass
-from typing import Any, Optional, List, Dict, Iterable
+from dataclasses import dataclass, replace
+from typing import Any, Optional, List, Dict, Iterable, Tuple, Hashable
 
 from sqlglot.executor import Table, execute
 from sqlglot import expressions as exp
 
 from mysql_mimic.constants import INFO_SCHEMA
+from mysql_mimic.digest import DigestSummary
 from mysql_mimic.results import AllowedResult
 from mysql_mimic.errors import MysqlError, ErrorCode
 from mysql_mimic.packets import ComFieldList
@@ -83,27 +86,63 @@ def info_schema_tables(columns: Iterable[Column]) -> Dict[str, Dict[str, Table]]
 
     These Tables are used by SQLGlot to execute INFORMATION_SCHEMA queries.
     """
-    ordinal_positions: dict[Any, int] = defaultdict(lambda: 0)
+    info_schema_cols = mapping_to_columns(INFO_SCHEMA)
+    return combine_info_schema_rows(
+        [info_schema_rows(chain(columns, info_schema_cols))]
+    )
 
+
+def combine_info_schema_rows(
+    partitions: Iterable[Dict[str, List[Tuple]]],
+) -> Dict[str, Dict[str, Table]]:
+    """Concatenate rows returned by `info_schema_rows` into a mapping of SQLGlot Tables"""
     data = {
         db: {k: Table(tuple(v.keys())) for k, v in tables.items()}
         for db, tables in INFO_SCHEMA.items()
     }
+    for partition in partitions:
+        for name, rows in partition.items():
+            data["information_schema"][name].rows.extend(rows)
+    return data
+
+
+def performance_schema_tables(
+    digests: Optional[DigestSummary],
+) -> Dict[str, Dict[str, Table]]:
+    """
+    Mapping of SQLGlot Tables with the current rows of PERFORMANCE_SCHEMA tables.
+
+    These change with every statement, so they're built for each query.
+    """
+    data = combine_info_schema_rows([])
+    if digests is not None:
+        data["performance_schema"]["events_statements_summary_by_digest"].rows.extend(
+            digests.rows()
+        )
+    return data
+
+
+def info_schema_rows(columns: Iterable[Column]) -> Dict[str, List[Tuple]]:
+    """
+    Convert Column instances into rows of the INFORMATION_SCHEMA
+    `columns`, `tables` and `schemata` tables.
+    """
+    ordinal_positions: dict[Any, int] = defaultdict(lambda: 0)
+
+    data: Dict[str, List[Tuple]] = {"columns": [], "tables": [], "schemata": []}
 
     tables = set()
     dbs = set()
     catalogs = set()
 
-    info_schema_cols = mapping_to_columns(INFO_SCHEMA)
-
-    for column in chain(columns, info_schema_cols):
+    for column in columns:
         tables.add((column.catalog, column.schema, column.table))
         dbs.add((column.catalog, column.schema))
         catalogs.add(column.catalog)
         key = (column.catalog, column.schema, column.table)
         ordinal_position = ordinal_positions[key]
         ordinal_positions[key] += 1
-        data["information_schema"]["columns"].append(
+        data["columns"].append(
             (
                 column.catalog,  # table_catalog
                 column.schema,  # table_schema
@@ -131,7 +170,7 @@ def info_schema_tables(columns: Iterable[Column]) -> Dict[str, Dict[str, Table]]
         )
 
     for catalog, db, table in sorted(tables):
-        data["information_schema"]["tables"].append(
+        data["tables"].append(
             (
                 catalog,  # table_catalog
                 db,  # table_schema
@@ -158,7 +197,7 @@ def info_schema_tables(columns: Iterable[Column]) -> Dict[str, Dict[str, Table]]
         )
 
     for catalog, db in sorted(dbs):
-        data["information_schema"]["schemata"].append(
+        data["schemata"].append(
             (
                 catalog,  # catalog_name
                 db,  # schema_name
@@ -171,6 +210,15 @@ def info_schema_tables(columns: Iterable[Column]) -> Dict[str, Dict[str, Table]]
     return data
 
 
+@lru_cache(maxsize=None)
+def builtin_info_schema_rows() -> Dict[str, Dict[str, List[Tuple]]]:
+    """Rows returned by `info_schema_rows` for each of the builtin databases"""
+    return {
+        db: info_schema_rows(mapping_to_columns({db: tables}))
+        for db, tables in INFO_SCHEMA.items()
+    }
+
+
 def show_statement_to_info_schema_query(
     show: exp.Show, database: Optional[str] = None
 ) -> exp.Select:
@@ -296,13 +344,23 @@ class BaseInfoSchema:
 class InfoSchema(BaseInfoSchema):
     """
     InfoSchema implementation that uses SQLGlot to execute queries.
+
+    Simple queries, like the ones SHOW statements are converted to, are answered
+    by looking up rows in hash indexes instead. Indexes are built when first
+    needed, so `tables` shouldn't be modified after querying.
     """
 
     def __init__(self, tables: Dict[str, Dict[str, Table]]):
         self.tables = tables
+        self._indexes: Dict[
+            Tuple[str, str, Tuple[int, ...]], Dict[Tuple[Any, ...], List[int]]
+        ] = {}
 
     async def query(self, expression: exp.Expression) -> AllowedResult:
         expression = self._preprocess(expression)
+        lookup = self._lookup(expression)
+        if lookup is not None:
+            return lookup
         result = execute(expression, schema=INFO_SCHEMA, tables=self.tables)
         return result.rows, result.columns
 
@@ -318,6 +376,328 @@ class InfoSchema(BaseInfoSchema):
     def _preprocess(self, expression: exp.Expression) -> exp.Expression:
         return expression.transform(_remove_collate)
 
+    def _lookup(
+        self, expression: exp.Expression
+    ) -> Optional[Tuple[List[Tuple], Tuple[str, ...]]]:
+        """
+        Answer a query with a single table, plain columns, and a WHERE clause of
+        `column = 'value'` and `column LIKE 'pattern'` conditions.
+
+        Returns:
+            The result, or None if the query needs the executor.
+        """
+        if not isinstance(expression, exp.Select) or any(
+            v for k, v in expression.args.items() if k not in _LOOKUP_ARGS
+        ):
+            return None
+        from_ = expression.args.get("from_") or expression.args.get("from")
+        source = from_.this if from_ else None
+        if not isinstance(source, exp.Table) or source.args.get("catalog"):
+            return None
+        table = self.tables.get(_normalize(source.args.get("db")), {}).get(
+            _normalize(source.this)
+        )
+        if table is None:
+            return None
+        alias = _normalize(source.args["alias"].this) if source.alias else None
+        positions = {name: i for i, name in enumerate(table.columns)}
+
+        def position(column: exp.Expression) -> Optional[int]:
+            if not isinstance(column, exp.Column) or column.args.get("db"):
+                return None
+            qualifier = column.args.get("table")
+            if qualifier and _normalize(qualifier) != (
+                alias or _normalize(source.this)
+            ):
+                return None
+            return positions.get(_normalize(column.this))
+
+        outputs: List[int] = []
+        names: List[str] = []
+        for projection in expression.expressions:
+            if isinstance(projection, exp.Star):
+                outputs.extend(range(len(table.columns)))
+                names.extend(table.columns)
+                continue
+            column = (
+                projection.this if isinstance(projection, exp.Alias) else projection
+            )
+            i = position(column)
+            if i is None:
+                return None
+            outputs.append(i)
+            names.append(
+                _normalize(projection.args["alias"])
+                if isinstance(projection, exp.Alias)
+                else table.columns[i]
+            )
+
+        equals: Dict[int, str] = {}
+        likes: List[Tuple[int, re.Pattern]] = []
+        where = expression.args.get("where")
+        for condition in _conjuncts(where.this) if where else []:
+            if not isinstance(condition, (exp.EQ, exp.Like)):
+                return None
+            i = position(condition.this)
+            value = condition.expression
+            if i is None or not isinstance(value, exp.Literal) or not value.is_string:
+                return None
+            if isinstance(condition, exp.Like):
+                likes.append((i, _like_to_pattern(value.this)))
+            elif equals.get(i, value.this) != value.this:
+                return [], tuple(names)
+            else:
+                equals[i] = value.this
+
+        rows: Iterable[Tuple] = table.rows
+        if equals:
+            key = tuple(sorted(equals))
+            rows = [
+                table.rows[r]
+                for r in self._index(source, table, key).get(
+                    tuple(equals[i] for i in key), []
+                )
+            ]
+        if likes:
+            rows = [
+                row
+                for row in rows
+                if all(
+                    isinstance(row[i], str) and pattern.fullmatch(row[i])
+                    for i, pattern in likes
+                )
+            ]
+        return [tuple(row[i] for i in outputs) for row in rows], tuple(names)
+
+    def _index(
+        self, source: exp.Table, table: Table, key: Tuple[int, ...]
+    ) -> Dict[Tuple[Any, ...], List[int]]:
+        """Get a hash index of the positions of rows, keyed by the values of columns"""
+        index_key = (_normalize(source.args.get("db")), _normalize(source.this), key)
+        index = self._indexes.get(index_key)
+        if index is None:
+            index = defaultdict(list)
+            for r, row in enumerate(table.rows):
+                index[tuple(row[i] for i in key)].append(r)
+            index = self._indexes[index_key] = dict(index)
+        return index
+
+
+class VersionedInfoSchema(BaseInfoSchema):
+    """
+    InfoSchema for schemas that report when they change.
+
+    The INFORMATION_SCHEMA tables are compiled once per version, and only the
+    databases whose version changed are fetched and compiled again.
+    Return the same instance from `Session.schema` in every session, so all
+    sessions of a server share the compiled tables.
+
+    Subclasses implement `version`, `database_versions` and `database`.
+    """
+
+    def __init__(self) -> None:
+        self._version: Optional[Hashable] = None
+        self._info_schema: Optional[InfoSchema] = None
+        # Database name -> (version, compiled rows)
+        self._databases: Dict[str, Tuple[Hashable, Dict[str, List[Tuple]]]] = {}
+        # Held while compiling, so concurrent sessions compile each version once.
+        # Created on first use, on the event loop.
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def version(self) -> Hashable:
+        """
+        Version of the entire schema, e.g. an etag.
+
+        This is called for every query, so it should be cheap.
+        """
+        raise NotImplementedError()
+
+    async def database_versions(self) -> Dict[str, Hashable]:
+        """
+        Versions of each database.
+
+        This is only called when `version` changes.
+
+        Returns:
+            Mapping of database name to version
+        """
+        raise NotImplementedError()
+
+    async def database(self, name: str) -> dict | List[Column]:
+        """
+        Schema of a single database.
+
+        This is only called when the database's version changes.
+
+        Returns:
+            One of:
+            - Mapping of {table: {column: column_type}}
+            - List of Column instances
+        """
+        raise NotImplementedError()
+
+    async def query(self, expression: exp.Expression) -> AllowedResult:
+        return await (await self.info_schema()).query(expression)
+
+    async def info_schema(self) -> InfoSchema:
+        """Get the compiled InfoSchema for the current version"""
+        version = await self.version()
+        if self._info_schema is not None and version == self._version:
+            return self._info_schema
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another session may have compiled this version while we waited
+            if self._info_schema is not None and version == self._version:
+                return self._info_schema
+
+            databases = {}
+            for name, db_version in (await self.database_versions()).items():
+                cached = self._databases.get(name)
+                if cached is None or cached[0] != db_version:
+                    cached = (db_version, await self._compile(name))
+                databases[name] = cached
+
+            partitions = {
+                **{k: v for k, (_, v) in databases.items()},
+                **builtin_info_schema_rows(),
+            }
+            self._info_schema = InfoSchema(
+                combine_info_schema_rows(partitions[k] for k in sorted(partitions))
+            )
+            self._databases = databases
+            self._version = version
+            return self._info_schema
+
+    async def _compile(self, name: str) -> Dict[str, List[Tuple]]:
+        schema = await self.database(name)
+        if isinstance(schema, dict):
+            columns = mapping_to_columns({name: schema}) if schema else []
+        else:
+            columns = [
+                replace(c, schema=name) if c.schema is None else c for c in schema
+            ]
+        return info_schema_rows(columns)
+
+
+@dataclass
+class InfoSchemaFilter:
+    """
+    Predicates of an INFORMATION_SCHEMA query, pushed down to `LazyInfoSchema`.
+
+    Fields are None if the query doesn't filter on them.
+
+    Args:
+        schema: database name must equal this
+        table: table name must equal this
+        schema_like: database name must match this LIKE pattern
+        table_like: table name must match this LIKE pattern
+        column_like: column name must match this LIKE pattern
+    """
+
+    schema: Optional[str] = None
+    table: Optional[str] = None
+    schema_like: Optional[str] = None
+    table_like: Optional[str] = None
+    column_like: Optional[str] = None
+
+    def matches(self, column: Column) -> bool:
+        """Check if a column satisfies all predicates"""
+        return all(
+            (
+                self.schema is None or column.schema == self.schema,
+                self.table is None or column.table == self.table,
+                _like(self.schema_like, column.schema),
+                _like(self.table_like, column.table),
+                _like(self.column_like, column.name),
+            )
+        )
+
+
+class LazyInfoSchema(BaseInfoSchema):
+    """
+    InfoSchema that fetches columns for each query, with the query's predicates
+    pushed down.
+
+    For example, `SHOW COLUMNS FROM t` only fetches the columns of table `t`,
+    instead of the entire schema.
+
+    Subclasses implement `columns`.
+    """
+
+    async def columns(self, predicates: InfoSchemaFilter) -> Iterable[Column]:
+        """
+        Fetch columns.
+
+        Args:
+            predicates: only columns that match these are needed.
+                Returning extra columns is allowed, but less efficient.
+        Returns:
+            Column instances
+        """
+        raise NotImplementedError()
+
+    async def query(self, expression: exp.Expression) -> AllowedResult:
+        columns: Iterable[Column] = []
+        if any(
+            _normalize(table.args.get("db")) in ("information_schema", "")
+            and _normalize(table.this) in _COLUMN_TABLES
+            for table in expression.find_all(exp.Table)
+        ):
+            columns = await self.columns(info_schema_filter(expression))
+
+        builtin = builtin_info_schema_rows()
+        partitions = [info_schema_rows(columns), *(builtin[k] for k in sorted(builtin))]
+        return await InfoSchema(combine_info_schema_rows(partitions)).query(expression)
+
+
+def info_schema_filter(expression: exp.Expression) -> InfoSchemaFilter:
+    """
+    Get the predicates of an INFORMATION_SCHEMA query that can be pushed down.
+
+    Only queries that read a single table, including in subqueries, are considered,
+    and only conditions of its WHERE clause that are combined with AND.
+    """
+    predicates = InfoSchemaFilter()
+    if not isinstance(expression, exp.Select) or expression.args.get("joins"):
+        return predicates
+    from_ = expression.args.get("from_") or expression.args.get("from")
+    source = from_.this if from_ else None
+    where = expression.args.get("where")
+    if not isinstance(source, exp.Table) or not where:
+        return predicates
+    if any(table is not source for table in expression.find_all(exp.Table)):
+        # The filter would apply to every table the query reads
+        return predicates
+    fields = _FILTER_FIELDS.get(_normalize(source.this))
+    if (
+        _normalize(source.args.get("db")) not in ("information_schema", "")
+        or not fields
+    ):
+        return predicates
+    qualifier = _normalize(source.args["alias"].this) if source.alias else None
+
+    for condition in _conjuncts(where.this):
+        if not isinstance(condition, (exp.EQ, exp.Like)):
+            continue
+        column, value = condition.this, condition.expression
+        if (
+            not isinstance(column, exp.Column)
+            or column.args.get("db")
+            or not isinstance(value, exp.Literal)
+            or not value.is_string
+        ):
+            continue
+        if column.args.get("table") and _normalize(column.args["table"]) != (
+            qualifier or _normalize(source.this)
+        ):
+            continue
+        field = fields.get((_normalize(column.this), type(condition)))
+        if field and getattr(predicates, field) in (None, value.this):
+            setattr(predicates, field, value.this)
+    return predicates
+
 
 def ensure_info_schema(schema: dict | BaseInfoSchema) -> BaseInfoSchema:
     if isinstance(schema, BaseInfoSchema):
@@ -325,6 +705,100 @@ def ensure_info_schema(schema: dict | BaseInfoSchema) -> BaseInfoSchema:
     return InfoSchema.from_mapping(schema)
 
 
+class InfoSchemaCache:
+    """
+    LRU cache of InfoSchemas built from `Session.schema`, by `Session.schema_version`.
+
+    A server shares one cache across all of its sessions.
+
+    Args:
+        maxsize: maximum number of schema versions to cache. 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._cache: OrderedDict[Hashable, BaseInfoSchema] = OrderedDict()
+
+    def get(self, version: Hashable) -> Optional[BaseInfoSchema]:
+        info_schema = self._cache.get(version)
+        if info_schema is not None:
+            self._cache.move_to_end(version)
+        return info_schema
+
+    def put(self, version: Hashable, info_schema: BaseInfoSchema) -> None:
+        if self.maxsize <= 0:
+            return
+        self._cache[version] = info_schema
+        self._cache.move_to_end(version)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+# Select arguments that InfoSchema can handle without the executor
+_LOOKUP_ARGS = {"expressions", "from", "from_", "where"}
+
+
+# INFORMATION_SCHEMA tables that are built from columns
+_COLUMN_TABLES = {"columns", "tables", "schemata"}
+
+# For each INFORMATION_SCHEMA table, the InfoSchemaFilter field for each
+# (column, condition) pair that can be pushed down
+_FILTER_FIELDS: Dict[str, Dict[Tuple[str, type], str]] = {
+    "columns": {
+        ("table_schema", exp.EQ): "schema",
+        ("table_name", exp.EQ): "table",
+        ("table_schema", exp.Like): "schema_like",
+        ("table_name", exp.Like): "table_like",
+        ("column_name", exp.Like): "column_like",
+    },
+    "tables": {
+        ("table_schema", exp.EQ): "schema",
+        ("table_name", exp.EQ): "table",
+        ("table_schema", exp.Like): "schema_like",
+        ("table_name", exp.Like): "table_like",
+    },
+    "schemata": {
+        ("schema_name", exp.EQ): "schema",
+        ("schema_name", exp.Like): "schema_like",
+    },
+}
+
+
+def _normalize(identifier: Any) -> str:
+    """Normalize an identifier the way the executor does"""
+    if not isinstance(identifier, exp.Identifier):
+        return identifier.name if identifier else ""
+    return identifier.this if identifier.quoted else identifier.this.lower()
+
+
+def _conjuncts(condition: exp.Expression) -> Iterable[exp.Expression]:
+    while isinstance(condition, exp.Paren):
+        condition = condition.this
+    if isinstance(condition, exp.And):
+        yield from _conjuncts(condition.this)
+        yield from _conjuncts(condition.expression)
+    else:
+        yield condition
+
+
+@lru_cache(maxsize=256)
+def _like_to_pattern(like: str) -> re.Pattern:
+    """Same semantics as the executor's LIKE"""
+    return re.compile(re.escape(like).replace("_", ".").replace("%", ".*"), re.DOTALL)
+
+
+def _like(like: Optional[str], value: Optional[str]) -> bool:
+    return like is None or (
+        value is not None and bool(_like_to_pattern(like).fullmatch(value))
+    )
+
+
 def _remove_collate(node: exp.Expression) -> exp.Expression:
     """
     SQLGlot's executor doesn't support collation specifiers.
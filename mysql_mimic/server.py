@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import inspect
 import logging
+from concurrent.futures import Executor
 from ssl import SSLContext
 from socket import socket
 from typing import Callable, Any, Optional, Sequence, Awaitable
@@ -12,10 +13,16 @@ from mysql_mimic.auth import IdentityProvider, SimpleIdentityProvider
 from mysql_mimic.connection import Connection
 from mysql_mimic.control import Control, LocalControl, TooManyConnections
 from mysql_mimic.errors import ErrorCode
+from mysql_mimic.digest import DigestSummary
+from mysql_mimic.metrics import ServerMetrics, start_metrics_server
+from mysql_mimic.parse_cache import ParseCache
+from mysql_mimic.schema import InfoSchemaCache
 from mysql_mimic.session import Session, BaseSession
+from mysql_mimic.slow_log import SlowQueryLog
 from mysql_mimic.constants import DEFAULT_SERVER_CAPABILITIES
-from mysql_mimic.stream import MysqlStream
+from mysql_mimic.stream import MysqlStream, PacketReader
 from mysql_mimic.types import Capabilities
+from mysql_mimic.variables import GlobalVariables
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,23 @@ class MysqlServer:
         identity_provider: Authentication plugins to register. Defaults to `SimpleIdentityProvider`,
             which just blindly accepts whatever `username` is given by the client.
         ssl: SSLContext instance if this server should enable TLS over connections
+        parse_cache: ParseCache instance shared by all sessions. Defaults to a ParseCache instance.
+        info_schema_cache: InfoSchemaCache instance shared by all sessions, for schemas
+            with a `Session.schema_version`. Defaults to an InfoSchemaCache instance.
+        encode_executor: Executor to encode rows of large result sets in, so the
+            event loop isn't blocked. A ProcessPoolExecutor encodes in parallel, but rows
+            and columns must be picklable. Defaults to encoding on the event loop.
+        metrics: ServerMetrics instance to record metrics in. Defaults to no metrics.
+        tracer: OpenTelemetry tracer to trace commands with. See `mysql_mimic.tracing`.
+            Defaults to no tracing.
+        digests: DigestSummary instance to aggregate statement statistics in, which
+            are served as PERFORMANCE_SCHEMA.EVENTS_STATEMENTS_SUMMARY_BY_DIGEST.
+            Defaults to no statistics.
+        slow_log: SlowQueryLog instance to log queries that take at least
+            `long_query_time` seconds to. See `mysql_mimic.slow_log`. Defaults to no log.
+        global_variables: GlobalVariables instance with the global system variables of
+            this server's sessions, e.g. `long_query_time`. Defaults to a GlobalVariables
+            instance.
 
         **kwargs: extra keyword args passed to the asyncio start server command
     """
@@ -46,6 +70,14 @@ class MysqlServer:
         control: Control | None = None,
         identity_provider: IdentityProvider | None = None,
         ssl: SSLContext | None = None,
+        parse_cache: ParseCache | None = None,
+        info_schema_cache: InfoSchemaCache | None = None,
+        encode_executor: Executor | None = None,
+        metrics: ServerMetrics | None = None,
+        tracer: Any = None,
+        digests: DigestSummary | None = None,
+        slow_log: SlowQueryLog | None = None,
+        global_variables: GlobalVariables | None = None,
         **serve_kwargs: Any,
     ):
         self.session_factory = session_factory
@@ -54,11 +86,28 @@ class MysqlServer:
         self.ssl = ssl
 
         self.control = control or LocalControl()
+        self.parse_cache = parse_cache if parse_cache is not None else ParseCache()
+        self.info_schema_cache = (
+            info_schema_cache if info_schema_cache is not None else InfoSchemaCache()
+        )
+        self.encode_executor = encode_executor
+        self.metrics = metrics
+        self.tracer = tracer
+        self.digests = digests
+        self.slow_log = slow_log
+        self.global_variables = (
+            global_variables if global_variables is not None else GlobalVariables()
+        )
+        self._read_limit = serve_kwargs.pop("limit", 2**20)
         self._serve_kwargs = serve_kwargs
         self._server: Optional[asyncio.base_events.Server] = None
+        self._metrics_server: Optional[asyncio.base_events.Server] = None
+
+    def _protocol_factory(self) -> PacketReader:
+        return PacketReader(self._client_connected_cb, limit=self._read_limit)
 
     async def _client_connected_cb(
-        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        self, reader: PacketReader, writer: asyncio.StreamWriter
     ) -> None:
         stream = MysqlStream(reader, writer)
 
@@ -75,6 +124,14 @@ class MysqlServer:
                 server_capabilities=self.capabilities,
                 identity_provider=self.identity_provider,
                 ssl=self.ssl,
+                parse_cache=self.parse_cache,
+                encode_executor=self.encode_executor,
+                metrics=self.metrics,
+                tracer=self.tracer,
+                digests=self.digests,
+                slow_log=self.slow_log,
+                global_variables=self.global_variables,
+                info_schema_cache=self.info_schema_cache,
             )
 
         except Exception:  # pylint: disable=broad-except
@@ -101,9 +158,14 @@ class MysqlServer:
             await stream.write(connection.error(msg="Failed to register connection"))
             return
 
+        if self.metrics:
+            self.metrics.connections.inc()
+            self.metrics.connections_total.inc()
         try:
             return await connection.start()
         finally:
+            if self.metrics:
+                self.metrics.connections.dec()
             writer.close()
             await self.control.remove(connection_id)
 
@@ -112,21 +174,23 @@ class MysqlServer:
         Start an asyncio socket server.
 
         Args:
-            **kwargs: keyword args passed to `asyncio.start_server`
+            **kwargs: keyword args passed to `loop.create_server`
         """
         kw = {}
         kw.update(self._serve_kwargs)
         kw.update(kwargs)
-        if "port" not in kw:
+        self._read_limit = kw.pop("limit", self._read_limit)
+        if "port" not in kw and "sock" not in kw:
             kw["port"] = 3306
-        self._server = await asyncio.start_server(self._client_connected_cb, **kw)
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(self._protocol_factory, **kw)
 
     async def start_unix_server(self, **kwargs: Any) -> None:
         """
         Start an asyncio unix socket server.
 
         Args:
-            **kwargs: keyword args passed to `asyncio.start_unix_server`
+            **kwargs: keyword args passed to `loop.create_unix_server`
         """
         if not hasattr(asyncio, "start_unix_server"):
             raise NotImplementedError(
@@ -136,7 +200,27 @@ class MysqlServer:
         kw = {}
         kw.update(self._serve_kwargs)
         kw.update(kwargs)
-        self._server = await asyncio.start_unix_server(self._client_connected_cb, **kw)  # type: ignore[attr-defined]
+        self._read_limit = kw.pop("limit", self._read_limit)
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_unix_server(self._protocol_factory, **kw)
+
+    async def start_metrics_server(
+        self, host: Optional[str] = None, port: int = 9104
+    ) -> None:
+        """
+        Serve metrics in the Prometheus text format over HTTP at /metrics.
+
+        This runs on the same event loop as the MySQL server, and is closed with it.
+
+        Args:
+            host: host to listen on
+            port: port to listen on
+        """
+        if self.metrics is None:
+            raise ValueError("Metrics aren't enabled. Pass `metrics` to MysqlServer.")
+        self._metrics_server = await start_metrics_server(
+            self.metrics.registry, host=host, port=port
+        )
 
     async def serve_forever(self, **kwargs: Any) -> None:
         """
@@ -161,11 +245,15 @@ class MysqlServer:
         """
         if self._server:
             self._server.close()
+        if self._metrics_server:
+            self._metrics_server.close()
 
     async def wait_closed(self) -> None:
         """Wait until the `close` method completes."""
         if self._server:
             await self._server.wait_closed()
+        if self._metrics_server:
+            await self._metrics_server.wait_closed()
 
     def sockets(self) -> Sequence[socket]:
         """Get sockets the server is listening on."""
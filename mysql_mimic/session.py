@@ -2,20 +2,27 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone as timezone_
+from time import perf_counter
 from typing import (
+    AsyncIterator,
     Dict,
+    Match,
     List,
     TYPE_CHECKING,
     Optional,
     Callable,
     Awaitable,
     Any,
+    Sequence,
+    Tuple,
+    Hashable,
 )
 
 from sqlglot.dialects import MySQL
 from sqlglot import Dialect, expressions as exp
 from sqlglot.executor import execute
 
+from mysql_mimic import fast_path, tracing
 from mysql_mimic.charset import CharacterSet
 from mysql_mimic.errors import ErrorCode, MysqlError
 from mysql_mimic.functions import Functions, mysql_datetime_function_mapping
@@ -28,19 +35,31 @@ from mysql_mimic.schema import (
     show_statement_to_info_schema_query,
     like_to_regex,
     BaseInfoSchema,
+    InfoSchema,
     ensure_info_schema,
+    performance_schema_tables,
+)
+from mysql_mimic.constants import INFO_SCHEMA, PERFORMANCE_SCHEMA, KillKind
+from mysql_mimic.digest import digest
+from mysql_mimic.fast_path import FastPath
+from mysql_mimic.metrics import StageTimer
+from mysql_mimic.prepared import (
+    PreparedDescription,
+    PreparedPlan,
+    describe_plan,
+    make_plan,
 )
-from mysql_mimic.constants import INFO_SCHEMA, KillKind
 from mysql_mimic.variable_processor import VariableProcessor
-from mysql_mimic.utils import find_dbs
+from mysql_mimic.utils import aiterate, dict_depth, find_dbs
 from mysql_mimic.variables import (
     Variables,
     SessionVariables,
     GlobalVariables,
     DEFAULT,
+    Enumeration,
     parse_timezone,
 )
-from mysql_mimic.results import AllowedResult
+from mysql_mimic.results import AllowedResult, ensure_result_set
 
 if TYPE_CHECKING:
     from sqlglot import DialectType
@@ -50,6 +69,10 @@ if TYPE_CHECKING:
 
 Middleware = Callable[["Query"], Awaitable[AllowedResult]]
 
+# Values of SET statements answered by fast paths
+_SET_KEYWORDS = {"TRUE": True, "FALSE": False, "NULL": None}
+_SET_VALUES = {"ON": True, "OFF": False, "DEFAULT": DEFAULT}
+
 
 def mysql_function_mapping(session: Session) -> Functions:
     # Information functions.
@@ -86,6 +109,7 @@ class Query:
         attrs: query attributes
         _middlewares: subsequent middleware functions
         _query: the ultimate query method
+        _tracer: tracer to create a span for each middleware with, if any
     """
 
     expression: exp.Expression
@@ -93,6 +117,7 @@ class Query:
     attrs: Dict[str, str]
     _middlewares: list[Middleware]
     _query: Callable[[exp.Expression, str, dict[str, str]], Awaitable[AllowedResult]]
+    _tracer: Any = None
 
     async def next(self) -> AllowedResult:
         """
@@ -102,15 +127,26 @@ class Query:
             The final query result.
         """
         if not self._middlewares:
-            return await self._query(self.expression, self.sql, self.attrs)
+            if self._tracer is None:
+                return await self._query(self.expression, self.sql, self.attrs)
+            with self._tracer.start_as_current_span("mysql.session.query"):
+                return await self._query(self.expression, self.sql, self.attrs)
         q = Query(
             expression=self.expression,
             sql=self.sql,
             attrs=self.attrs,
             _middlewares=self._middlewares[1:],
             _query=self._query,
+            _tracer=self._tracer,
         )
-        return await self._middlewares[0](q)
+        middleware = self._middlewares[0]
+        if self._tracer is None:
+            return await middleware(q)
+        with self._tracer.start_as_current_span(
+            "mysql.middleware",
+            attributes={tracing.MIDDLEWARE: tracing.middleware_name(middleware)},
+        ):
+            return await middleware(q)
 
     async def start(self) -> AllowedResult:
         """
@@ -118,7 +154,7 @@ class Query:
 
         This should only be called by the framework code
         """
-        return await self._middlewares[0](self)
+        return await self.next()
 
 
 class BaseSession:
@@ -152,6 +188,69 @@ class BaseSession:
             - mysql_mimic.ResultSet instance
         """
 
+    async def handle_multi_query(
+        self, sql: str, attrs: Dict[str, str]
+    ) -> AsyncIterator[Tuple[AllowedResult, bool]]:
+        """
+        Entrypoint for queries from clients that support CLIENT_MULTI_STATEMENTS.
+
+        Each result is sent to the client before the next is requested, so execute
+        each statement only once the previous result has been yielded.
+
+        Args:
+            sql: SQL statements, separated by semicolons
+            attrs: Mapping of query attributes
+        Yields:
+            (result, more) for each statement, where `result` is the same as what
+            `handle_query` returns, and `more` is whether more statements follow
+        """
+        yield await self.handle_query(sql, attrs), False
+
+    async def prepare(self, sql: str) -> Optional[PreparedPlan]:
+        """
+        Called when a client prepares a statement.
+
+        Args:
+            sql: SQL statement, with `?` placeholders for parameters
+        Returns:
+            A plan to cache on the prepared statement, or None to pass the SQL of
+            each execution, with parameters interpolated, to `handle_query`.
+        """
+        return None
+
+    async def describe_prepared(
+        self, plan: PreparedPlan
+    ) -> Optional[PreparedDescription]:
+        """
+        Called after `prepare` returns a plan, to describe the statement to the client.
+
+        Clients that know the types of parameters and result columns at prepare time
+        can allocate buffers once and don't need to describe the statement again.
+
+        Args:
+            plan: plan returned by `prepare`
+        Returns:
+            Types of the parameters and result columns, or None to report untyped
+            parameters and no result columns.
+        """
+        return None
+
+    async def handle_prepared_query(
+        self, plan: PreparedPlan, params: Sequence[Any], sql: str, attrs: Dict[str, str]
+    ) -> AllowedResult:
+        """
+        Entrypoint for executions of prepared statements that have a plan.
+
+        Args:
+            plan: plan returned by `prepare`
+            params: parameter values
+            sql: SQL statement, with parameters interpolated
+            attrs: Mapping of query attributes
+        Returns:
+            Same as `handle_query`
+        """
+        return await self.handle_query(sql, attrs)
+
     async def init(self, connection: Connection) -> None:
         """
         Called when connection phase is complete.
@@ -190,6 +289,8 @@ class Session(BaseSession):
 
     def __init__(self, variables: Variables | None = None):
         self.variables = variables or SessionVariables(GlobalVariables())
+        # Sessions that aren't given variables use the global variables of their server
+        self._server_globals = variables is None
 
         # Query middlewares.
         # These allow queries to be intercepted or wrapped.
@@ -207,6 +308,28 @@ class Session(BaseSession):
             self._info_schema_middleware,
         ]
 
+        # Fast paths.
+        # These answer trivial statements before they are parsed, so they bypass
+        # middlewares. The built-in fast paths are skipped if `middlewares` are changed,
+        # so custom middlewares see every statement.
+        self.fast_paths: list[FastPath] = [
+            FastPath(fast_path.SELECT_INTS, self._select_ints_fast_path),
+            FastPath(fast_path.SELECT_VARIABLES, self._select_variables_fast_path),
+            FastPath(fast_path.SET_VARIABLE, self._set_variable_fast_path),
+            FastPath(fast_path.SET_NAMES, self._set_names_fast_path),
+            FastPath(fast_path.TRANSACTION, self._transaction_fast_path),
+        ]
+        self._builtin_middlewares = list(self.middlewares)
+        self._builtin_fast_paths = list(self.fast_paths)
+
+        # Whether `describe_prepared` infers types of prepared statements from `schema`.
+        # This calls `schema` on every COM_STMT_PREPARE, so it's off by default.
+        self.describe_prepared_statements = False
+
+        # Global variables that SET GLOBAL can change. These are shared by every
+        # session of the server, so clear this to refuse SET GLOBAL entirely.
+        self.settable_global_variables = {"long_query_time", "log_slow_rate_limit"}
+
         # Current database
         self.database = None
 
@@ -217,6 +340,7 @@ class Session(BaseSession):
         self.timestamp: datetime = datetime.now()
 
         self._connection: Optional[Connection] = None
+        self._query_time = 0.0
 
     async def query(
         self, expression: exp.Expression, sql: str, attrs: Dict[str, str]
@@ -246,6 +370,9 @@ class Session(BaseSession):
 
         This is used to serve INFORMATION_SCHEMA and SHOW queries.
 
+        If `schema_version` returns a version, the InfoSchema built from this is
+        reused by every session of the server until the version changes.
+
         Returns:
             One of:
             - Mapping of:
@@ -256,6 +383,19 @@ class Session(BaseSession):
         """
         return {}
 
+    async def schema_version(self) -> Optional[Hashable]:
+        """
+        Version of the schema returned by `schema`, e.g. an etag.
+
+        InfoSchemas built from `schema` are cached by version and shared by every
+        session of the server, so the version must change whenever the schema does,
+        and sessions with different schemas must return different versions.
+
+        Returns:
+            Version, or None to build the InfoSchema again for every query
+        """
+        return None
+
     @property
     def connection(self) -> Connection:
         """
@@ -270,6 +410,12 @@ class Session(BaseSession):
         Called when connection phase is complete.
         """
         self._connection = connection
+        if (
+            self._server_globals
+            and connection.global_variables is not None
+            and isinstance(self.variables, SessionVariables)
+        ):
+            self.variables.global_variables = connection.global_variables
 
     async def close(self) -> None:
         """
@@ -279,28 +425,248 @@ class Session(BaseSession):
 
     async def handle_query(self, sql: str, attrs: Dict[str, str]) -> AllowedResult:
         self.timestamp = datetime.now(tz=self.timezone())
+        if self._connection:
+            self._connection.statement_sql = sql
+        result = await fast_path.answer(self._active_fast_paths(), sql)
+        if result is not None:
+            return result
+        return await self._handle_expressions(self._parse(sql), sql, attrs)
+
+    async def handle_multi_query(
+        self, sql: str, attrs: Dict[str, str]
+    ) -> AsyncIterator[Tuple[AllowedResult, bool]]:
+        if self._overrides_handle_query():
+            # Statements from these clients still have to go through the override
+            yield await self.handle_query(sql, attrs), False
+            return
+        self.timestamp = datetime.now(tz=self.timezone())
+        if self._connection:
+            self._connection.statement_sql = sql
+        result = await fast_path.answer(self._active_fast_paths(), sql)
+        if result is not None:
+            yield result, False
+            return
+        expressions = [e for e in self._parse(sql) if e]
+        for i, expression in enumerate(expressions):
+            if self._connection and len(expressions) > 1:
+                # Each statement gets its own slow query log entry
+                self._connection.statement_sql = expression.sql(dialect=self.dialect)
+            result = await self._handle_expression(expression, sql, attrs)
+            yield result, i < len(expressions) - 1
+
+    def _overrides_handle_query(self) -> bool:
+        return type(self).handle_query is not Session.handle_query
+
+    def _active_fast_paths(self) -> List[FastPath]:
+        if self.middlewares == self._builtin_middlewares:
+            return self.fast_paths
+        # Custom middlewares need to see the statements the built-in fast paths answer
+        return [f for f in self.fast_paths if f not in self._builtin_fast_paths]
+
+    async def prepare(self, sql: str) -> Optional[PreparedPlan]:
+        if self._overrides_handle_query():
+            # Executions have to go through the override
+            return None
+        return make_plan(Dialect.get_or_raise(self.dialect), sql)
+
+    async def describe_prepared(
+        self, plan: PreparedPlan
+    ) -> Optional[PreparedDescription]:
+        """
+        Infer the types of parameters and result columns from `schema`.
+
+        This is only done if `describe_prepared_statements` is set. Override this to
+        describe statements that `schema` can't, e.g. queries of tables it doesn't include.
+        """
+        if not self.describe_prepared_statements or len(plan.expressions) != 1:
+            return None
+        schema = await self.schema()
+        if isinstance(schema, BaseInfoSchema):
+            schema = await self._columns_mapping(plan.expressions[0])
+        else:
+            schema = self._tables_mapping(schema, plan.expressions[0])
+        return describe_plan(
+            plan, Dialect.get_or_raise(self.dialect), schema, self.database
+        )
+
+    async def handle_prepared_query(
+        self, plan: PreparedPlan, params: Sequence[Any], sql: str, attrs: Dict[str, str]
+    ) -> AllowedResult:
+        self.timestamp = datetime.now(tz=self.timezone())
+        if self._connection:
+            self._connection.statement_sql = sql
+        return await self._handle_expressions(plan.bind(params), sql, attrs)
+
+    async def _handle_expressions(
+        self, expressions: List[exp.Expression], sql: str, attrs: Dict[str, str]
+    ) -> AllowedResult:
         result = None
-        for expression in self._parse(sql):
-            if not expression:
-                continue
-            q = Query(
-                expression=expression,
-                sql=sql,
-                attrs=attrs,
-                _middlewares=self.middlewares,
-                _query=self.query,
-            )
-            result = await q.start()
+        for expression in expressions:
+            if expression:
+                result = await self._handle_expression(expression, sql, attrs)
         return result
 
+    async def _handle_expression(
+        self, expression: exp.Expression, sql: str, attrs: Dict[str, str]
+    ) -> AllowedResult:
+        connection = self._connection
+        timed = connection.timed if connection else False
+        tracer = connection.tracer if connection else None
+        digests = connection.digests if connection else None
+        if connection:
+            connection.statement_expression = expression
+        q = Query(
+            expression=expression,
+            sql=sql,
+            attrs=attrs,
+            _middlewares=self.middlewares,
+            _query=self._timed_query if timed else self.query,
+            _tracer=tracer,
+        )
+        if tracer is None and digests is None:
+            return await self._start_query(q)
+
+        # Digests are taken before middlewares can modify the expression
+        statement_digest = digest(expression, self.dialect)
+        self.connection.statement_digest = statement_digest
+        with tracing.span(
+            tracer,
+            "mysql.statement",
+            {
+                tracing.CONNECTION_ID: self.connection.connection_id,
+                tracing.DIGEST: statement_digest.digest,
+                tracing.DIGEST_TEXT: statement_digest.text,
+            },
+        ):
+            return await self._start_query(q)
+
+    async def _start_query(self, q: Query) -> AllowedResult:
+        connection = self._connection
+        if connection is None or not connection.timed:
+            return await q.start()
+
+        # Time spent in session.query is subtracted from the middleware stage
+        self._query_time = 0.0
+        start = perf_counter()
+        result = await q.start()
+        connection.observe_stage(
+            "middleware", perf_counter() - start - self._query_time
+        )
+        return result
+
+    async def _timed_query(
+        self, expression: exp.Expression, sql: str, attrs: Dict[str, str]
+    ) -> AllowedResult:
+        start = perf_counter()
+        try:
+            return await self.query(expression, sql, attrs)
+        finally:
+            elapsed = perf_counter() - start
+            self._query_time += elapsed
+            if self._connection:
+                self._connection.observe_stage("query", elapsed)
+
     async def use(self, database: str) -> None:
         self.database = database
 
+    def set_global_variable(self, name: str, value: Any) -> None:
+        """
+        Set a global variable, for a SET GLOBAL statement.
+
+        Global variables are shared by every session of a server, so only the
+        variables in `settable_global_variables` can be set by default. Override this
+        to decide otherwise, e.g. for some users:
+
+            def set_global_variable(self, name, value):
+                if self.username != "admin":
+                    raise MysqlError("Access denied", ErrorCode.ACCESS_DENIED_ERROR)
+                self.variables.global_variables.set(name, value)
+
+        Args:
+            name: variable name
+            value: new value, or DEFAULT
+        """
+        if name.lower() not in self.settable_global_variables or not isinstance(
+            self.variables, SessionVariables
+        ):
+            raise MysqlError(
+                f"Cannot SET variable {name} with scope GLOBAL",
+                code=ErrorCode.NOT_SUPPORTED_YET,
+            )
+        self.variables.global_variables.set(name, value)
+
     def _parse(self, sql: str) -> List[exp.Expression]:
+        if self._connection and self._connection.timed:
+            with StageTimer(self._connection, "parse"):
+                return self._parse_sql(sql)
+        return self._parse_sql(sql)
+
+    def _parse_sql(self, sql: str) -> List[exp.Expression]:
+        if self._connection and self._connection.parse_cache is not None:
+            return self._connection.parse_cache.parse(self.dialect, sql)
         return [e for e in Dialect.get_or_raise(self.dialect).parse(sql) if e]  # type: ignore
 
     async def _query_info_schema(self, expression: exp.Expression) -> AllowedResult:
-        return await ensure_info_schema(await self.schema()).query(expression)
+        dbs = [(db or self.database or "").lower() for db in find_dbs(expression)]
+        if PERFORMANCE_SCHEMA in dbs:
+            tables = performance_schema_tables(self.connection.digests)
+            return await InfoSchema(tables).query(expression)
+        return await (await self._info_schema()).query(expression)
+
+    async def _info_schema(self) -> BaseInfoSchema:
+        cache = self._connection.info_schema_cache if self._connection else None
+        version = await self.schema_version() if cache is not None else None
+        if cache is None or version is None:
+            return ensure_info_schema(await self.schema())
+        info_schema = cache.get(version)
+        if info_schema is None:
+            info_schema = ensure_info_schema(await self.schema())
+            cache.put(version, info_schema)
+        return info_schema
+
+    async def _columns_mapping(self, expression: exp.Expression) -> dict:
+        """Get the columns of the tables a statement references from INFORMATION_SCHEMA"""
+        mapping: dict = {}
+        for table in expression.find_all(exp.Table):
+            db = table.db or self.database
+            if not db or not table.name:
+                continue
+            select = (
+                exp.select("column_name", "data_type")
+                .from_("information_schema.columns")
+                .where(exp.column("table_schema").eq(exp.Literal.string(db)))
+                .where(exp.column("table_name").eq(exp.Literal.string(table.name)))
+            )
+            result_set = await ensure_result_set(await self._query_info_schema(select))
+            columns = mapping.setdefault(db, {}).setdefault(table.name, {})
+            async for name, data_type in aiterate(result_set.rows):
+                columns[name] = data_type
+        return mapping
+
+    def _tables_mapping(self, schema: dict, expression: exp.Expression) -> dict:
+        """Get the part of a schema mapping with the tables a statement references"""
+
+        def copy(src: dict, dest: dict, path: List[Optional[str]]) -> None:
+            # Unqualified parts match every key, like they do in MappingSchema
+            part, *rest = path
+            for key in [part] if part else list(src):
+                if key not in src:
+                    continue
+                if rest:
+                    copy(src[key], dest.setdefault(key, {}), rest)
+                else:
+                    dest[key] = src[key]
+
+        depth = dict_depth(schema)
+        mapping: dict = {}
+        if depth < 2:
+            return mapping
+        for table in expression.find_all(exp.Table):
+            if not table.name:
+                continue
+            path = [table.catalog, table.db or self.database, table.name]
+            copy(schema, mapping, path[-depth + 1 :])
+        return mapping
 
     async def _set_var_middleware(self, q: Query) -> AllowedResult:
         """Handles SET_VAR hints and replaces functions defined in the _functions mapping with their mapped values."""
@@ -435,6 +801,55 @@ class Session(BaseSession):
             return await self._query_info_schema(q.expression)
         return await q.next()
 
+    async def _select_ints_fast_path(self, m: Match[str]) -> AllowedResult:
+        """Answer queries like SELECT 1"""
+        columns = [c.strip() for c in m.group(1).split(",")]
+        return [tuple(int(c) for c in columns)], columns
+
+    async def _select_variables_fast_path(self, m: Match[str]) -> AllowedResult:
+        """Answer queries like SELECT @@session.transaction_isolation"""
+        columns = [c.strip() for c in m.group(1).split(",")]
+        row = []
+        for column in columns:
+            scope, _, name = column[2:].rpartition(".")
+            variables = self.variables
+            if scope.upper() == "GLOBAL" and isinstance(variables, SessionVariables):
+                variables = variables.global_variables
+            value = variables.get(name)
+            if value is not None and type(value) not in (bool, int, str):
+                # Let the static query middleware convert it
+                return None
+            row.append(value)
+        limit = m.group(2)
+        return ([tuple(row)] if limit is None or int(limit) > 0 else []), columns
+
+    async def _set_variable_fast_path(self, m: Match[str]) -> AllowedResult:
+        """Handle statements like SET autocommit=1"""
+        name, literal = m.groups()
+        value: Any
+        if literal.isdigit():
+            value = int(literal)
+        elif literal[0] == "'":
+            value = literal[1:-1]
+        elif literal.upper() in _SET_KEYWORDS:
+            value = _SET_KEYWORDS[literal.upper()]
+        elif literal in _SET_VALUES:
+            # Like expression_to_value, these are case-sensitive
+            value = _SET_VALUES[literal]
+        else:
+            return None
+        self.variables.set(name, value)
+        return [], []
+
+    async def _set_names_fast_path(self, m: Match[str]) -> AllowedResult:
+        """Handle statements like SET NAMES utf8mb4"""
+        self._set_names_to(m.group(1), m.group(2))
+        return [], []
+
+    async def _transaction_fast_path(self, m: Match[str]) -> AllowedResult:
+        """Handle BEGIN, COMMIT and ROLLBACK"""
+        return [], []
+
     def _set_variable(self, setitem: exp.SetItem) -> None:
         assignment = setitem.this
         left = assignment.left
@@ -452,10 +867,17 @@ class Session(BaseSession):
             name = left.name
 
         scope = scope.upper()
-        value = expression_to_value(assignment.right)
+        # Only enumerations can be set with bare words
+        schema = self.variables.schema.get(name.lower())
+        value = expression_to_value(
+            assignment.right,
+            bare_words=schema is not None and isinstance(schema[0], Enumeration),
+        )
 
         if scope in {"SESSION", "LOCAL"}:
             self.variables.set(name, value)
+        elif scope == "GLOBAL":
+            self.set_global_variable(name, value)
         else:
             raise MysqlError(
                 f"Cannot SET variable {name} with scope {scope}",
@@ -476,16 +898,18 @@ class Session(BaseSession):
         self.variables.set("character_set_connection", charset_conn)
 
     def _set_names(self, item: exp.SetItem) -> None:
+        self._set_names_to(item.name, item.text("collate"))
+
+    def _set_names_to(self, name: str, collate: str | None) -> None:
         charset_name: Any
         collation_name: Any
-        if item.name == "DEFAULT":
+        if name == "DEFAULT":
             charset_name = DEFAULT
             collation_name = DEFAULT
         else:
-            charset_name = item.name
+            charset_name = name
             collation_name = (
-                item.text("collate")
-                or CharacterSet[charset_name].default_collation.name
+                collate or CharacterSet[charset_name].default_collation.name
             )
         self.variables.set("character_set_client", charset_name)
         self.variables.set("character_set_connection", charset_name)
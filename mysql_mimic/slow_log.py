@@ -0,0 +1,206 @@
+"""
+Slow query log.
+
+Like MySQL's slow query log, statements that take at least `long_query_time` seconds
+are logged. `long_query_time` is a system variable, so it can be changed for a
+session with `SET long_query_time = ...`, or for all sessions with
+`SET GLOBAL long_query_time = ...`.
+
+With `log_slow_rate_limit = N`, only one in N slow queries is logged, at random.
+
+Logging never blocks the connection: entries are handed to a sink, which writes them
+on a background thread or schedules a callback on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import logging.handlers
+import queue
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SlowQuery:
+    """
+    A logged query.
+
+    Args:
+        sql: the query, as sent by the client
+        digest: digest of the statement, if it was parsed
+        digest_text: normalized statement, if it was parsed
+        connection_id: ID of the connection
+        user: user of the session
+        host: address of the client
+        database: current database
+        timestamp: when the query started, as a Unix timestamp
+        query_time: time to execute the query, including sending its result, in seconds
+        stages: time spent in each stage of handling the query, in seconds.
+            Stages are only timed if metrics are enabled or a slow query log is set.
+        rows_sent: number of rows sent
+        bytes_received: number of bytes received from the client
+        bytes_sent: number of bytes sent to the client
+        error: whether the query failed
+    """
+
+    sql: str
+    digest: Optional[str]
+    digest_text: Optional[str]
+    connection_id: int
+    user: Optional[str]
+    host: Optional[str]
+    database: Optional[str]
+    timestamp: float
+    query_time: float
+    stages: Dict[str, float] = field(default_factory=dict)
+    rows_sent: int = 0
+    bytes_received: int = 0
+    bytes_sent: int = 0
+    error: bool = False
+
+
+class SlowQueryLog:
+    """
+    Sink for the slow query log.
+
+    `write` is called on the event loop, after a query's result is sent,
+    so it must return immediately.
+    """
+
+    def write(self, query: SlowQuery) -> None:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """Flush pending entries and release resources"""
+
+
+class SlowQueryFile(SlowQueryLog):
+    """
+    Write the slow query log to a file, in the format of MySQL's slow query log.
+
+    Entries are formatted and written on a background thread. If the thread falls
+    behind by more than `max_queue` entries, new entries are dropped and counted
+    in `dropped`, rather than buffering without bound.
+
+    Args:
+        path: path of the log file
+        max_bytes: rotate the file when it reaches this size. 0 never rotates.
+        backup_count: number of rotated files to keep, as `path.1`, `path.2`, ...
+        max_queue: maximum number of entries waiting to be written
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+        max_queue: int = 10_000,
+    ):
+        self.path = path
+        self.dropped = 0
+        self._handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.Queue[Optional[SlowQuery]] = queue.Queue(max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="mysql-mimic-slow-log", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, query: SlowQuery) -> None:
+        try:
+            self._queue.put_nowait(query)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._handler.close()
+
+    def _run(self) -> None:
+        while True:
+            query = self._queue.get()
+            if query is None:
+                return
+            try:
+                self._handler.emit(
+                    logging.makeLogRecord({"msg": format_entry(query), "args": None})
+                )
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to write slow query log")
+
+
+class SlowQueryCallback(SlowQueryLog):
+    """
+    Pass slow queries to a callback.
+
+    The callback is scheduled on the event loop, rather than called while the
+    connection waits. It can be a coroutine function.
+
+    Args:
+        callback: called with each `SlowQuery`
+    """
+
+    def __init__(
+        self, callback: Callable[[SlowQuery], Union[None, Awaitable[None]]]
+    ) -> None:
+        self.callback = callback
+        self._tasks: Set[asyncio.Task] = set()
+
+    def write(self, query: SlowQuery) -> None:
+        asyncio.get_running_loop().call_soon(self._call, query)
+
+    def _call(self, query: SlowQuery) -> None:
+        try:
+            result = self.callback(query)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Slow query log callback failed")
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._tasks.add(task)
+            task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error("Slow query log callback failed", exc_info=task.exception())
+
+
+def format_entry(query: SlowQuery) -> str:
+    """Format a slow query like MySQL's slow query log, with extra comment lines"""
+    time = datetime.fromtimestamp(query.timestamp, tz=timezone.utc)
+    lines = [
+        f"# Time: {time.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}",
+        f"# User@Host: {query.user or ''}[{query.user or ''}] @ {query.host or ''} []"
+        f"  Id: {query.connection_id}",
+        f"# Query_time: {query.query_time:.6f}  Lock_time: 0.000000"
+        f"  Rows_sent: {query.rows_sent}  Rows_examined: 0",
+        f"# Bytes_received: {query.bytes_received}  Bytes_sent: {query.bytes_sent}"
+        f"  Error: {int(query.error)}",
+    ]
+    if query.digest:
+        lines.append(f"# Digest: {query.digest}")
+    if query.stages:
+        stages = "  ".join(f"{k}: {v:.6f}" for k, v in query.stages.items())
+        lines.append(f"# Stages: {stages}")
+    if query.database:
+        lines.append(f"use {query.database};")
+    lines.append(f"SET timestamp={int(query.timestamp)};")
+    sql = query.sql.rstrip().rstrip(";")
+    lines.append(f"{sql};")
+    return "\n".join(lines)
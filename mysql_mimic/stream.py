@@ -1,61 +1,645 @@
 import asyncio
 import struct
-from typing import Any, Sequence
+import zlib
+from time import perf_counter
+from typing import Any, Callable, Coroutine, List, Optional, Sequence, Tuple, Union
 from ssl import SSLContext
 
 from mysql_mimic.errors import MysqlError, ErrorCode
-from mysql_mimic.results import ResultColumn
+from mysql_mimic import arrow
+from mysql_mimic.results import (
+    ResultColumn,
+    text_encode_arrow,
+    text_encode_column,
+)
 from mysql_mimic.types import ColumnType, uint_len
 from mysql_mimic.utils import seq
 
 _header_struct = struct.Struct("<I")
 _pack_header = _header_struct.pack_into
 
+# Compressed packet header: 3 bytes compressed length, 1 byte sequence ID, 3 bytes uncompressed length
+_compressed_header_struct = struct.Struct("<IHB")
+_pack_compressed_header = _compressed_header_struct.pack
+
+# Payloads smaller than this are sent uncompressed. Same as MIN_COMPRESS_LENGTH in MySQL.
+MIN_COMPRESS_LENGTH = 50
+
+# Batches at least this large are compressed in an executor, off the event loop.
+COMPRESS_OFFLOAD_THRESHOLD = 2**18
+
+# Result rows are flushed to the transport once this many bytes are buffered.
+MAX_BUFFER_SIZE = 2**20
+
+# Transport write buffer watermarks. Once the transport buffers more than the high
+# watermark, draining waits until the socket has taken it down to the low watermark.
+WRITE_HIGH_WATER = 2**20
+WRITE_LOW_WATER = 2**18
+
+
+# Text protocol encoding strategies. See `_text_kind`.
+_TEXT_DEFAULT = 0
+_TEXT_UTF8 = 1
+_TEXT_TINY = 2
+_TEXT_CUSTOM = 3
+
+# Binary protocol encoding strategies. See `_binary_kind`.
+_BINARY_STRUCT = 0
+_BINARY_UTF8 = 1
+_BINARY_STR = 2
+_BINARY_TINY = 3
+_BINARY_CUSTOM = 4
+
+# Fixed-width binary protocol types, packed the same as the default binary encoders
+_BINARY_STRUCTS = {
+    ColumnType.SHORT: struct.Struct("<h"),
+    ColumnType.YEAR: struct.Struct("<h"),
+    ColumnType.LONG: struct.Struct("<l"),
+    ColumnType.INT24: struct.Struct("<l"),
+    ColumnType.LONGLONG: struct.Struct("<q"),
+    ColumnType.FLOAT: struct.Struct("<f"),
+    ColumnType.DOUBLE: struct.Struct("<d"),
+}
+
+# Binary protocol types that are sent as length-encoded strings
+_BINARY_STRINGS = {
+    ColumnType.DECIMAL,
+    ColumnType.VARCHAR,
+    ColumnType.BIT,
+    ColumnType.JSON,
+    ColumnType.NEWDECIMAL,
+    ColumnType.ENUM,
+    ColumnType.SET,
+    ColumnType.TINY_BLOB,
+    ColumnType.MEDIUM_BLOB,
+    ColumnType.LONG_BLOB,
+    ColumnType.BLOB,
+    ColumnType.VAR_STRING,
+    ColumnType.STRING,
+    ColumnType.GEOMETRY,
+}
+
+# Length-encoded integer prefixes for short strings
+_LENGTH_PREFIXES = [bytes([i]) for i in range(251)]
+
+
+def _text_kind(col: ResultColumn) -> int:
+    if col.use_default_text_encoder:
+        if col.codec == "utf8":
+            return _TEXT_UTF8
+        return _TEXT_DEFAULT
+    if col.type == ColumnType.TINY:
+        return _TEXT_TINY
+    return _TEXT_CUSTOM
+
+
+def _binary_kind(col: ResultColumn) -> int:
+    if col.use_default_binary_encoder:
+        if col.type in _BINARY_STRUCTS:
+            return _BINARY_STRUCT
+        if col.type in _BINARY_STRINGS:
+            if col.codec == "utf8":
+                return _BINARY_UTF8
+            return _BINARY_STR
+        if col.type == ColumnType.TINY or col.type == ColumnType.BOOL:
+            return _BINARY_TINY
+    return _BINARY_CUSTOM
+
 
 class ConnectionClosed(Exception):
     pass
 
 
+class Compressor:
+    """Compression algorithm for the compressed protocol"""
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+    def decompress(self, data: bytes, length: int) -> bytes:
+        raise NotImplementedError()
+
+
+class ZlibCompressor(Compressor):
+    """CLIENT_COMPRESS"""
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes, length: int) -> bytes:
+        return zlib.decompress(data, bufsize=length)
+
+
+class ZstdCompressor(Compressor):
+    """
+    CLIENT_ZSTD_COMPRESSION_ALGORITHM
+
+    This requires the `zstandard` package.
+    """
+
+    def __init__(self, level: int = 3):
+        import zstandard  # pylint: disable=import-outside-toplevel
+
+        self.level = level
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes, length: int) -> bytes:
+        return self._decompressor.decompress(data, max_output_size=length)
+
+
+class PacketReader(asyncio.BufferedProtocol):
+    """
+    Protocol that receives data directly into a reusable buffer.
+
+    This replaces `asyncio.StreamReader`, which deletes consumed bytes from the front of its
+    buffer on every read. Here, consumed bytes are tracked with an offset, and unread bytes are
+    only moved to the front when the buffer needs more room.
+    Reads of data that is already buffered complete without suspending.
+
+    Args:
+        client_connected_cb: called with (reader, writer) once the connection is made
+        buffer_size: initial size of the receive buffer
+        limit: pause reading from the transport when this many unread bytes are buffered
+        write_high_water: high watermark of the transport's write buffer
+        write_low_water: low watermark of the transport's write buffer
+    """
+
+    def __init__(
+        self,
+        client_connected_cb: Optional[
+            Callable[["PacketReader", asyncio.StreamWriter], Coroutine[Any, Any, None]]
+        ] = None,
+        buffer_size: int = 2**16,
+        limit: int = 2**20,
+        write_high_water: int = WRITE_HIGH_WATER,
+        write_low_water: int = WRITE_LOW_WATER,
+    ):
+        self._client_connected_cb = client_connected_cb
+        self._buf = bytearray(buffer_size)
+        self._pos = 0
+        self._end = 0
+        self._limit = limit
+        self.write_high_water = write_high_water
+        self.write_low_water = write_low_water
+        self._eof = False
+        self._exception: Optional[BaseException] = None
+        self._waiter: Optional[asyncio.Future] = None
+        self._transport: Optional[asyncio.BaseTransport] = None
+        self._paused_reading = False
+        self._paused_writing = False
+        self._drain_waiters: List[asyncio.Future] = []
+        self._closed: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # asyncio protocol callbacks
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport
+        self.set_write_buffer_limits(transport)
+        loop = asyncio.get_running_loop()
+        self._closed = loop.create_future()
+        if self._client_connected_cb is not None:
+            writer = asyncio.StreamWriter(
+                transport, self, None, loop  # type: ignore[arg-type]
+            )
+            self._task = loop.create_task(self._client_connected_cb(self, writer))
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._eof = True
+        self._exception = exc
+        self._wakeup()
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                if exc is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(exc)
+        self._drain_waiters.clear()
+        if self._closed is not None and not self._closed.done():
+            self._closed.set_result(None)
+        self._transport = None
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        buf = self._buf
+        if self._pos == self._end:
+            self._pos = self._end = 0
+        needed = max(sizehint, 2**12)
+        if len(buf) - self._end < needed:
+            unread = self._end - self._pos
+            if len(buf) - unread < needed:
+                # Grow into a new buffer.
+                # Resizing in place would fail if a view of the old buffer is still alive.
+                new_buf = bytearray(max(unread + needed, len(buf) * 2))
+                new_buf[:unread] = buf[self._pos : self._end]
+                self._buf = buf = new_buf
+            else:
+                # Move unread bytes to the front of the buffer
+                buf[:unread] = buf[self._pos : self._end]
+            self._pos = 0
+            self._end = unread
+        return memoryview(buf)[self._end :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._end += nbytes
+        self._wakeup()
+        if (
+            self._waiter is None
+            and not self._paused_reading
+            and self._end - self._pos >= self._limit
+            and isinstance(self._transport, asyncio.ReadTransport)
+        ):
+            self._paused_reading = True
+            self._transport.pause_reading()
+
+    def eof_received(self) -> Optional[bool]:
+        self._eof = True
+        self._wakeup()
+        return None
+
+    def pause_writing(self) -> None:
+        self._paused_writing = True
+
+    def resume_writing(self) -> None:
+        self._paused_writing = False
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._drain_waiters.clear()
+
+    async def _drain_helper(self) -> None:
+        """Called by `asyncio.StreamWriter.drain`"""
+        if self._transport is None:
+            raise ConnectionResetError("Connection lost")
+        if not self._paused_writing:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._drain_waiters.append(waiter)
+        await waiter
+
+    def _get_close_waiter(self, stream: Any) -> Optional[asyncio.Future]:
+        """Called by `asyncio.StreamWriter.wait_closed`"""
+        return self._closed
+
+    def set_write_buffer_limits(self, transport: asyncio.BaseTransport) -> None:
+        """Apply the write buffer watermarks to a transport, e.g. after upgrading to TLS"""
+        if isinstance(transport, asyncio.WriteTransport):
+            transport.set_write_buffer_limits(
+                high=self.write_high_water, low=self.write_low_water
+            )
+
+    # Reading API
+
+    def buffered(self) -> int:
+        """Number of unread bytes in the receive buffer"""
+        return self._end - self._pos
+
+    def at_eof(self) -> bool:
+        return self._eof and self._pos == self._end
+
+    def has_packet(self) -> bool:
+        """Whether a complete MySQL packet is buffered"""
+        unread = self._end - self._pos
+        if unread < 4:
+            return False
+        buf = self._buf
+        pos = self._pos
+        length = buf[pos] | (buf[pos + 1] << 8) | (buf[pos + 2] << 16)
+        return unread >= 4 + length
+
+    async def readexactly(self, n: int) -> bytes:
+        if self._end - self._pos < n:
+            await self._wait_for(n)
+        pos = self._pos
+        self._pos = pos + n
+        return bytes(memoryview(self._buf)[pos : pos + n])
+
+    async def _wait_for(self, n: int) -> None:
+        while self._end - self._pos < n:
+            if self._eof:
+                partial = bytes(memoryview(self._buf)[self._pos : self._end])
+                self._pos = self._end
+                raise asyncio.IncompleteReadError(partial, n)
+            if self._paused_reading and isinstance(
+                self._transport, asyncio.ReadTransport
+            ):
+                self._paused_reading = False
+                self._transport.resume_reading()
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+    def _wakeup(self) -> None:
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+def encode_text_rows(
+    buf: bytearray,
+    rows: Sequence[Sequence[Any]],
+    columns: Sequence[ResultColumn],
+    seq_start: int,
+    start: int = 0,
+    max_size: int = 0,
+) -> int:
+    """Serialize and frame text result rows into `buf`.
+
+    An encoding strategy is chosen for each column once, up front, so cells
+    don't look up the column's encoder. Default-encoded columns still check
+    whether each value is a str or bytes, since columns may mix types.
+
+    Args:
+        buf: buffer to append packets to
+        rows: rows to encode
+        columns: result columns
+        seq_start: sequence ID of the first packet. IDs wrap around at 256.
+        start: index of the first row to encode
+        max_size: if set, stop encoding rows once `buf` holds this many bytes
+    Returns:
+        The number of rows written.
+    """
+    num_cols = len(columns)
+    count = 0
+    seq_val = seq_start
+    kinds = [_text_kind(col) for col in columns]
+
+    for r in range(start, len(rows)):
+        row = rows[r]
+
+        # Reserve 4 bytes for the packet header
+        header_pos = len(buf)
+        buf += b"\x00\x00\x00\x00"
+
+        # Serialize row directly into buf
+        for i in range(num_cols):
+            value = row[i]
+            if value is None:
+                buf += b"\xfb"
+                continue
+
+            kind = kinds[i]
+            if kind == _TEXT_UTF8:
+                if isinstance(value, str):
+                    encoded = value.encode("utf-8")
+                elif isinstance(value, bytes):
+                    encoded = value
+                else:
+                    encoded = str(value).encode("utf-8")
+            elif kind == _TEXT_DEFAULT:
+                col = columns[i]
+                if isinstance(value, str):
+                    encoded = value.encode(col.codec)
+                elif isinstance(value, bytes):
+                    encoded = value
+                else:
+                    encoded = str(value).encode(col.codec)
+            elif kind == _TEXT_TINY:
+                encoded = str(int(value)).encode(columns[i].codec)
+            else:
+                col = columns[i]
+                encoded = col.text_encoder(col, value)
+
+            n = len(encoded)
+            if n < 251:
+                buf += _LENGTH_PREFIXES[n]
+            else:
+                buf += uint_len(n)
+            buf += encoded
+
+        # Fill in the packet header now that we know the size
+        payload_len = len(buf) - header_pos - 4
+        _pack_header(buf, header_pos, payload_len | (seq_val << 24))
+        seq_val = (seq_val + 1) & 0xFF
+        count += 1
+        if max_size and len(buf) >= max_size:
+            break
+
+    return count
+
+
+def encode_binary_rows(
+    buf: bytearray,
+    rows: Sequence[Sequence[Any]],
+    columns: Sequence[ResultColumn],
+    seq_start: int,
+    start: int = 0,
+    max_size: int = 0,
+) -> int:
+    """Serialize and frame binary result rows into `buf`.
+
+    This is the binary protocol counterpart of `encode_text_rows`. The NULL
+    bitmap is reserved in the buffer and filled in place, and fixed-width
+    values are packed with a precompiled struct per column.
+    Arguments are the same as `encode_text_rows`.
+
+    Returns the number of rows written.
+    """
+    num_cols = len(columns)
+    count = 0
+    seq_val = seq_start
+    kinds = [_binary_kind(col) for col in columns]
+    packers: List[Any] = [
+        _BINARY_STRUCTS[col.type].pack if kind == _BINARY_STRUCT else None
+        for col, kind in zip(columns, kinds)
+    ]
+    # Packet header byte followed by the NULL bitmap, which has an offset of 2 bits
+    row_prefix = bytes(1 + (num_cols + 7 + 2) // 8)
+
+    for r in range(start, len(rows)):
+        row = rows[r]
+
+        # Reserve 4 bytes for the packet header
+        header_pos = len(buf)
+        buf += b"\x00\x00\x00\x00"
+        bitmap_pos = header_pos + 5
+        buf += row_prefix
+
+        for i in range(num_cols):
+            value = row[i]
+            if value is None:
+                bit = i + 2
+                buf[bitmap_pos + (bit >> 3)] |= 1 << (bit & 7)
+                continue
+
+            kind = kinds[i]
+            if kind == _BINARY_STRUCT:
+                buf += packers[i](value)
+                continue
+            if kind == _BINARY_TINY:
+                buf += b"\x01" if value else b"\x00"
+                continue
+
+            if kind == _BINARY_UTF8:
+                if isinstance(value, str):
+                    encoded = value.encode("utf-8")
+                elif isinstance(value, bytes):
+                    encoded = value
+                else:
+                    encoded = str(value).encode("utf-8")
+            elif kind == _BINARY_STR:
+                col = columns[i]
+                if isinstance(value, str):
+                    encoded = value.encode(col.codec)
+                elif isinstance(value, bytes):
+                    encoded = value
+                else:
+                    encoded = str(value).encode(col.codec)
+            else:
+                col = columns[i]
+                buf += col.binary_encoder(col, value)
+                continue
+
+            n = len(encoded)
+            if n < 251:
+                buf += _LENGTH_PREFIXES[n]
+            else:
+                buf += uint_len(n)
+            buf += encoded
+
+        # Fill in the packet header now that we know the size
+        payload_len = len(buf) - header_pos - 4
+        _pack_header(buf, header_pos, payload_len | (seq_val << 24))
+        seq_val = (seq_val + 1) & 0xFF
+        count += 1
+        if max_size and len(buf) >= max_size:
+            break
+
+    return count
+
+
 class MysqlStream:
     def __init__(
         self,
-        reader: asyncio.StreamReader,
+        reader: Union[PacketReader, asyncio.StreamReader],
         writer: asyncio.StreamWriter,
         buffer_size: int = 2**15,
+        max_buffer_size: int = MAX_BUFFER_SIZE,
     ):
         self.reader = reader
         self.writer = writer
         self.seq = seq(256)
         self._buffer = bytearray()
         self._buffer_size = buffer_size
+        self.max_buffer_size = max_buffer_size
+
+        # Counters, e.g. for metrics. Bytes are counted as sent and received on the wire.
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.max_buffered = 0
+        self.drain_time = 0.0
         self._header = bytearray(4)
 
+        # While set, `drain` leaves responses buffered, up to `max_buffer_size`,
+        # so responses to pipelined commands are sent in one write
+        self.coalesce = False
+
+        # Compressed protocol state
+        self.compressor: Optional[Compressor] = None
+        self.compressed_seq = seq(256)
+        self.min_compress_length = MIN_COMPRESS_LENGTH
+        self.compress_offload_threshold = COMPRESS_OFFLOAD_THRESHOLD
+        self._inflated = bytearray()
+
+    def enable_compression(self, compressor: Compressor) -> None:
+        """
+        Switch to the compressed protocol.
+
+        This should be called once authentication is complete.
+        """
+        self.compressor = compressor
+
     async def read(self) -> bytes:
-        data = b""
+        if self.coalesce and self._buffer and not self.has_packet():
+            # The client may be waiting on a response before sending more
+            await self.flush()
+        payload_length = await self._read_header()
+        if payload_length < 0xFFFFFF:
+            return await self._recv(payload_length)
+
+        # Large payloads are split into multiple packets.
+        # Join them in a single buffer rather than repeatedly concatenating bytes.
+        data = bytearray()
         while True:
-            header = await self.reader.read(4)
+            data.extend(await self._recv(payload_length))
+            if payload_length < 0xFFFFFF:
+                return bytes(data)
+            payload_length = await self._read_header()
+
+    async def _read_header(self) -> int:
+        header = await self._recv(4)
+        i = _header_struct.unpack(header)[0]
+        payload_length = i & 0x00FFFFFF
+        sequence_id = (i & 0xFF000000) >> 24
+
+        expected = next(self.seq)
+        if sequence_id != expected:
+            raise MysqlError(
+                f"Expected seq({expected}) got seq({sequence_id})",
+                ErrorCode.MALFORMED_PACKET,
+            )
+        return payload_length
 
-            if not header:
+    async def _recv(self, n: int) -> bytes:
+        if not n:
+            return b""
+        if self.compressor is not None:
+            return await self._read_inflated(n)
+        try:
+            data = await self.reader.readexactly(n)
+        except asyncio.IncompleteReadError as e:
+            raise ConnectionClosed() from e
+        if len(data) < n:
+            raise ConnectionClosed()
+        self.bytes_received += n
+        return data
+
+    async def _read_inflated(self, n: int) -> bytes:
+        """Read `n` bytes of decompressed data, reading compressed packets as necessary"""
+        assert self.compressor is not None
+        inflated = self._inflated
+        while len(inflated) < n:
+            try:
+                header = await self.reader.readexactly(7)
+            except asyncio.IncompleteReadError as e:
+                header = e.partial
+            if len(header) < 7:
                 raise ConnectionClosed()
 
-            i = struct.unpack("<I", header)[0]
-            payload_length = i & 0x00FFFFFF
+            i, lo, hi = _compressed_header_struct.unpack(header)
+            compressed_length = i & 0x00FFFFFF
             sequence_id = (i & 0xFF000000) >> 24
+            uncompressed_length = lo | (hi << 16)
 
-            expected = next(self.seq)
+            expected = next(self.compressed_seq)
             if sequence_id != expected:
                 raise MysqlError(
-                    f"Expected seq({expected}) got seq({sequence_id})",
+                    f"Expected compressed seq({expected}) got seq({sequence_id})",
                     ErrorCode.MALFORMED_PACKET,
                 )
 
-            if payload_length == 0:
-                return data
+            try:
+                payload = await self.reader.readexactly(compressed_length)
+            except asyncio.IncompleteReadError as e:
+                raise ConnectionClosed() from e
+            if len(payload) < compressed_length:
+                raise ConnectionClosed()
+            self.bytes_received += 7 + compressed_length
+            if uncompressed_length:
+                payload = self.compressor.decompress(payload, uncompressed_length)
+            inflated.extend(payload)
 
-            data += await self.reader.readexactly(payload_length)
-
-            if payload_length < 0xFFFFFF:
-                return data
+        data = bytes(inflated[:n])
+        del inflated[:n]
+        return data
 
     async def write(self, data: bytes, drain: bool = True) -> None:
         if len(data) < 0xFFFFFF:
@@ -96,64 +680,220 @@ class MysqlStream:
 
         Returns the number of rows written.
         """
-        buf = self._buffer
-        num_cols = len(columns)
+        count = encode_text_rows(self._buffer, rows, columns, self.seq.value)
+        self.seq.value = (self.seq.value + count) & 0xFF
+        return count
+
+    def write_binary_rows(
+        self, rows: Sequence[Sequence[Any]], columns: Sequence[ResultColumn]
+    ) -> int:
+        """Serialize and frame binary result rows directly into the buffer.
+
+        Returns the number of rows written.
+        """
+        count = encode_binary_rows(self._buffer, rows, columns, self.seq.value)
+        self.seq.value = (self.seq.value + count) & 0xFF
+        return count
+
+    async def write_rows(
+        self,
+        rows: Sequence[Sequence[Any]],
+        columns: Sequence[ResultColumn],
+        binary: bool = False,
+    ) -> int:
+        """Serialize and frame result rows, draining whenever `max_buffer_size` bytes are buffered.
+
+        Returns the number of rows written.
+        """
         count = 0
-        seq_val = self.seq.value
-        seq_size = self.seq.size or 0
+        total = len(rows)
+        while count < total:
+            if binary:
+                n = encode_binary_rows(
+                    self._buffer,
+                    rows,
+                    columns,
+                    self.seq.value,
+                    count,
+                    self.max_buffer_size,
+                )
+            else:
+                n = encode_text_rows(
+                    self._buffer,
+                    rows,
+                    columns,
+                    self.seq.value,
+                    count,
+                    self.max_buffer_size,
+                )
+            self.seq.value = (self.seq.value + n) & 0xFF
+            count += n
+            await self.drain_if_full()
+        return count
 
-        for row in rows:
-            # Reserve 4 bytes for the packet header
-            header_pos = len(buf)
-            buf.extend(b"\x00\x00\x00\x00")
+    def reserve_seq(self, count: int) -> int:
+        """
+        Reserve sequence IDs for `count` packets that are framed elsewhere.
 
-            # Serialize row directly into buf
-            for i in range(num_cols):
-                value = row[i]
-                if value is None:
-                    buf.append(0xFB)
-                    continue
+        Returns:
+            The sequence ID of the first packet
+        """
+        seq_start = self.seq.value
+        self.seq.value = (seq_start + count) & 0xFF
+        return seq_start
 
-                col = columns[i]
-                if col.use_default_text_encoder:
-                    if isinstance(value, str):
-                        encoded = value.encode(col.codec)
-                    elif isinstance(value, bytes):
-                        encoded = value
-                    else:
-                        encoded = str(value).encode(col.codec)
-                elif col.type == ColumnType.TINY:
-                    encoded = str(int(value)).encode(col.codec)
-                else:
-                    encoded = col.text_encoder(col, value)
+    def write_framed(self, data: Union[bytes, bytearray]) -> None:
+        """Buffer packets that are already framed, e.g. by `encode_text_rows`"""
+        self._buffer += data
 
-                n = len(encoded)
-                if n < 251:
-                    buf.append(n)
-                else:
-                    buf.extend(uint_len(n))
-                buf.extend(encoded)
+    def write_text_columns(
+        self, arrays: Sequence[Any], columns: Sequence[ResultColumn]
+    ) -> int:
+        """Serialize and frame a batch of column arrays as text result rows.
+
+        Each column is encoded in bulk, then rows are assembled from the
+        encoded cells.
+
+        Returns the number of rows written.
+        """
+        if self.seq.size == 256 and all(hasattr(a, "to_pylist") for a in arrays):
+            count = self._write_arrow_text_columns(arrays, columns)
+            if count is not None:
+                return count
+
+        cells = []
+        for values, col in zip(arrays, columns):
+            cells.append(
+                [
+                    (
+                        b"\xfb"
+                        if e is None
+                        else (
+                            _LENGTH_PREFIXES[len(e)] + e
+                            if len(e) < 251
+                            else uint_len(len(e)) + e
+                        )
+                    )
+                    for e in text_encode_column(values, col)
+                ]
+            )
+
+        buf = self._buffer
+        count = 0
+        seq_val = self.seq.value
+        seq_size = self.seq.size or 0
 
-            # Fill in the packet header now that we know the size
-            payload_len = len(buf) - header_pos - 4
-            _pack_header(buf, header_pos, payload_len | (seq_val << 24))
+        for row in zip(*cells):
+            payload = b"".join(row)
+            header_pos = len(buf)
+            buf += b"\x00\x00\x00\x00"
+            _pack_header(buf, header_pos, len(payload) | (seq_val << 24))
+            buf += payload
             seq_val += 1
             if seq_size:
                 seq_val = seq_val % seq_size
             count += 1
 
-        # Sync the sequence counter back
         self.seq.value = seq_val
         return count
 
+    def _write_arrow_text_columns(
+        self, arrays: Sequence[Any], columns: Sequence[ResultColumn]
+    ) -> Optional[int]:
+        encoded = []
+        for values, col in zip(arrays, columns):
+            e = text_encode_arrow(values, col)
+            if e is None:
+                return None
+            encoded.append(e)
+
+        framed = arrow.frame_text_rows(encoded, self.seq.value)
+        if framed is None:
+            return None
+        data, count = framed
+        self._buffer += data
+        self.seq.value = (self.seq.value + count) % 256
+        return count
+
+    async def drain_if_full(self) -> None:
+        """Drain if at least `max_buffer_size` bytes are buffered"""
+        if len(self._buffer) >= self.max_buffer_size:
+            await self.drain()
+
+    def has_packet(self) -> bool:
+        """
+        Whether the client's next packet is already buffered, e.g. because the
+        client sent several commands without waiting for their responses.
+        """
+        reader = self.reader
+        if self.compressor is not None or not isinstance(reader, PacketReader):
+            return False
+        return reader.has_packet()
+
     async def drain(self) -> None:
+        if self.coalesce and len(self._buffer) < self.max_buffer_size:
+            return
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write buffered packets to the transport, even while coalescing"""
+        start = perf_counter()
         if self._buffer:
-            self.writer.write(self._buffer)
+            if len(self._buffer) > self.max_buffered:
+                self.max_buffered = len(self._buffer)
+            if self.compressor is None:
+                self.bytes_sent += len(self._buffer)
+                self.writer.write(self._buffer)
+            else:
+                await self._write_compressed(bytes(self._buffer))
             self._buffer.clear()
         await self.writer.drain()
+        self.drain_time += perf_counter() - start
+
+    async def _write_compressed(self, data: bytes) -> None:
+        if len(data) >= self.compress_offload_threshold:
+            loop = asyncio.get_running_loop()
+            chunks = await loop.run_in_executor(None, self._compress, data)
+        else:
+            chunks = self._compress(data)
+
+        # Sequence IDs are assigned here, on the event loop
+        frames = bytearray()
+        for payload, uncompressed_length in chunks:
+            frames.extend(
+                _pack_compressed_header(
+                    len(payload) | (next(self.compressed_seq) << 24),
+                    uncompressed_length & 0xFFFF,
+                    uncompressed_length >> 16,
+                )
+            )
+            frames.extend(payload)
+        self.bytes_sent += len(frames)
+        self.writer.write(frames)
+
+    def _compress(self, data: bytes) -> List[Tuple[bytes, int]]:
+        """
+        Split data into compressed packet payloads.
+
+        Returns:
+            List of (payload, uncompressed length) pairs.
+            Uncompressed length is 0 if the payload wasn't compressed.
+        """
+        assert self.compressor is not None
+        chunks = []
+        for start in range(0, len(data), 0xFFFFFF):
+            chunk = data[start : start + 0xFFFFFF]
+            if len(chunk) >= self.min_compress_length:
+                compressed = self.compressor.compress(chunk)
+                if len(compressed) < len(chunk):
+                    chunks.append((compressed, len(chunk)))
+                    continue
+            chunks.append((chunk, 0))
+        return chunks
 
     def reset_seq(self) -> None:
         self.seq.reset()
+        self.compressed_seq.reset()
 
     async def start_tls(self, ssl: SSLContext) -> None:
         transport = self.writer.transport
@@ -169,3 +909,5 @@ class MysqlStream:
         # This seems to be the easiest way to wrap the socket created by asyncio
         self.writer._transport = new_transport  # type: ignore # pylint: disable=protected-access
         self.reader._transport = new_transport  # type: ignore # pylint: disable=protected-access
+        if isinstance(protocol, PacketReader) and new_transport is not None:
+            protocol.set_write_buffer_limits(new_transport)
@@ -0,0 +1,61 @@
+"""
+Tracing.
+
+Spans are created with an OpenTelemetry tracer, e.g. `opentelemetry.trace.get_tracer(...)`,
+or anything else with the same `start_as_current_span(name, attributes=...)` method.
+Without a tracer, no spans or attributes are created.
+
+Spans:
+    mysql.command: each command from the client
+    mysql.handle_*: the `Connection.handle_*` method for the command
+    mysql.statement: each statement of a query, with its digest
+    mysql.middleware: each middleware in `Session.middlewares`
+    mysql.session.query: `Session.query`
+    mysql.encode: encoding a result set into the write buffer
+    mysql.drain: flushing the rest of the result set to the client
+"""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, Optional
+
+# Span attributes
+DB_SYSTEM = "db.system"
+CONNECTION_ID = "mysql.connection_id"
+COMMAND = "mysql.command"
+DIGEST = "mysql.digest"
+DIGEST_TEXT = "mysql.digest_text"
+MIDDLEWARE = "mysql.middleware"
+ROWS = "mysql.rows"
+BYTES_SENT = "mysql.bytes_sent"
+BYTES_RECEIVED = "mysql.bytes_received"
+ERROR_CODE = "mysql.error_code"
+
+# Reused when tracing is disabled. Entering it returns None instead of a span.
+NO_SPAN: ContextManager[Any] = nullcontext()
+
+
+def span(
+    tracer: Any, name: str, attributes: Optional[Dict[str, Any]] = None
+) -> ContextManager[Any]:
+    """Start a span as the current span, or do nothing if `tracer` is None"""
+    if tracer is None:
+        return NO_SPAN
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def record_error(span_: Any, error: BaseException, code: int) -> None:
+    """Mark a span as failed, for errors that are handled before the span ends"""
+    span_.set_attribute(ERROR_CODE, code)
+    span_.record_exception(error)
+    try:
+        # pylint: disable=import-outside-toplevel
+        from opentelemetry.trace import Status, StatusCode
+    except ImportError:
+        return
+    span_.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+def middleware_name(middleware: Any) -> str:
+    return getattr(middleware, "__name__", type(middleware).__name__)
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 import asyncio
-import inspect
 import sys
 from collections.abc import Iterator  # pylint: disable=import-error
 import random
-from typing import Any, List, TypeVar, AsyncIterable, Iterable, AsyncIterator, cast
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+    AsyncIterable,
+    Iterable,
+    AsyncIterator,
+    cast,
+)
 import string
 
 from sqlglot import expressions as exp
@@ -120,7 +131,7 @@ async def chain_async(
 
 async def aiterate(iterable: AsyncIterable[T] | Iterable[T]) -> AsyncIterator[T]:
     """Iterate either an async iterable or a regular iterable"""
-    if inspect.isasyncgen(iterable):
+    if isinstance(iterable, AsyncIterable):
         async for item in iterable:
             yield item
     else:
@@ -128,6 +139,28 @@ async def aiterate(iterable: AsyncIterable[T] | Iterable[T]) -> AsyncIterator[T]
             yield item
 
 
+async def iterate_pages(
+    read: Callable[[int], Awaitable[Sequence[T]]], page_size: int
+) -> AsyncIterator[T]:
+    """Iterate items that are read `page_size` at a time, until a page comes back short"""
+    while True:
+        page = await read(page_size)
+        for item in page:
+            yield item
+        if len(page) < page_size:
+            return
+
+
+async def iterate_columns(
+    batches: AsyncIterable[Sequence[Any]] | Iterable[Sequence[Any]],
+    to_list: Callable[[Any], List[Any]],
+) -> AsyncIterator[Tuple[Any, ...]]:
+    """Iterate the rows of batches of column arrays, converting each array with `to_list`"""
+    async for batch in aiterate(batches):
+        for row in zip(*[to_list(values) for values in batch]):
+            yield row
+
+
 async def cooperative_iterate(
     iterable: AsyncIterable[T], batch_size: int = 10_000
 ) -> AsyncIterator[T]:
@@ -4,6 +4,7 @@ from typing import Dict, Mapping, Generator, MutableMapping, Any
 from sqlglot import expressions as exp
 
 from mysql_mimic.intercept import value_to_expression, expression_to_value
+from mysql_mimic.variables import SessionVariables
 
 variable_constants = {
     "CURRENT_USER",
@@ -106,7 +107,12 @@ class VariableProcessor:
             value = self._functions[node.sql()]()
             new_node = value_to_expression(value)
         elif isinstance(node, exp.SessionParameter):
-            value = self._variables.get(node.name)
+            variables = self._variables
+            if node.text("kind").upper() == "GLOBAL" and isinstance(
+                variables, SessionVariables
+            ):
+                variables = variables.global_variables
+            value = variables.get(node.name)
             new_node = value_to_expression(value)
 
         if (
@@ -17,6 +17,23 @@ VariableType = Callable[[Any], Any]
 VariableSchema = Tuple[VariableType, Any, bool]
 
 
+class Enumeration:
+    """
+    Type of variables that take one of a fixed set of values.
+
+    Values are case-insensitive, and can be set with bare words, e.g. `SET resultset_metadata = NONE`.
+    """
+
+    def __init__(self, *values: str):
+        self.values = values
+
+    def __call__(self, value: Any) -> str:
+        upper = str(value).upper()
+        if upper not in self.values:
+            raise ValueError(f"Invalid value: {value}")
+        return upper
+
+
 DEFAULT = Default()
 
 SYSTEM_VARIABLES: dict[str, VariableSchema] = {
@@ -35,12 +52,15 @@ SYSTEM_VARIABLES: dict[str, VariableSchema] = {
     "init_connect": (str, "", True),
     "interactive_timeout": (int, 28800, True),
     "license": (str, "MIT", False),
+    "log_slow_rate_limit": (int, 1, True),
+    "long_query_time": (float, 10.0, True),
     "lower_case_table_names": (int, 0, True),
     "max_allowed_packet": (int, 67108864, True),
     "max_execution_time": (int, 0, True),
     "net_buffer_length": (int, 16384, True),
     "net_write_timeout": (int, 28800, True),
     "performance_schema": (bool, False, False),
+    "resultset_metadata": (Enumeration("FULL", "NONE"), "FULL", True),
     "sql_auto_is_null": (bool, False, True),
     "sql_mode": (str, "ANSI", True),
     "sql_select_limit": (int, None, True),
@@ -103,8 +123,14 @@ class Variables(abc.ABC, MutableMapping[str, Any]):
 
         if value is DEFAULT or value is None:
             self._values[name] = default
-        else:
+            return
+        try:
             self._values[name] = type_(value)
+        except ValueError as e:
+            raise MysqlError(
+                f"Variable '{name}' can't be set to the value of '{value}'",
+                code=ErrorCode.WRONG_VALUE_FOR_VAR,
+            ) from e
 
     def get_variable(self, name: str) -> Any | None:
         name = name.lower()
@@ -133,10 +159,28 @@ class GlobalVariables(Variables):
 
 
 class SessionVariables(Variables):
+    """
+    Session variables.
+
+    Variables that aren't set in the session have the value of the global variable.
+    """
+
     def __init__(self, global_variables: Variables):
         self.global_variables = global_variables
         super().__init__()
 
+    def set(self, name: str, value: Any, force: bool = False) -> None:
+        if value is DEFAULT:
+            # The default of a session variable is the global value
+            value = self.global_variables.get_variable(name)
+        super().set(name, value, force)
+
+    def get_variable(self, name: str) -> Any | None:
+        name = name.lower()
+        if name in self._values:
+            return self._values[name]
+        return self.global_variables.get_variable(name)
+
     @property
     def schema(self) -> dict[str, VariableSchema]:
         return self.global_variables.schema
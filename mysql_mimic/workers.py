@@ -0,0 +1,296 @@
+"""
+Multi-process server mode.
+
+A supervisor starts worker processes that each run a MysqlServer on the same port,
+either by binding their own socket with SO_REUSEPORT or by sharing one listening socket.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+from multiprocessing.connection import Connection as Pipe
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from mysql_mimic.constants import KillKind
+from mysql_mimic.control import LocalControl
+from mysql_mimic.server import MysqlServer
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerControl(LocalControl):
+    """
+    Control for a worker process of a `WorkerPool`.
+
+    Each worker has its own server ID, which is encoded in the connection IDs it
+    generates. KILL requests for connections of other workers are forwarded to them.
+
+    Args:
+        index: index of this worker
+        base_server_id: server ID of the first worker. Worker `i` has server ID `base_server_id + i`.
+        inbox: pipe this worker receives KILL requests from
+        outboxes: pipes to send KILL requests to each worker
+    """
+
+    def __init__(
+        self, index: int, base_server_id: int, inbox: Pipe, outboxes: Sequence[Pipe]
+    ):
+        super().__init__(server_id=base_server_id + index)
+        self.index = index
+        self.base_server_id = base_server_id
+        self.inbox = inbox
+        self.outboxes = outboxes
+
+    async def kill(
+        self, connection_id: int, kind: KillKind = KillKind.CONNECTION
+    ) -> None:
+        index = (connection_id >> self._CONNECTION_ID_BITS) - self.base_server_id
+        if index == self.index or not 0 <= index < len(self.outboxes):
+            await super().kill(connection_id, kind)
+        else:
+            self.outboxes[index].send((connection_id, kind))
+
+    def listen(self) -> None:
+        """Start handling KILL requests forwarded by other workers"""
+        asyncio.get_running_loop().add_reader(self.inbox.fileno(), self._receive)
+
+    def stop(self) -> None:
+        """Stop handling forwarded KILL requests"""
+        asyncio.get_running_loop().remove_reader(self.inbox.fileno())
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Wait for connections to close.
+
+        Args:
+            timeout: seconds to wait before killing the remaining connections
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._connections and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        for connection in list(self._connections.values()):
+            connection.kill()
+        deadline = loop.time() + 1
+        while self._connections and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+
+    def _receive(self) -> None:
+        while self.inbox.poll():
+            connection_id, kind = self.inbox.recv()
+            conn = self._connections.get(connection_id)
+            if conn:
+                conn.kill(kind)
+
+
+class WorkerPool:
+    """
+    Run a MysqlServer in several worker processes that accept connections on the same port.
+
+    The supervisor restarts workers that exit unexpectedly. On shutdown, workers stop
+    accepting connections and wait up to `shutdown_timeout` seconds for open
+    connections to close before killing them.
+
+    Servers that use the default `LocalControl` get a `WorkerControl`, so connection IDs
+    are unique across workers and `KILL` works for connections of any worker.
+
+    Args:
+        server_factory: Callable that takes no arguments and returns a MysqlServer.
+            It's called in each worker process, so it must be picklable unless
+            the "fork" start method is used.
+        workers: number of worker processes. Defaults to the number of CPUs.
+        host: host to listen on
+        port: port to listen on. 0 picks a free port, which is available as `port` once started.
+        reuse_port: bind a socket in each worker with SO_REUSEPORT, so the kernel balances
+            connections across workers. Otherwise workers share one listening socket.
+            Defaults to True where SO_REUSEPORT is available.
+        base_server_id: server ID of the first worker. If left as None, a random ID is generated.
+        shutdown_timeout: seconds to wait for connections to close on shutdown
+        mp_context: multiprocessing context. Defaults to the default context.
+    """
+
+    monitor_interval = 0.5
+    start_timeout = 30.0
+
+    def __init__(
+        self,
+        server_factory: Callable[[], MysqlServer],
+        workers: Optional[int] = None,
+        host: Optional[str] = None,
+        port: int = 3306,
+        reuse_port: Optional[bool] = None,
+        base_server_id: Optional[int] = None,
+        shutdown_timeout: float = 30.0,
+        mp_context: Any = None,
+    ):
+        self.server_factory = server_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        self.reuse_port = (
+            hasattr(socket, "SO_REUSEPORT") if reuse_port is None else reuse_port
+        )
+        self.base_server_id = (
+            base_server_id
+            if base_server_id is not None
+            else random.randint(0, LocalControl._MAX_SERVER_ID - self.workers)
+        )
+        self.shutdown_timeout = shutdown_timeout
+        self.processes: List[multiprocessing.process.BaseProcess] = []
+
+        self._ctx = mp_context or multiprocessing.get_context()
+        self._socket: Optional[socket.socket] = None
+        self._pipes: List[Tuple[Pipe, Pipe]] = []
+        self._closing = threading.Event()
+
+    def start(self) -> None:
+        """Bind the port and start the workers, waiting until they are accepting connections."""
+        self._socket = self._bind()
+        self.port = self._socket.getsockname()[1]
+        self._pipes = [self._ctx.Pipe(duplex=False) for _ in range(self.workers)]
+        started = [self._start_worker(i) for i in range(self.workers)]
+        for ready in started:
+            if not ready.wait(self.start_timeout):
+                raise TimeoutError("Worker failed to start")
+
+    def serve_forever(self) -> None:
+        """
+        Supervise workers until `close` is called, then shut them down.
+
+        This starts the workers if they aren't running.
+        When called from the main thread, SIGINT and SIGTERM call `close`.
+        """
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: self.close())
+        try:
+            if not self.processes:
+                self.start()
+            while not self._closing.wait(self.monitor_interval):
+                for i, process in enumerate(self.processes):
+                    if not process.is_alive() and not self._closing.is_set():
+                        logger.warning(
+                            "Worker %s exited with code %s. Restarting.",
+                            i,
+                            process.exitcode,
+                        )
+                        self._start_worker(i)
+        finally:
+            self._shutdown()
+
+    def close(self) -> None:
+        """Stop the supervisor, which shuts down the workers."""
+        self._closing.set()
+
+    def _bind(self) -> socket.socket:
+        family, type_, proto, _, address = socket.getaddrinfo(
+            self.host, self.port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+        )[0]
+        sock = socket.socket(family, type_, proto)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            # Reserve the port, without listening, so workers can bind it too
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(address)
+        else:
+            sock.bind(address)
+            sock.listen(100)
+        return sock
+
+    def _start_worker(self, index: int) -> Any:
+        ready = self._ctx.Event()
+        process = self._ctx.Process(
+            target=_run_worker,
+            kwargs={
+                "server_factory": self.server_factory,
+                "index": index,
+                "base_server_id": self.base_server_id,
+                "inbox": self._pipes[index][0],
+                "outboxes": [w for _, w in self._pipes],
+                "host": self.host,
+                "port": self.port,
+                "sock": None if self.reuse_port else self._socket,
+                "shutdown_timeout": self.shutdown_timeout,
+                "ready": ready,
+            },
+            name=f"mysql-mimic-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        if index < len(self.processes):
+            self.processes[index] = process
+        else:
+            self.processes.append(process)
+        return ready
+
+    def _shutdown(self) -> None:
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(self.shutdown_timeout + 5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self.processes = []
+        for reader, writer in self._pipes:
+            reader.close()
+            writer.close()
+        self._pipes = []
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+
+def _run_worker(**kwargs: Any) -> None:
+    # Forked workers inherit the supervisor's handlers
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    asyncio.run(_serve_worker(**kwargs))
+
+
+async def _serve_worker(
+    server_factory: Callable[[], MysqlServer],
+    index: int,
+    base_server_id: int,
+    inbox: Pipe,
+    outboxes: Sequence[Pipe],
+    host: Optional[str],
+    port: int,
+    sock: Optional[socket.socket],
+    shutdown_timeout: float,
+    ready: Any,
+) -> None:
+    server = server_factory()
+    control = None
+    if type(server.control) is LocalControl:  # pylint: disable=unidiomatic-typecheck
+        control = WorkerControl(index, base_server_id, inbox, outboxes)
+        server.control = control
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    if sock is not None:
+        await server.start_server(sock=sock)
+    else:
+        await server.start_server(host=host, port=port, reuse_port=True)
+    if control:
+        control.listen()
+    ready.set()
+
+    await stop.wait()
+
+    server.close()
+    if control:
+        control.stop()
+        await control.drain(shutdown_timeout)
+    await server.wait_closed()
@@ -47,9 +47,11 @@ setup(
             "mypy",
             "mysql-connector-python",
             "black",
+            "numpy",
             "coverage",
             "freezegun",
             "greenlet",
+            "pyarrow",
             "pylint",
             "pytest",
             "pytest-asyncio",
@@ -57,6 +59,7 @@ setup(
             "sqlalchemy",
             "twine",
             "wheel",
+            "zstandard",
         ],
         # Kerberos dev dependencies — requires system krb5 libraries (Linux only in CI)
         # gssapi and k5test need libkrb5-dev which is not available on Windows
@@ -65,6 +68,8 @@ setup(
             "k5test",
         ],
         "krb5": ["gssapi"],
+        "arrow": ["pyarrow"],
+        "zstd": ["zstandard"],
     },
     classifiers=[
         "Development Status :: 3 - Alpha",
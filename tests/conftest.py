@@ -1,6 +1,7 @@
 from __future__ import annotations
 import asyncio
 import functools
+import io
 from contextvars import Context, copy_context
 from ssl import SSLContext
 from typing import (
@@ -13,6 +14,7 @@ from typing import (
     Awaitable,
     Sequence,
     AsyncGenerator,
+    Tuple,
     Type,
 )
 
@@ -36,9 +38,12 @@ from mysql_mimic.auth import (
     AuthPlugin,
     IdentityProvider,
 )
+from mysql_mimic import types
 from mysql_mimic.connection import Connection
 from mysql_mimic.results import AllowedResult
 from mysql_mimic.schema import InfoSchema
+from mysql_mimic.stream import MysqlStream
+from mysql_mimic.types import Capabilities
 
 
 class PreparedDictCursor(MySQLCursorPrepared):
@@ -247,5 +252,128 @@ async def query(
             cursor.add_attribute(key, value)
     await to_thread(cursor.execute, sql, *(p for p in [params] if p))
     result = await to_thread(cursor.fetchall)
+    # Multiple statements return the result of the last one
+    while await to_thread(cursor.nextset):
+        result = await to_thread(cursor.fetchall)
     await to_thread(cursor.close)
     return result
+
+
+class RawClient:
+    """
+    Client that speaks the protocol directly, for features mysql-connector doesn't support.
+
+    It always uses CLIENT_DEPRECATE_EOF, so result sets end with an OK packet.
+    """
+
+    CAPABILITIES = (
+        Capabilities.CLIENT_PROTOCOL_41
+        | Capabilities.CLIENT_SECURE_CONNECTION
+        | Capabilities.CLIENT_PLUGIN_AUTH
+        | Capabilities.CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA
+        | Capabilities.CLIENT_DEPRECATE_EOF
+    )
+
+    def __init__(self, stream: MysqlStream, capabilities: Capabilities):
+        self.stream = stream
+        self.capabilities = capabilities
+
+    @classmethod
+    async def connect(
+        cls, port: int, capabilities: Capabilities = Capabilities(0)
+    ) -> RawClient:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        client = cls(MysqlStream(reader, writer), cls.CAPABILITIES | capabilities)
+        await client.stream.read()  # handshake
+        await client.stream.write(
+            types.uint_4(client.capabilities)
+            + types.uint_4(2**24)
+            + types.uint_1(45)  # utf8mb4_general_ci
+            + bytes(23)
+            + types.str_null(b"levon_helm")
+            + types.str_len(b"")
+            + types.str_null(b"mysql_native_password")
+        )
+        ok = await client.stream.read()
+        assert ok[0] == 0x00, ok
+        return client
+
+    async def command(self, data: bytes) -> None:
+        self.stream.reset_seq()
+        await self.stream.write(data)
+
+    async def pipeline(self, *commands: bytes) -> None:
+        """Send commands in a single write, without waiting for their responses"""
+        for data in commands:
+            self.stream.reset_seq()
+            await self.stream.write(data, drain=False)
+        await self.stream.drain()
+
+    async def read_response(self) -> List[bytes]:
+        """Read the response to the next of several pipelined commands"""
+        self.stream.reset_seq()
+        next(self.stream.seq)  # responses start at sequence ID 1
+        return await self.read_result()
+
+    async def read_result(self) -> List[bytes]:
+        """Read the packets of a response to a command, up to its final OK or ERR packet"""
+        result = [await self.stream.read()]
+        if result[0][0] == 0xFF or (
+            result[0][0] == 0x00 and not self._is_column_count(result[0])
+        ):
+            return result
+        while True:
+            packet = await self.stream.read()
+            result.append(packet)
+            if packet[0] in (0xFE, 0xFF) and len(packet) < 0xFFFFFF:
+                return result
+
+    def _is_column_count(self, packet: bytes) -> bool:
+        # With CLIENT_OPTIONAL_RESULTSET_METADATA, column counts can start with 0x00,
+        # but they're shorter than OK packets
+        return (
+            Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA in self.capabilities
+            and len(packet) < 7
+        )
+
+    async def query(self, sql: str) -> List[bytes]:
+        await self.command(types.uint_1(types.Commands.COM_QUERY) + sql.encode())
+        return await self.read_result()
+
+    async def prepare(self, sql: str) -> Tuple[int, List[bytes]]:
+        """Prepare a statement, returning its ID and the response packets"""
+        await self.command(types.uint_1(types.Commands.COM_STMT_PREPARE) + sql.encode())
+        ok = await self.stream.read()
+        assert ok[0] == 0x00, ok
+        result = [ok]
+        r = io.BytesIO(ok[1:])
+        stmt_id = types.read_uint_4(r)
+        num_columns = types.read_uint_2(r)
+        num_params = types.read_uint_2(r)
+        types.read_uint_1(r)  # filler
+        types.read_uint_2(r)  # warnings
+        metadata = (
+            types.read_uint_1(r)
+            if Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA in self.capabilities
+            else types.ResultsetMetadata.RESULTSET_METADATA_FULL
+        )
+        if metadata == types.ResultsetMetadata.RESULTSET_METADATA_FULL:
+            for count in (num_params, num_columns):
+                if count:
+                    # Definitions are always followed by an EOF packet
+                    for _ in range(count + 1):
+                        result.append(await self.stream.read())
+        return stmt_id, result
+
+    async def execute(self, stmt_id: int) -> List[bytes]:
+        """Execute a prepared statement without parameters"""
+        await self.command(
+            types.uint_1(types.Commands.COM_STMT_EXECUTE)
+            + types.uint_4(stmt_id)
+            + types.uint_1(0)  # flags
+            + types.uint_4(1)  # iteration count
+        )
+        return await self.read_result()
+
+    def close(self) -> None:
+        self.stream.writer.close()
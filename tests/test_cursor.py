@@ -0,0 +1,217 @@
+import asyncio
+from contextlib import closing
+from typing import Any, List, Sequence, Tuple
+
+import pytest
+from mysql.connector import DatabaseError
+
+from mysql_mimic import MysqlServer, ResultColumn
+from mysql_mimic.cursor import Cursor, PagedRows
+from mysql_mimic.errors import ErrorCode
+from mysql_mimic.types import ColumnType, ServerStatus
+from tests.conftest import ConnectFixture, MockSession, query, to_thread
+
+COLUMNS = [ResultColumn("a", ColumnType.LONGLONG)]
+
+
+class MockPagedRows(PagedRows):
+    def __init__(self, count: int):
+        super().__init__()
+        self.count = count
+        self.pos = 0
+        self.pages: List[int] = []
+        self.closed = False
+
+    async def fetch(self, num_rows: int) -> Sequence[Sequence[Any]]:
+        self.pages.append(num_rows)
+        end = min(self.pos + num_rows, self.count)
+        rows = [(i,) for i in range(self.pos, end)]
+        self.pos = end
+        return rows
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def gen_rows(count: int) -> Any:
+    for i in range(count):
+        yield (i,)
+
+
+async def fetch_all(cursor: Cursor, num_rows: int) -> List[Sequence[Any]]:
+    rows: List[Sequence[Any]] = []
+    while not cursor.done:
+        rows.extend(await cursor.fetch(num_rows))
+    return rows
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [False, True])
+@pytest.mark.parametrize("count", [0, 9, 10, 25])
+async def test_cursor(prefetch: bool, count: int) -> None:
+    expected = [(i,) for i in range(count)]
+    for rows in [expected, gen_rows(count), MockPagedRows(count)]:
+        cursor = Cursor(rows, COLUMNS, prefetch=prefetch)
+        assert await fetch_all(cursor, 10) == expected
+
+
+@pytest.mark.asyncio
+async def test_cursor_prefetch() -> None:
+    rows = MockPagedRows(25)
+    cursor = Cursor(rows, COLUMNS, prefetch=True)
+    assert len(await cursor.fetch(10)) == 10
+    await asyncio.sleep(0)
+    # The next window is read while the client processes this one
+    assert rows.pos == 20
+    assert len(await cursor.fetch(10)) == 10
+    assert len(await cursor.fetch(10)) == 5
+    assert cursor.done
+    assert rows.pages == [10, 10, 10]
+    assert rows.closed
+
+
+@pytest.mark.asyncio
+async def test_cursor_window_size_changes() -> None:
+    cursor = Cursor(gen_rows(25), COLUMNS)
+    assert await cursor.fetch(10) == [(i,) for i in range(10)]
+    await asyncio.sleep(0)
+    assert await cursor.fetch(3) == [(i,) for i in range(10, 13)]
+    assert await cursor.fetch(20) == [(i,) for i in range(13, 25)]
+    assert cursor.done
+
+
+@pytest.mark.asyncio
+async def test_cursor_close() -> None:
+    rows = MockPagedRows(100)
+    cursor = Cursor(rows, COLUMNS)
+    await cursor.fetch(10)
+    await cursor.close()
+    assert rows.closed
+    assert cursor.done
+
+
+async def blocked_rows(count: int, blocker: asyncio.Event) -> Any:
+    """Yield `count` rows, then wait for `blocker`"""
+    for i in range(count):
+        yield (i,)
+    await blocker.wait()
+    yield (count,)
+
+
+@pytest.mark.asyncio
+async def test_cursor_close_cancels_prefetch() -> None:
+    cursor = Cursor(blocked_rows(10, asyncio.Event()), COLUMNS, prefetch=True)
+    await cursor.fetch(10)
+    task = cursor._next
+    assert task is not None
+    await asyncio.sleep(0)
+    assert not task.done()
+
+    await cursor.close()
+    assert task.cancelled()
+    assert cursor.done
+
+
+def open_cursor(conn: Any, sql: str, num_rows: int) -> Tuple[int, List[Any]]:
+    """Execute a prepared statement with a read-only cursor and fetch the first window"""
+    stmt = conn.cmd_stmt_prepare(sql.encode())
+    _, columns, _ = conn.cmd_stmt_execute(stmt["statement_id"], flags=1)
+    conn.cmd_stmt_fetch(stmt["statement_id"], num_rows)
+    rows, _ = conn.get_rows(binary=True, columns=columns)
+    return stmt["statement_id"], rows
+
+
+@pytest.mark.asyncio
+async def test_kill_query_cancels_prefetch(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    session.return_value = (
+        blocked_rows(10, asyncio.Event()),
+        [ResultColumn("a", ColumnType.LONGLONG)],
+    )
+    with closing(await connect()) as conn1:
+        connection = session.connection
+        connection.cursor_prefetch = True
+        stmt_id, rows = await to_thread(open_cursor, conn1, "SELECT a FROM x", 10)
+        assert len(rows) == 10
+
+        # The next window is being read in the background
+        cursor = connection.prepared_stmts[stmt_id].cursor
+        assert cursor is not None and cursor._next is not None
+        task = cursor._next
+
+        with closing(await connect()) as conn2:
+            await query(conn2, f"KILL QUERY {connection.connection_id}")
+        await asyncio.sleep(0)
+        assert task.cancelled()
+
+        with pytest.raises(DatabaseError) as ctx:
+            await to_thread(conn1.cmd_stmt_fetch, stmt_id, 10)  # type: ignore
+            await to_thread(conn1.get_rows, binary=True)
+        assert ctx.value.errno == ErrorCode.SESSION_WAS_KILLED
+        assert connection.prepared_stmts[stmt_id].cursor is None
+
+        # The connection is still usable
+        session.return_value = ([(1,)], ["a"])
+        assert await query(conn1, "SELECT a FROM x") == [{"a": 1}]
+
+
+@pytest.mark.asyncio
+async def test_paged_rows_without_cursor(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    rows = MockPagedRows(2500)
+    # Column types are inferred from the first page
+    session.return_value = (rows, ["a"])
+    with closing(await connect(user="levon_helm")) as conn:
+        cursor = await to_thread(conn.cursor)
+        await to_thread(cursor.execute, "SELECT a FROM x")
+        assert await to_thread(cursor.fetchall) == [(i,) for i in range(2500)]
+    assert rows.pages == [1000, 1000, 1000]
+    assert rows.closed
+
+
+def execute_with_cursor(
+    conn: Any, sql: str, num_rows: int
+) -> Tuple[List[List[Any]], int]:
+    """Execute a prepared statement with a read-only cursor, returning windows of rows"""
+    stmt = conn.cmd_stmt_prepare(sql.encode())
+    _, columns, eof = conn.cmd_stmt_execute(stmt["statement_id"], flags=1)
+    assert eof["status_flag"] & ServerStatus.SERVER_STATUS_CURSOR_EXISTS
+    windows = []
+    while True:
+        conn.cmd_stmt_fetch(stmt["statement_id"], num_rows)
+        rows, eof = conn.get_rows(binary=True, columns=columns)
+        windows.append([tuple(r) for r in rows])
+        if eof["status_flag"] & ServerStatus.SERVER_STATUS_LAST_ROW_SENT:
+            break
+    conn.cmd_stmt_close(stmt["statement_id"])
+    return windows, len(columns)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("paged", [False, True])
+async def test_stmt_fetch(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture, paged: bool
+) -> None:
+    paged_rows = MockPagedRows(25)
+    session.return_value = (
+        paged_rows if paged else gen_rows(25),
+        [ResultColumn("a", ColumnType.LONGLONG)],
+    )
+    with closing(await connect(user="levon_helm")) as conn:
+        windows, _ = await to_thread(execute_with_cursor, conn, "SELECT a FROM x", 10)
+        # The connection is still usable
+        session.return_value = ([(1,)], ["a"])
+        cursor = await to_thread(conn.cursor)
+        await to_thread(cursor.execute, "SELECT a FROM x")
+        assert await to_thread(cursor.fetchall) == [(1,)]
+
+    assert windows == [
+        [(i,) for i in range(0, 10)],
+        [(i,) for i in range(10, 20)],
+        [(i,) for i in range(20, 25)],
+    ]
+    if paged:
+        assert paged_rows.pages == [10, 10, 10]
+        assert paged_rows.closed
@@ -0,0 +1,139 @@
+from contextlib import closing
+from typing import cast
+
+import pytest
+import sqlglot
+from sqlglot import expressions as exp
+
+from mysql_mimic import MysqlServer
+from mysql_mimic.digest import DigestSummary, digest, normalize
+from tests.conftest import ConnectFixture, MockSession, PreparedDictCursor, query
+
+
+def parse_one(sql: str) -> exp.Expression:
+    return cast(exp.Expression, sqlglot.parse_one(sql))
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT 1", "SELECT ?"),
+        (
+            "select a from t where b = 'x' and c > -1.5",
+            "SELECT a FROM t WHERE b = ? AND c > ?",
+        ),
+        ("SELECT a FROM t WHERE b IN (1, 2, 3)", "SELECT a FROM t WHERE b IN (...)"),
+        ("SELECT a FROM t WHERE b IN (1, c)", "SELECT a FROM t WHERE b IN (?, c)"),
+        (
+            "SELECT a FROM t WHERE b IS NULL LIMIT 10",
+            "SELECT a FROM t WHERE b IS NULL LIMIT ?",
+        ),
+        ("INSERT INTO t VALUES (1, 'a'), (2, 'b')", "INSERT INTO t VALUES (?, ?)"),
+        ("SELECT a FROM t WHERE b = ?", "SELECT a FROM t WHERE b = ?"),
+        ("SELECT -a FROM t", "SELECT -a FROM t"),
+    ],
+)
+def test_normalize(sql: str, expected: str) -> None:
+    expression = parse_one(sql)
+    before = expression.sql(dialect="mysql")
+    assert normalize(expression) == expected
+    # The expression isn't modified
+    assert expression.sql(dialect="mysql") == before
+
+
+def test_digest() -> None:
+    a = digest(parse_one("SELECT a FROM t WHERE b = 1"))
+    b = digest(parse_one("select a from t where b = 2"))
+    c = digest(parse_one("SELECT a FROM t WHERE c = 1"))
+    assert a == b
+    assert a.digest != c.digest
+    assert len(a.digest) == 64
+
+
+def test_digest_summary() -> None:
+    summary = DigestSummary(maxsize=2)
+    a = digest(parse_one("SELECT a FROM t WHERE b = 1"))
+    b = digest(parse_one("SELECT b FROM t"))
+    c = digest(parse_one("SELECT c FROM t"))
+    summary.record("db", a, latency=0.001, rows_sent=1, error=False)
+    summary.record("db", a, latency=0.003, rows_sent=2, error=True)
+    summary.record("db", b, latency=0.5, rows_sent=0, error=False)
+    # The table is full, so these are aggregated into one row
+    summary.record("db", c, latency=1, rows_sent=3, error=False)
+    summary.record("other", a, latency=1, rows_sent=3, error=False)
+
+    rows = {row[:3]: row[3:10] for row in summary.rows()}
+    assert rows == {
+        ("db", a.digest, "SELECT a FROM t WHERE b = ?"): (
+            2,
+            4_000_000_000,
+            1_000_000_000,
+            2_000_000_000,
+            3_000_000_000,
+            1,
+            3,
+        ),
+        ("db", b.digest, "SELECT b FROM t"): (
+            1,
+            500_000_000_000,
+            500_000_000_000,
+            500_000_000_000,
+            500_000_000_000,
+            0,
+            0,
+        ),
+        (None, None, None): (
+            2,
+            2_000_000_000_000,
+            1_000_000_000_000,
+            1_000_000_000_000,
+            1_000_000_000_000,
+            0,
+            6,
+        ),
+    }
+
+    summary.clear()
+    assert not summary.rows()
+
+
+@pytest.mark.asyncio
+async def test_performance_schema(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    server.digests = DigestSummary()
+    session.return_value = ([(1,), (2,)], ["a"])
+    with closing(await connect(user="levon_helm", database="db")) as conn:
+        await query(conn, "SELECT a FROM x WHERE b = 1")
+        await query(conn, "SELECT a FROM x WHERE b = 2")
+        await query(conn, "SELECT a FROM x WHERE b = %s", PreparedDictCursor, (3,))
+        session.return_value = object()
+        with pytest.raises(Exception):
+            await query(conn, "SELECT a FROM x WHERE b = 1 + 1")
+        session.return_value = None
+        result = await query(
+            conn,
+            """
+            SELECT schema_name, digest_text, count_star, sum_rows_sent, sum_errors
+            FROM performance_schema.events_statements_summary_by_digest
+            WHERE digest_text LIKE 'SELECT a FROM x%'
+            ORDER BY digest_text
+            """,
+        )
+
+    assert result == [
+        {
+            "schema_name": "db",
+            "digest_text": "SELECT a FROM x WHERE b = ?",
+            "count_star": 3,
+            "sum_rows_sent": 6,
+            "sum_errors": 0,
+        },
+        {
+            "schema_name": "db",
+            "digest_text": "SELECT a FROM x WHERE b = ? + ?",
+            "count_star": 1,
+            "sum_rows_sent": 0,
+            "sum_errors": 1,
+        },
+    ]
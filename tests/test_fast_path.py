@@ -0,0 +1,120 @@
+from typing import Any, Match
+
+import pytest
+
+from mysql_mimic import Session
+from mysql_mimic.errors import MysqlError
+from mysql_mimic.fast_path import FastPath, strip
+from mysql_mimic.results import AllowedResult, ensure_result_set
+from mysql_mimic.session import Query
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT 1", "SELECT 1"),
+        ("  /* ping */ SELECT 1 ;\n", "SELECT 1"),
+        ("-- a\n# b\n/* c */ROLLBACK;;", "ROLLBACK"),
+        ("/*!40101 SET NAMES utf8 */", "/*!40101 SET NAMES utf8 */"),
+        ("/*+ hint */ SELECT 1", "/*+ hint */ SELECT 1"),
+        ("/* unterminated SELECT 1", "/* unterminated SELECT 1"),
+    ],
+)
+def test_strip(sql: str, expected: str) -> None:
+    assert strip(sql) == expected
+
+
+async def run(session: Session, sql: str) -> Any:
+    try:
+        result = await ensure_result_set(await session.handle_query(sql, {}))
+    except (MysqlError, KeyError) as e:
+        return repr(e)
+    return (
+        list(result.rows),  # type: ignore
+        [(c.name, c.type) for c in result.columns],
+        session.variables.list(),
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT 1",
+        "/* ping */ select 0, 18446744073709551615;",
+        "SELECT @@session.transaction_isolation",
+        "SELECT @@SESSION.tx_isolation",
+        "SELECT @@version_comment LIMIT 1",
+        "SELECT @@version_comment LIMIT 0",
+        "SELECT @@global.max_allowed_packet, @@Autocommit",
+        "SELECT @@time_zone",
+        "SET autocommit=1",
+        "SET @@session.autocommit = OFF",
+        "SET SESSION autocommit = true",
+        "SET autocommit = on",
+        "SET autocommit = DEFAULT",
+        "SET sql_mode = 'ANSI'",
+        "SET sql_mode = NULL",
+        "SET version = 'x'",
+        "SET unknown = 1",
+        "SET NAMES utf8mb4",
+        "SET NAMES latin1 COLLATE latin1_bin",
+        "SET NAMES DEFAULT",
+        "SET NAMES bogus",
+        "ROLLBACK",
+        "commit",
+        "START TRANSACTION",
+    ],
+)
+async def test_fast_path_matches_slow_path(sql: str) -> None:
+    fast = Session()
+    slow = Session()
+    slow.fast_paths = []
+    assert await run(fast, sql) == await run(slow, sql)
+
+
+@pytest.mark.asyncio
+async def test_custom_fast_path() -> None:
+    session = Session()
+    calls = []
+
+    async def handler(m: Match[str]) -> AllowedResult:
+        calls.append(m.group(1))
+        if m.group(1) == "skip":
+            return None
+        return [(m.group(1),)], ["x"]
+
+    session.fast_paths.append(FastPath(r"SELECT\s+'(\w+)'\s+AS\s+x", handler))
+
+    assert await session.handle_query("select 'hot' as x", {}) == ([("hot",)], ["x"])
+    result = await ensure_result_set(
+        await session.handle_query("SELECT 'skip' AS x", {})
+    )
+    assert list(result.rows) == [("skip",)]  # type: ignore
+    assert calls == ["hot", "skip"]
+
+
+@pytest.mark.asyncio
+async def test_fast_paths_with_custom_middleware() -> None:
+    session = Session()
+    seen = []
+
+    async def middleware(q: Query) -> AllowedResult:
+        seen.append(q.expression.sql(dialect="mysql"))
+        return await q.next()
+
+    async def handler(m: Match[str]) -> AllowedResult:
+        return [("hot",)], ["x"]
+
+    session.middlewares.insert(0, middleware)
+    session.fast_paths.append(FastPath(r"SELECT\s+'hot'", handler))
+
+    # Built-in fast paths are skipped, so the middleware sees these statements
+    await session.handle_query("SET autocommit = 0", {})
+    await session.handle_query("ROLLBACK", {})
+    assert seen == ["SET autocommit = 0", "ROLLBACK"]
+    assert session.variables.get("autocommit") is False
+
+    # Registered fast paths are still used
+    assert await session.handle_query("SELECT 'hot'", {}) == ([("hot",)], ["x"])
+    assert len(seen) == 2
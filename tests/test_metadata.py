@@ -0,0 +1,144 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from mysql_mimic import MysqlServer
+from mysql_mimic.connection import _column_definitions
+from mysql_mimic.prepared import describe_plan
+from mysql_mimic import ResultColumn
+from mysql_mimic.types import Capabilities, ColumnType, ResultsetMetadata
+from tests.conftest import MockSession, RawClient
+
+
+@pytest.mark.asyncio
+async def test_optional_resultset_metadata(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    session.return_value = ([(1,), (2,)], ["a"])
+    client = await RawClient.connect(
+        port, Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA
+    )
+    try:
+        _column_definitions.cache_clear()
+        column_count, column, *rows, ok = await client.query("SELECT a FROM x")
+        assert column_count == bytes([ResultsetMetadata.RESULTSET_METADATA_FULL, 1])
+        assert b"\x01a" in column
+        assert rows == [b"\x011", b"\x012"]
+        assert ok[0] == 0xFE
+
+        # Column definitions are cached by the shape of the result set
+        await client.query("SELECT a FROM y")
+        assert _column_definitions.cache_info().hits == 1
+
+        (ok,) = await client.query("SET resultset_metadata = NONE")
+        assert ok[0] == 0x00
+        column_count, *rows, ok = await client.query("SELECT a FROM x")
+        assert column_count == bytes([ResultsetMetadata.RESULTSET_METADATA_NONE, 1])
+        assert rows == [b"\x011", b"\x012"]
+        assert ok[0] == 0xFE
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_resultset_metadata_requires_capability(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    session.return_value = ([(1,)], ["a"])
+    client = await RawClient.connect(port)
+    try:
+        await client.query("SET resultset_metadata = NONE")
+        column_count, column, row, _ = await client.query("SELECT a FROM x")
+        assert column_count == b"\x01"
+        assert b"\x01a" in column
+        assert row == b"\x011"
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_prepared_statement_metadata(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    session.return_value = ([(1,)], ["a"])
+    client = await RawClient.connect(
+        port, Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA
+    )
+    try:
+        stmt_id, (prepare_ok, *_) = await client.prepare("SELECT a FROM x")
+        assert prepare_ok[-1] == ResultsetMetadata.RESULTSET_METADATA_FULL
+
+        # Column definitions are only sent when they change
+        column_count, column, row, _ = await client.execute(stmt_id)
+        assert column_count == bytes([ResultsetMetadata.RESULTSET_METADATA_FULL, 1])
+        assert b"\x01a" in column
+        column_count, row, _ = await client.execute(stmt_id)
+        assert column_count == bytes([ResultsetMetadata.RESULTSET_METADATA_NONE, 1])
+        assert row == b"\x00\x00" + (1).to_bytes(8, "little")
+
+        session.return_value = ([(1,)], ["b"])
+        column_count, column, row, _ = await client.execute(stmt_id)
+        assert b"\x01b" in column
+
+        await client.query("SET resultset_metadata = NONE")
+        _, (prepare_ok,) = await client.prepare("SELECT a FROM x WHERE b = ?")
+        assert prepare_ok[-1] == ResultsetMetadata.RESULTSET_METADATA_NONE
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_prepared_statement_description(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    session.return_value = ([("1",)], [ResultColumn("b", ColumnType.STRING)])
+    client = await RawClient.connect(
+        port, Capabilities.CLIENT_OPTIONAL_RESULTSET_METADATA
+    )
+    try:
+        # Statements aren't described by default
+        _, (prepare_ok, param, _) = await client.prepare("SELECT b FROM x WHERE a = ?")
+        assert prepare_ok[5:9] == b"\x00\x00\x01\x00"
+        assert param[-6] == ColumnType.VARCHAR
+
+        session.describe_prepared_statements = True
+        _, (prepare_ok, param, _, column, _) = await client.prepare(
+            "SELECT b FROM x WHERE a = ?"
+        )
+        assert prepare_ok[5:9] == b"\x01\x00\x01\x00"  # columns, params
+        assert param[-6] == ColumnType.STRING
+        assert b"\x01b" in column and column[-6] == ColumnType.STRING
+
+        # The client already has the column definitions from the prepare response
+        stmt_id, _ = await client.prepare("SELECT b FROM x")
+        column_count, _, _ = await client.execute(stmt_id)
+        assert column_count == bytes([ResultsetMetadata.RESULTSET_METADATA_NONE, 1])
+
+        # Statements that can't be described report no columns
+        _, (prepare_ok,) = await client.prepare("SELECT b FROM unknown")
+        assert prepare_ok[5:7] == b"\x00\x00"
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_prepared_statement_description_large_schema(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    tables = {f"t{i}": {"a": "TEXT", "b": "TEXT"} for i in range(10000)}
+    schema = {"db": {**tables, "x": {"a": "TEXT", "b": "INT"}}}
+    session.describe_prepared_statements = True
+    client = await RawClient.connect(port)
+    try:
+        with patch.object(session, "schema", AsyncMock(return_value=schema)), patch(
+            "mysql_mimic.session.describe_plan", wraps=describe_plan
+        ) as describe:
+            _, (_, param, _, column, _) = await client.prepare(
+                "SELECT b FROM x WHERE a = ?"
+            )
+        assert param[-6] == ColumnType.STRING
+        assert column[-6] == ColumnType.LONG
+        # Only the referenced tables are described
+        assert describe.call_args.args[2] == {"db": {"x": schema["db"]["x"]}}
+    finally:
+        client.close()
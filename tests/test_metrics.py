@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import closing
+
+import pytest
+
+from mysql_mimic import MysqlServer
+from mysql_mimic.metrics import Registry, ServerMetrics, start_metrics_server
+from tests.conftest import ConnectFixture, MockSession, PreparedDictCursor, query
+
+
+def sample(metrics: ServerMetrics, line: str) -> float:
+    for sample_line in metrics.registry.render().splitlines():
+        name, _, value = sample_line.rpartition(" ")
+        if name == line:
+            return float(value)
+    raise AssertionError(f"No sample {line}")
+
+
+def test_registry_render() -> None:
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests", ["path"])
+    counter.labels('/a"b').inc()
+    counter.labels('/a"b').inc(2)
+    registry.gauge("open", "Open things").set(1.5)
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{path="/a\\"b"} 3\n'
+        "# HELP open Open things\n"
+        "# TYPE open gauge\n"
+        "open 1.5\n"
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 5.55\n"
+        "latency_seconds_count 3\n"
+    )
+
+    with pytest.raises(ValueError):
+        registry.counter("open", "Duplicate")
+    with pytest.raises(ValueError):
+        counter.labels()
+
+
+@pytest.mark.asyncio
+async def test_server_metrics(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    metrics = ServerMetrics()
+    server.metrics = metrics
+    session.return_value = ([(i, f"row{i}") for i in range(100)], ["a", "b"])
+
+    with closing(await connect(user="levon_helm")) as conn:
+        assert sample(metrics, "mysql_mimic_connections") == 1
+        await query(conn, "SELECT a, b FROM x")
+        await query(conn, "SELECT a, b FROM x", cursor_class=PreparedDictCursor)
+        with pytest.raises(Exception):
+            await query(conn, "SELECT * FROM")
+
+    # Wait for the server to notice the connection closed
+    for _ in range(100):
+        if sample(metrics, "mysql_mimic_connections") == 0:
+            break
+        await asyncio.sleep(0.01)
+
+    assert sample(metrics, "mysql_mimic_connections") == 0
+    assert sample(metrics, "mysql_mimic_connections_total") == 1
+    assert sample(metrics, "mysql_mimic_prepared_statements") == 0
+    assert sample(metrics, "mysql_mimic_rows_sent_total") == 200
+    assert (
+        sample(metrics, 'mysql_mimic_commands_total{command="COM_STMT_EXECUTE"}') == 1
+    )
+    assert sample(metrics, 'mysql_mimic_command_errors_total{command="COM_QUERY"}') == 1
+    assert sample(metrics, "mysql_mimic_sent_bytes_total") > 100 * 5
+    assert sample(metrics, "mysql_mimic_received_bytes_total") > 0
+    assert sample(metrics, "mysql_mimic_write_buffer_high_water_bytes") > 100 * 5
+    for stage in ["parse", "middleware", "query", "encode", "drain"]:
+        assert (
+            sample(
+                metrics, f'mysql_mimic_stage_duration_seconds_count{{stage="{stage}"}}'
+            )
+            > 0
+        )
+
+
+@pytest.mark.asyncio
+async def test_metrics_server() -> None:
+    metrics = ServerMetrics()
+    metrics.rows_sent.inc(3)
+    http = await start_metrics_server(metrics.registry, host="127.0.0.1", port=0)
+    port = http.sockets[0].getsockname()[1]
+    try:
+        for path, status in [("/metrics", b"200 OK"), ("/", b"404 Not Found")]:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            assert response.startswith(b"HTTP/1.1 " + status)
+            if status == b"200 OK":
+                assert b"\nmysql_mimic_rows_sent_total 3\n" in response
+    finally:
+        http.close()
+        await http.wait_closed()
@@ -0,0 +1,117 @@
+from contextlib import closing
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import pytest
+
+from mysql_mimic import MysqlServer, Session
+from mysql_mimic.digest import DigestSummary
+from mysql_mimic.results import AllowedResult
+from mysql_mimic.slow_log import SlowQuery, SlowQueryCallback
+from mysql_mimic.types import Capabilities, ServerStatus
+from tests.conftest import ConnectFixture, MockSession, RawClient, query, to_thread
+
+
+def status(packet: bytes) -> int:
+    # OK packet: header, affected rows, last insert ID, status flags
+    return int.from_bytes(packet[3:5], "little")
+
+
+@pytest.mark.asyncio
+async def test_multi_statements(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    session.return_value = ([(1,), (2,)], ["a"])
+    client = await RawClient.connect(port, Capabilities.CLIENT_MULTI_STATEMENTS)
+    try:
+        await client.command(
+            b"\x03SELECT a FROM x; SET autocommit = 0; SELECT a FROM y"
+        )
+        first = await client.read_result()
+        set_ok = await client.read_result()
+        last = await client.read_result()
+        assert first[2:4] == [b"\x011", b"\x012"]
+        assert status(first[-1]) & ServerStatus.SERVER_MORE_RESULTS_EXISTS
+        assert status(set_ok[-1]) & ServerStatus.SERVER_MORE_RESULTS_EXISTS
+        assert last[2:4] == [b"\x011", b"\x012"]
+        assert not status(last[-1]) & ServerStatus.SERVER_MORE_RESULTS_EXISTS
+
+        # A failed statement ends the response, and later statements don't run
+        await client.command(
+            b"\x03SELECT a FROM x; SET unknown = 1; SET autocommit = 1"
+        )
+        first = await client.read_result()
+        (error,) = await client.read_result()
+        assert status(first[-1]) & ServerStatus.SERVER_MORE_RESULTS_EXISTS
+        assert error[0] == 0xFF
+        _, _, row, _ = await client.query("SELECT @@autocommit AS a")
+        assert row == b"\x010"
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_multi_statements_mysql_connector(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    session.execute = True
+    with closing(await connect()) as conn:
+        cursor = await to_thread(conn.cursor)
+        await to_thread(cursor.execute, "SELECT 1 AS a; SELECT 2 AS b; SELECT 3")
+        results: List[Any] = [await to_thread(cursor.fetchall)]
+        while await to_thread(cursor.nextset):
+            results.append(await to_thread(cursor.fetchall))
+        await to_thread(cursor.close)
+
+    assert results == [[(1,)], [(2,)], [(3,)]]
+
+
+@pytest.mark.asyncio
+async def test_multi_statements_stats(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    server.digests = DigestSummary()
+    logged: List[SlowQuery] = []
+    server.slow_log = SlowQueryCallback(logged.append)
+    session.return_value = ([(1,), (2,)], ["a"])
+    client = await RawClient.connect(port, Capabilities.CLIENT_MULTI_STATEMENTS)
+    try:
+        await client.command(b"\x03SET long_query_time = 0")
+        await client.read_result()
+        await client.command(b"\x03SELECT a FROM x; SELECT a FROM y WHERE b = 1")
+        await client.read_result()
+        await client.read_result()
+    finally:
+        client.close()
+
+    # Each statement is recorded on its own
+    assert [q.sql for q in logged] == [
+        "SET long_query_time = 0",
+        "SELECT a FROM x",
+        "SELECT a FROM y WHERE b = 1",
+    ]
+    assert [q.rows_sent for q in logged] == [0, 2, 2]
+    assert sorted(row[2] for row in server.digests.rows()) == [
+        "SELECT a FROM x",
+        "SELECT a FROM y WHERE b = ?",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_multi_statements_handle_query_override(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    handled: List[str] = []
+
+    async def handle_query(
+        self: MockSession, sql: str, attrs: Dict[str, str]
+    ) -> AllowedResult:
+        handled.append(sql)
+        return await Session.handle_query(self, sql, attrs)
+
+    session.return_value = ([(1,)], ["a"])
+    with patch.object(MockSession, "handle_query", handle_query):
+        with closing(await connect()) as conn:
+            assert await query(conn, "SELECT a FROM x") == [{"a": 1}]
+    # mysql-connector sets CLIENT_MULTI_STATEMENTS, but the override still sees the query
+    assert "SELECT a FROM x" in handled
@@ -0,0 +1,38 @@
+from sqlglot import exp
+
+from mysql_mimic.parse_cache import ParseCache
+
+
+def test_parse_cache() -> None:
+    cache = ParseCache(maxsize=2)
+
+    first = cache.parse("mysql", "SELECT a FROM x")
+    assert [e.sql() for e in first] == ["SELECT a FROM x"]
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # Modifying returned expressions doesn't affect the cache
+    first[0].find(exp.Column).replace(exp.column("b"))  # type: ignore
+    second = cache.parse("mysql", "SELECT a FROM x")
+    assert [e.sql() for e in second] == ["SELECT a FROM x"]
+    assert second[0] is not first[0]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Dialect is part of the key
+    cache.parse("postgres", "SELECT a FROM x")
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Least recently used is evicted
+    cache.parse("mysql", "SELECT 1; SELECT 2")
+    assert len(cache) == 2
+    cache.parse("mysql", "SELECT a FROM x")
+    assert cache.info().misses == 4
+
+
+def test_parse_cache_limits() -> None:
+    cache = ParseCache(max_sql_length=10)
+    cache.parse("mysql", "SELECT 'a long statement'")
+    assert len(cache) == 0
+
+    cache = ParseCache(maxsize=0)
+    cache.parse("mysql", "SELECT 1")
+    assert len(cache) == 0
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, List
+from unittest.mock import patch
+
+import pytest
+
+from mysql_mimic import MysqlServer
+from mysql_mimic.types import Commands, str_len, str_null, uint_1, uint_2, uint_4
+from tests.conftest import MockSession, RawClient
+
+
+def com_query(sql: str) -> bytes:
+    return uint_1(Commands.COM_QUERY) + sql.encode()
+
+
+@pytest.mark.asyncio
+async def test_pipelined_commands(
+    session: MockSession, server: MysqlServer, port: int
+) -> None:
+    session.return_value = ([(1,), (2,)], ["a"])
+    writes: List[int] = []
+    write = asyncio.StreamWriter.write
+
+    def record_write(writer: asyncio.StreamWriter, data: Any) -> None:
+        if writer.get_extra_info("sockname")[1] == port:
+            writes.append(len(data))
+        write(writer, data)
+
+    client = await RawClient.connect(port)
+    try:
+        with patch.object(asyncio.StreamWriter, "write", record_write):
+            await client.pipeline(
+                com_query("SELECT a FROM x"),
+                uint_1(0xEE),  # unsupported command
+                uint_1(Commands.COM_STMT_CLOSE) + uint_4(1),  # no response
+                com_query("SELECT a FROM x"),
+                uint_1(Commands.COM_PING),
+            )
+            # Each response starts at sequence ID 1, and errors don't affect the others
+            result = await client.read_response()
+            error = await client.read_response()
+            same = await client.read_response()
+            ping = await client.read_response()
+        assert result == same
+        assert result[-2] == b"\x012"
+        assert error[0][0] == 0xFF
+        assert ping[0][0] == 0x00
+        # The responses were written together
+        assert len(writes) == 1
+
+        # Commands that aren't pipelined are answered right away
+        writes.clear()
+        with patch.object(asyncio.StreamWriter, "write", record_write):
+            await client.query("SELECT a FROM x")
+            await client.query("SELECT a FROM x")
+        assert len(writes) == 2
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_pipelined_change_user(server: MysqlServer, port: int) -> None:
+    client = await RawClient.connect(port)
+    try:
+        await client.pipeline(
+            uint_1(Commands.COM_STMT_CLOSE) + uint_4(1),  # no response
+            uint_1(Commands.COM_CHANGE_USER)
+            + str_null(b"robbie_robertson")
+            + str_len(b"")  # auth response
+            + str_null(b"")  # database
+            + uint_2(45)  # utf8mb4_general_ci
+            + str_null(b"caching_sha2_password"),
+        )
+        # The server switches to mysql_native_password and waits for the client
+        client.stream.reset_seq()
+        next(client.stream.seq)
+        switch = await asyncio.wait_for(client.stream.read(), timeout=3)
+        assert switch[0] == 0xFE
+        await client.stream.write(b"")
+        ok = await asyncio.wait_for(client.stream.read(), timeout=3)
+        assert ok[0] == 0x00
+    finally:
+        client.close()
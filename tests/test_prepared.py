@@ -0,0 +1,105 @@
+from typing import Any, List, Optional, Tuple
+
+import pytest
+from sqlglot import Dialect
+
+from mysql_mimic.prepared import PreparedStatement, describe_plan, make_plan
+from mysql_mimic.types import ColumnType
+
+mysql = Dialect.get_or_raise("mysql")
+
+
+@pytest.mark.parametrize(
+    "sql, params, expected",
+    [
+        ("SELECT ?", [1], ["SELECT 1"]),
+        ("SELECT ?, ?", ["it's", None], ["SELECT 'it''s', NULL"]),
+        ("SELECT ? AS a, ? b", [-1, 1.5], ["SELECT -1 AS a, 1.5 AS b"]),
+        ("SELECT * FROM x LIMIT ?, ?", [1, 2], ["SELECT * FROM x LIMIT 2 OFFSET 1"]),
+        (
+            "WITH c AS (SELECT ?) SELECT ? FROM c GROUP BY ? ORDER BY ? LIMIT ?",
+            [1, 2, 3, 4, 5],
+            ["WITH c AS (SELECT 1) SELECT 2 FROM c GROUP BY 3 ORDER BY 4 LIMIT 5"],
+        ),
+        ("SELECT '?', ?", [True], ["SELECT '?', TRUE"]),
+        ("SELECT ? /* comment */", [1], ["SELECT 1 /* comment */"]),
+        ("SELECT :a", [], None),
+        ("SELECT (", [], None),
+    ],
+)
+def test_make_plan(sql: str, params: List[Any], expected: Optional[List[str]]) -> None:
+    plan = make_plan(mysql, sql)
+    if expected is None:
+        assert plan is None
+        return
+    assert plan is not None
+    assert [e.sql(dialect=mysql) for e in plan.bind(params)] == expected
+    # Binding doesn't modify the plan
+    assert [e.sql(dialect=mysql) for e in plan.bind(params)] == expected
+
+
+@pytest.mark.parametrize(
+    "sql, params, expected",
+    [
+        ("SELECT ?, '?', ?", ["a", None], "SELECT 'a', '?', NULL"),
+        ("SELECT ?", [], "SELECT ?"),
+        ("SELECT 1", [], "SELECT 1"),
+    ],
+)
+def test_interpolate(sql: str, params: List[Any], expected: str) -> None:
+    stmt = PreparedStatement.create(stmt_id=1, sql=sql)
+    assert stmt.interpolate(params) == expected
+
+
+def test_create_drops_mismatched_plan() -> None:
+    # The regex doesn't know about comments
+    sql = "SELECT ? /* ? */"
+    stmt = PreparedStatement.create(stmt_id=1, sql=sql, plan=make_plan(mysql, sql))
+    assert stmt.num_params == 2
+    assert stmt.plan is None
+
+
+SCHEMA = {"db": {"x": {"a": "INT", "b": "TEXT", "c": "DATETIME"}}}
+
+
+@pytest.mark.parametrize(
+    "sql, params, columns",
+    [
+        (
+            "SELECT * FROM x WHERE b = ? AND a IN (?, ?) LIMIT ?",
+            [ColumnType.STRING, ColumnType.LONG, ColumnType.LONG, ColumnType.LONGLONG],
+            [
+                ("a", ColumnType.LONG),
+                ("b", ColumnType.STRING),
+                ("c", ColumnType.DATETIME),
+            ],
+        ),
+        (
+            "SELECT a + 1, COUNT(*) AS n FROM x WHERE ? < c",
+            [ColumnType.DATETIME],
+            [("a + 1", ColumnType.LONG), ("n", ColumnType.LONGLONG)],
+        ),
+        (
+            "INSERT INTO x (c, a) VALUES (?, ?)",
+            [ColumnType.DATETIME, ColumnType.LONG],
+            [],
+        ),
+        ("UPDATE x SET b = ? WHERE a = ?", [ColumnType.STRING, ColumnType.LONG], []),
+        ("SELECT ?, a FROM x", [ColumnType.STRING], []),
+    ],
+)
+def test_describe_plan(
+    sql: str, params: List[ColumnType], columns: List[Tuple[str, ColumnType]]
+) -> None:
+    plan = make_plan(mysql, sql)
+    assert plan is not None
+    description = describe_plan(plan, mysql, SCHEMA, "db")
+    assert description is not None
+    assert [p.type for p in description.params] == params
+    assert [(c.name, c.type) for c in description.columns] == columns
+
+
+def test_describe_plan_unknown_table() -> None:
+    plan = make_plan(mysql, "SELECT a FROM y WHERE a = ?")
+    assert plan is not None
+    assert describe_plan(plan, mysql, SCHEMA, "db") is None
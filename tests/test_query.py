@@ -1,23 +1,34 @@
 import asyncio
 import io
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import closing
 from datetime import date, datetime, timedelta
 from typing import Any, Callable, Awaitable, Sequence, Dict, List, Tuple, Type
+from unittest.mock import patch
 
 import pytest
 import pytest_asyncio
 from mysql.connector.abstracts import MySQLConnectionAbstract
 from mysql.connector.cursor import MySQLCursorDict, MySQLCursor
 from sqlalchemy import text
+from sqlglot import Dialect
+from sqlglot.tokens import TokenType
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
 import aiomysql
 from freezegun import freeze_time
 
-from mysql_mimic import ResultColumn, ResultSet, MysqlServer, context
+from mysql_mimic import (
+    ColumnarResultSet,
+    ResultColumn,
+    ResultSet,
+    MysqlServer,
+    Session,
+    context,
+)
 from mysql_mimic.charset import CharacterSet
 from mysql_mimic.results import AllowedResult
 from mysql_mimic.constants import INFO_SCHEMA
-from mysql_mimic.types import ColumnType
+from mysql_mimic.types import ColumnType, Capabilities
 from tests.conftest import PreparedDictCursor, query, MockSession, ConnectFixture
 from tests.fixtures import queries
 
@@ -54,7 +65,11 @@ async def query_fixture(
         async def q3(sql: str) -> Sequence[Dict[str, Any]]:
             async with aiomysql_conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(sql)
-                return await cur.fetchall()
+                result = await cur.fetchall()
+                # Multiple statements return the result of the last one
+                while await cur.nextset():
+                    result = await cur.fetchall()
+                return result
 
         return q3
 
@@ -62,7 +77,9 @@ async def query_fixture(
 
         async def q4(sql: str) -> Sequence[Dict[str, Any]]:
             async with sqlalchemy_engine.connect() as conn:
-                cursor = await conn.execute(text(sql))
+                # SQLAlchemy only reads the first result of multiple statements
+                for statement in split_statements(sql):
+                    cursor = await conn.execute(text(statement))
                 if cursor.returns_rows:
                     return cursor.mappings().all()  # type: ignore
                 return []
@@ -72,6 +89,17 @@ async def query_fixture(
     raise RuntimeError("Unexpected fixture param")
 
 
+def split_statements(sql: str) -> List[str]:
+    statements = []
+    start = 0
+    for token in Dialect.get_or_raise("mysql").tokenize(sql):
+        if token.token_type == TokenType.SEMICOLON:
+            statements.append(sql[start : token.start])
+            start = token.end + 1
+    statements.append(sql[start:])
+    return [s for s in statements if s.strip()]
+
+
 # Uncomment to make tests only use mysql-connector, which can help during debugging
 # @pytest_asyncio.fixture
 # async def query_fixture(
@@ -162,6 +190,41 @@ async def test_query(
     assert expected == result
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("source", ["dict", "arrow"])
+async def test_query_columnar(
+    session: MockSession,
+    query_fixture: QueryFixture,
+    source: str,
+) -> None:
+    data = {
+        "a": [1, None, 3],
+        "b": ["x", "♥", None],
+        "c": [True, False, None],
+        "d": [1.5, None, -2.0],
+    }
+    if source == "arrow":
+        pa = pytest.importorskip("pyarrow")
+        session.return_value = ColumnarResultSet.from_arrow(
+            pa.RecordBatchReader.from_batches(
+                pa.schema([(k, pa.array(v).type) for k, v in data.items()]),
+                [pa.record_batch(data), pa.record_batch(data)],
+            )
+        )
+    else:
+        session.return_value = ColumnarResultSet(
+            batches=[list(data.values()), list(data.values())],
+            columns=ColumnarResultSet.from_dict(data).columns,
+        )
+    result = await query_fixture("SELECT * FROM x")
+    expected = [
+        {"a": 1, "b": "x", "c": True, "d": 1.5},
+        {"a": None, "b": "♥", "c": False, "d": None},
+        {"a": 3, "b": None, "c": None, "d": -2.0},
+    ]
+    assert result == expected * 2
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "sql, params, expected",
@@ -217,6 +280,61 @@ async def test_prepared_stmt(
     assert expected == result[0]["sql"]
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sql, params, expected",
+    [
+        ("SELECT ? AS a", ("it's",), [{"a": "it's"}]),
+        ("SELECT ? + 1 AS a", (1,), [{"a": 2}]),
+        (
+            "SELECT a FROM (SELECT 1 AS a UNION ALL SELECT 2 UNION ALL SELECT 3) AS t LIMIT ?, ?",
+            (1, 1),
+            [{"a": 2}],
+        ),
+    ],
+)
+async def test_prepared_stmt_plan(
+    session: MockSession,
+    mysql_connector_conn: MySQLConnectionAbstract,
+    sql: str,
+    params: Tuple[Any],
+    expected: List[Dict[str, Any]],
+) -> None:
+    session.execute = True
+    result = await query(
+        conn=mysql_connector_conn,
+        sql=sql,
+        cursor_class=PreparedDictCursor,
+        params=params,
+    )
+    assert result == expected
+
+
+@pytest.mark.asyncio
+async def test_prepared_stmt_handle_query_override(
+    session: MockSession,
+    mysql_connector_conn: MySQLConnectionAbstract,
+) -> None:
+    handled: List[str] = []
+
+    async def handle_query(
+        self: MockSession, sql: str, attrs: Dict[str, str]
+    ) -> AllowedResult:
+        handled.append(sql)
+        return await Session.handle_query(self, sql, attrs)
+
+    session.execute = True
+    with patch.object(MockSession, "handle_query", handle_query):
+        result = await query(
+            conn=mysql_connector_conn,
+            sql="SELECT ? AS a",
+            cursor_class=PreparedDictCursor,
+            params=(1,),
+        )
+    assert result == [{"a": 1}]
+    assert "SELECT 1 AS a" in handled
+
+
 @pytest.mark.asyncio
 async def test_prepared_stmt_null_bitmap_across_bytes(
     session: MockSession,
@@ -286,6 +404,89 @@ async def test_replace_function(
         assert result[0]["CURRENT_SCHEMA()"] == "db"
 
 
+@pytest.mark.asyncio
+async def test_parse_cache(
+    session: MockSession,
+    server: MysqlServer,
+    mysql_connector_conn: MySQLConnectionAbstract,
+) -> None:
+    server.parse_cache.clear()
+    session.fast_paths = []
+    for sql_mode in ["TRADITIONAL", "ANSI", "TRADITIONAL"]:
+        await query(mysql_connector_conn, f"SET sql_mode = '{sql_mode}'")
+        # Variable replacement must not leak into the cache
+        result = await query(mysql_connector_conn, "SELECT @@sql_mode AS x")
+        assert result == [{"x": sql_mode}]
+    assert server.parse_cache.hits == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor_class", [MySQLCursorDict, PreparedDictCursor])
+async def test_compression(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    cursor_class: Type[MySQLCursor],
+) -> None:
+    rows = [(i, f"user_{i}" * 10) for i in range(1000)]
+    session.return_value = (rows, ["a", "b"])
+
+    with closing(await connect(user="levon_helm", compress=True)) as conn:
+        assert Capabilities.CLIENT_COMPRESS in session.connection.capabilities
+        result = await query(conn, "SELECT a, b FROM x", cursor_class=cursor_class)
+        assert result == [{"a": a, "b": b} for a, b in rows]
+        assert await query(conn, "SELECT 1") == [{"1": 1}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor_class", [MySQLCursorDict, PreparedDictCursor])
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+@pytest.mark.parametrize("generate", [False, True])
+async def test_encode_executor(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    cursor_class: Type[MySQLCursor],
+    executor_class: Callable[..., Executor],
+    generate: bool,
+) -> None:
+    # More than 256 rows per batch, so sequence IDs wrap around
+    rows = [(i, f"user_{i}", None) for i in range(3500)]
+
+    async def generate_rows() -> Any:
+        for row in rows:
+            yield row
+
+    session.return_value = (generate_rows() if generate else rows, ["a", "b", "c"])
+
+    with executor_class(max_workers=2) as executor:
+        server.encode_executor = executor
+        with closing(await connect(user="levon_helm")) as conn:
+            session.connection.encode_offload_threshold = 0
+            result = await query(
+                conn, "SELECT a, b, c FROM x", cursor_class=cursor_class
+            )
+            assert result == [{"a": a, "b": b, "c": c} for a, b, c in rows]
+            assert await query(conn, "SELECT 1") == [{"1": 1}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor_class", [MySQLCursorDict, PreparedDictCursor])
+async def test_bounded_write_buffer(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    cursor_class: Type[MySQLCursor],
+) -> None:
+    rows = [(i, f"user_{i}" * 10) for i in range(2000)]
+    session.return_value = (rows, ["a", "b"])
+
+    with closing(await connect(user="levon_helm")) as conn:
+        session.connection.stream.max_buffer_size = 1024
+        result = await query(conn, "SELECT a, b FROM x", cursor_class=cursor_class)
+        assert result == [{"a": a, "b": b} for a, b in rows]
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize("cursor_class", [MySQLCursorDict, PreparedDictCursor])
 async def test_query_attributes(
@@ -554,7 +755,12 @@ async def test_describe_select(
                     "default_collation_name": "utf8mb4_general_ci",
                     "sql_path": None,
                 }
-                for schema_name in ["db", "information_schema", "mysql"]
+                for schema_name in [
+                    "db",
+                    "information_schema",
+                    "mysql",
+                    "performance_schema",
+                ]
             ],
         ),
         (
@@ -599,6 +805,10 @@ async def test_describe_select(
                             ("mysql", name, "SYSTEM TABLE")
                             for name in INFO_SCHEMA["mysql"]
                         ],
+                        *[
+                            ("performance_schema", name, "SYSTEM TABLE")
+                            for name in INFO_SCHEMA["performance_schema"]
+                        ],
                     ]
                 )
             ],
@@ -642,7 +852,12 @@ async def test_describe_select(
                     "_col_2": None,
                     "schema_name": schema_name,
                 }
-                for schema_name in ["db", "information_schema", "mysql"]
+                for schema_name in [
+                    "db",
+                    "information_schema",
+                    "mysql",
+                    "performance_schema",
+                ]
             ],
         ),
         (
@@ -697,12 +912,15 @@ async def test_describe_select(
                 {"Value": "", "Variable_name": "init_connect"},
                 {"Value": "28800", "Variable_name": "interactive_timeout"},
                 {"Value": "MIT", "Variable_name": "license"},
+                {"Value": "1", "Variable_name": "log_slow_rate_limit"},
+                {"Value": "10.0", "Variable_name": "long_query_time"},
                 {"Value": "0", "Variable_name": "lower_case_table_names"},
                 {"Value": "67108864", "Variable_name": "max_allowed_packet"},
                 {"Value": "0", "Variable_name": "max_execution_time"},
                 {"Value": "16384", "Variable_name": "net_buffer_length"},
                 {"Value": "28800", "Variable_name": "net_write_timeout"},
                 {"Value": "False", "Variable_name": "performance_schema"},
+                {"Value": "FULL", "Variable_name": "resultset_metadata"},
                 {"Value": "False", "Variable_name": "sql_auto_is_null"},
                 {"Value": "ANSI", "Variable_name": "sql_mode"},
                 {"Value": None, "Variable_name": "sql_select_limit"},
@@ -868,6 +1086,10 @@ async def test_commands(
             "SET GLOBAL sql_mode = 'TRADITIONAL'",
             "Cannot SET variable sql_mode with scope GLOBAL",
         ),
+        (
+            "SET PERSIST sql_mode = 'TRADITIONAL'",
+            "Cannot SET variable sql_mode with scope PERSIST",
+        ),
         ("SET @foo = 'bar'", "User-defined variables not supported yet"),
         ("KILL 'abc'", "Invalid KILL connection ID"),
         (
@@ -875,6 +1097,15 @@ async def test_commands(
             "SET init_connect='abc' in xyz",
             "Complex expressions in variables not supported yet",
         ),
+        ("SET autocommit = foo", "Complex expressions in variables not supported yet"),
+        (
+            "SET sql_mode = some_column",
+            "Complex expressions in variables not supported yet",
+        ),
+        (
+            "SET resultset_metadata = bogus",
+            "Variable 'resultset_metadata' can't be set to the value of 'bogus'",
+        ),
     ],
 )
 async def test_unsupported_commands(
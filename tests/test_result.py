@@ -1,4 +1,5 @@
 import io
+from datetime import date, datetime
 from typing import Any
 
 import pytest
@@ -7,8 +8,15 @@ from mysql_mimic import ColumnType
 from mysql_mimic.charset import CharacterSet
 from mysql_mimic.errors import MysqlError
 from mysql_mimic.packets import _read_params, make_binary_resultrow
-from mysql_mimic.results import NullBitmap, ResultColumn, ensure_result_set
+from mysql_mimic.results import (
+    ColumnarResultSet,
+    NullBitmap,
+    ResultColumn,
+    ensure_result_set,
+    text_encode_column,
+)
 from mysql_mimic.types import Capabilities, str_len, uint_1
+from mysql_mimic.utils import aiterate
 
 
 async def gen_rows() -> Any:
@@ -45,6 +53,113 @@ async def test_ensure_result_set__invalid(result: Any) -> None:
         await ensure_result_set(result)
 
 
+@pytest.mark.asyncio
+async def test_columnar_result_set_from_dict() -> None:
+    np = pytest.importorskip("numpy")
+    result_set = ColumnarResultSet.from_dict(
+        {
+            "a": [None, 1],
+            "b": np.array([1.5, 2.5]),
+            "c": np.array([True, False]),
+            "d": np.array(
+                ["2021-01-01T01:01:01", "2022-02-02T02:02:02"], dtype="datetime64[ns]"
+            ),
+            "e": [None, None],
+        }
+    )
+    assert [c.type for c in result_set.columns] == [
+        ColumnType.LONGLONG,
+        ColumnType.DOUBLE,
+        ColumnType.TINY,
+        ColumnType.DATETIME,
+        ColumnType.NULL,
+    ]
+    assert [row async for row in aiterate(result_set.rows)] == [
+        (None, 1.5, True, datetime(2021, 1, 1, 1, 1, 1), None),
+        (1, 2.5, False, datetime(2022, 2, 2, 2, 2, 2), None),
+    ]
+
+    with pytest.raises(ValueError):
+        ColumnarResultSet.from_dict({"a": [1, 2], "b": [1]})
+
+
+@pytest.mark.asyncio
+async def test_columnar_result_set_from_arrow() -> None:
+    pa = pytest.importorskip("pyarrow")
+    batch = pa.record_batch(
+        {
+            "a": pa.array([1, None], pa.int32()),
+            "b": pa.array(["x", None], pa.large_string()),
+            "c": pa.array([b"y", b"z"]),
+            "d": pa.array([date(2021, 1, 1), None]),
+            "e": pa.array([True, None]),
+        }
+    )
+    result_set = ColumnarResultSet.from_arrow(iter([batch, batch]))
+    assert [c.type for c in result_set.columns] == [
+        ColumnType.LONGLONG,
+        ColumnType.STRING,
+        ColumnType.BLOB,
+        ColumnType.DATE,
+        ColumnType.TINY,
+    ]
+    assert [row async for row in aiterate(result_set.rows)] == [
+        (1, "x", b"y", date(2021, 1, 1), True),
+        (None, None, b"z", None, None),
+    ] * 2
+
+
+def encode_double(col: Any, val: Any) -> bytes:
+    return b"%.2f" % val
+
+
+@pytest.mark.parametrize(
+    "values, column, expected",
+    [
+        ([1, None, 2.5], ResultColumn("a", ColumnType.DOUBLE), [b"1", None, b"2.5"]),
+        ([True, 0, None], ResultColumn("a", ColumnType.TINY), [b"1", b"0", None]),
+        (["♥", None], ResultColumn("a", ColumnType.STRING), ["♥".encode(), None]),
+        ([b"x", "y", 1], ResultColumn("a", ColumnType.STRING), [b"x", b"y", b"1"]),
+        (
+            ["é"],
+            ResultColumn("a", ColumnType.STRING, character_set=CharacterSet.latin1),
+            [b"\xe9"],
+        ),
+        (
+            [1.0, None],
+            ResultColumn("a", ColumnType.DOUBLE, text_encoder=encode_double),
+            [b"1.00", None],
+        ),
+        ([None, None], ResultColumn("a", ColumnType.NULL), [None, None]),
+        ([], ResultColumn("a", ColumnType.LONGLONG), []),
+    ],
+)
+def test_text_encode_column(values: Any, column: ResultColumn, expected: Any) -> None:
+    assert text_encode_column(values, column) == expected
+
+
+def test_text_encode_column_arrow() -> None:
+    pa = pytest.importorskip("pyarrow")
+    col = ResultColumn("a", ColumnType.LONGLONG)
+    assert text_encode_column(pa.array([1, None, -3]), col) == [b"1", None, b"-3"]
+    col = ResultColumn("a", ColumnType.TINY)
+    assert text_encode_column(pa.array([True, None]), col) == [b"1", None]
+    col = ResultColumn("a", ColumnType.STRING)
+    assert text_encode_column(pa.array(["♥", None]), col) == ["♥".encode(), None]
+    col = ResultColumn("a", ColumnType.DOUBLE)
+    assert text_encode_column(pa.array([1.5, None]), col) == [b"1.5", None]
+
+
+@pytest.mark.parametrize("arrow_type", ["float64", "float32"])
+def test_text_encode_column_arrow_floats(arrow_type: str) -> None:
+    pa = pytest.importorskip("pyarrow")
+    values = [1.0, -2.5, 0.1, 1e-05, 1e16, 123456789.125, float("inf"), None]
+    array = pa.array(values, getattr(pa, arrow_type)())
+    col = ResultColumn("a", ColumnType.DOUBLE)
+    assert text_encode_column(array, col) == text_encode_column(array.to_pylist(), col)
+    assert text_encode_column(array, col)[0] == b"1.0"
+
+
 @pytest.mark.parametrize(
     "num_bits, offset, flipped, not_flipped, expected",
     [
@@ -0,0 +1,190 @@
+from contextlib import closing
+from typing import AsyncIterator, Sequence, cast
+from unittest.mock import patch
+
+import pytest
+import sqlglot
+from sqlglot import expressions as exp
+
+from mysql_mimic import MysqlServer
+from mysql_mimic.result_cache import CacheEntry, ResultCache, is_deterministic_query
+from mysql_mimic.types import Capabilities
+from tests.conftest import (
+    ConnectFixture,
+    MockSession,
+    PreparedDictCursor,
+    RawClient,
+    query,
+)
+
+
+@pytest.fixture
+def cache(session: MockSession) -> ResultCache:
+    cache = ResultCache(max_bytes=2**20)
+    session.middlewares.append(cache.middleware(session))
+    return cache
+
+
+async def arows(n: int) -> AsyncIterator[Sequence[int]]:
+    for i in range(n):
+        yield (i,)
+
+
+@pytest.mark.asyncio
+async def test_result_cache(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    cache: ResultCache,
+) -> None:
+    session.return_value = (arows(3000), ["a"])
+    with closing(await connect(database="db")) as conn:
+        first = await query(conn, "SELECT a FROM x WHERE b = 1")
+        session.return_value = ([(-1,)], ["a"])
+        second = await query(conn, "select a  from x where b = 1")
+        other = await query(conn, "SELECT a FROM x WHERE b = 2")
+        await query(conn, "SET time_zone = '+01:00'")
+        other_time_zone = await query(conn, "SELECT a FROM x WHERE b = 1")
+        # Prepared statements use the binary protocol, which isn't cached
+        prepared = await query(
+            conn, "SELECT a FROM x WHERE b = %s", PreparedDictCursor, (1,)
+        )
+
+    assert first == [{"a": i} for i in range(3000)]
+    assert second == first
+    assert other == other_time_zone == prepared == [{"a": -1}]
+    assert cache.hits == 1
+    assert cache.misses == 3
+    assert len(cache) == 3
+
+
+@pytest.mark.asyncio
+async def test_result_cache_invalidate(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    cache: ResultCache,
+) -> None:
+    session.return_value = ([(1,)], ["a"])
+    with closing(await connect(database="db")) as conn:
+        await query(conn, "SELECT a FROM x")
+        await query(conn, "SELECT b FROM other.y")
+        assert cache.invalidate("x", database="other") == 0
+        assert cache.invalidate("X") == 1
+        session.return_value = ([(2,)], ["a"])
+        assert await query(conn, "SELECT a FROM x") == [{"a": 2}]
+        assert cache.invalidate("y", database="other") == 1
+        assert len(cache) == 1
+
+        cache.clear()
+        session.return_value = ([(3,)], ["a"])
+        assert await query(conn, "SELECT a FROM x") == [{"a": 3}]
+
+
+@pytest.mark.asyncio
+async def test_result_cache_multi_statements(
+    session: MockSession, server: MysqlServer, port: int, cache: ResultCache
+) -> None:
+    session.return_value = ([(1,)], ["a"])
+    client = await RawClient.connect(port, Capabilities.CLIENT_MULTI_STATEMENTS)
+    try:
+        for _ in range(2):
+            await client.command(b"\x03SELECT a FROM x; SELECT a FROM x")
+            # The second result's rows have different sequence IDs
+            assert (await client.read_result())[2] == b"\x011"
+            assert (await client.read_result())[2] == b"\x011"
+    finally:
+        client.close()
+
+    assert cache.misses == 2
+    assert cache.hits == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT a, RAND() FROM x",
+        "SELECT a FROM x WHERE b = UUID()",
+        "SELECT a FROM x WHERE b > UNIX_TIMESTAMP()",
+        "SHOW TABLES",
+    ],
+)
+async def test_result_cache_not_cacheable(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    cache: ResultCache,
+    sql: str,
+) -> None:
+    session.return_value = ([(1,)], ["a"])
+    with closing(await connect(database="db")) as conn:
+        await query(conn, sql)
+        await query(conn, sql)
+    assert len(cache) == 0
+    assert cache.hits == 0
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT a FROM x WHERE b = 1", True),
+        ("SELECT a FROM x UNION SELECT a FROM y", True),
+        ("SELECT NOW()", False),
+        ("SELECT a FROM x WHERE b < CURRENT_TIMESTAMP", False),
+        ("SELECT CONNECTION_ID()", False),
+        ("SELECT @@sql_mode", False),
+        ("SELECT a FROM (SELECT RAND() AS a) AS t", False),
+        ("INSERT INTO x VALUES (1)", False),
+    ],
+)
+def test_is_deterministic_query(sql: str, expected: bool) -> None:
+    expression = cast(exp.Expression, sqlglot.parse_one(sql, read="mysql"))
+    assert is_deterministic_query(expression) == expected
+
+
+@pytest.mark.asyncio
+async def test_result_cache_sequence_mismatch(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    cache: ResultCache,
+) -> None:
+    session.return_value = ([(1,)], ["a"])
+    with closing(await connect(database="db")) as conn:
+        await query(conn, "SELECT a FROM x")
+        (entry,) = cache._entries.values()
+        entry.seq_start += 1
+        # The cached rows can't be written, so the query runs again
+        session.return_value = ([(2,)], ["a"])
+        assert await query(conn, "SELECT a FROM x") == [{"a": 2}]
+    assert cache.hits == 1
+
+
+def test_result_cache_eviction() -> None:
+    cache = ResultCache(max_bytes=100, ttl=10, max_entry_bytes=60)
+
+    def entry(size: int) -> CacheEntry:
+        return CacheEntry(
+            columns=[],
+            packets=[b"x" * size],
+            seq_start=2,
+            rows=1,
+            tables=frozenset(),
+            expires=100 + cache.ttl,
+        )
+
+    with patch("mysql_mimic.result_cache.monotonic", return_value=100):
+        cache.put("a", entry(40))
+        cache.put("b", entry(40))
+        cache.put("too big", entry(61))
+        assert cache.get("a") is not None
+        # "b" is the least recently used
+        cache.put("c", entry(40))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.size == 80
+
+    with patch("mysql_mimic.result_cache.monotonic", return_value=110):
+        assert cache.get("a") is None
+        assert cache.size == 40
@@ -1,14 +1,28 @@
+import asyncio
+from contextlib import closing
+from typing import Dict, Hashable, Iterable, List, Optional, cast
+from unittest.mock import AsyncMock, patch
+
 import pytest
+import sqlglot
 from sqlglot import expressions as exp
+from sqlglot.executor import execute
+
+from mysql_mimic import MysqlServer
+from mysql_mimic.constants import INFO_SCHEMA
 
 from mysql_mimic.results import ensure_result_set
 from mysql_mimic.schema import (
     Column,
     InfoSchema,
+    InfoSchemaFilter,
+    LazyInfoSchema,
+    VersionedInfoSchema,
     mapping_to_columns,
     show_statement_to_info_schema_query,
 )
 from mysql_mimic.utils import aiterate
+from tests.conftest import ConnectFixture, MockSession, query
 
 
 @pytest.mark.asyncio
@@ -69,3 +83,221 @@ async def test_info_schema_from_columns() -> None:
             "This is a comment",
         )
     ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SHOW TABLES",
+        "SHOW FULL TABLES FROM db2 LIKE 'x%'",
+        "SHOW COLUMNS FROM x",
+        "SHOW FULL COLUMNS FROM x FROM db2 LIKE '_'",
+        "SHOW DATABASES LIKE 'db%'",
+        "SHOW INDEX FROM x",
+        "SELECT * FROM information_schema.schemata",
+        "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = 'db'",
+        "SELECT c.column_name AS `Name` FROM information_schema.columns AS c "
+        "WHERE (c.table_schema = 'db' AND c.table_name = 'x') AND column_name LIKE '%'",
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_name = 'x' AND table_name = 'y'",
+        "SELECT column_name FROM information_schema.columns WHERE table_name = 'z'",
+    ],
+)
+async def test_info_schema_lookup(sql: str) -> None:
+    schema = InfoSchema.from_mapping(
+        {
+            "db": {"x": {"a": "TEXT", "b": "INT"}, "y": {"c": "TEXT"}},
+            "db2": {"x": {"d": "INT"}, "xx": {"e": "TEXT"}},
+        }
+    )
+    expression = cast(exp.Expression, sqlglot.parse_one(sql, read="mysql"))
+    if isinstance(expression, exp.Show):
+        expression = show_statement_to_info_schema_query(expression, "db")
+
+    lookup = schema._lookup(expression)
+    assert lookup is not None
+    result = execute(expression, schema=INFO_SCHEMA, tables=schema.tables)
+    assert lookup == (result.rows, result.columns)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT table_name FROM information_schema.tables ORDER BY table_name",
+        "SELECT COUNT(*) FROM information_schema.tables",
+        "SELECT table_name FROM information_schema.tables WHERE table_rows > 1",
+        "SELECT table_name FROM tables",
+    ],
+)
+def test_info_schema_lookup_fallback(sql: str) -> None:
+    schema = InfoSchema.from_mapping({"db": {"x": {"a": "TEXT"}}})
+    expression = cast(exp.Expression, sqlglot.parse_one(sql, read="mysql"))
+    assert schema._lookup(expression) is None
+
+
+@pytest.mark.asyncio
+async def test_session_info_schema_unversioned(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    mapping = {"db": {"x": {"a": "TEXT"}}}
+    with patch.object(session, "schema", AsyncMock(return_value=mapping)):
+        with closing(await connect(database="db")) as conn:
+            assert await query(conn, "SHOW TABLES") == [{"Table_name": "x"}]
+
+            # Changes made in place are picked up
+            mapping["db"]["y"] = {"b": "TEXT"}
+            assert await query(conn, "SHOW TABLES") == [
+                {"Table_name": "x"},
+                {"Table_name": "y"},
+            ]
+    assert len(server.info_schema_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_session_info_schema_versioned(
+    session: MockSession, server: MysqlServer, connect: ConnectFixture
+) -> None:
+    mapping = {"db": {"x": {"a": "TEXT"}}}
+    schema = AsyncMock(return_value=mapping)
+    with patch.object(session, "schema", schema), patch.object(
+        session, "schema_version", AsyncMock(return_value=1)
+    ) as schema_version:
+        with closing(await connect(database="db")) as conn:
+            await query(conn, "SHOW TABLES")
+            mapping["db"]["y"] = {"b": "TEXT"}
+            assert await query(conn, "SHOW TABLES") == [{"Table_name": "x"}]
+
+        # The InfoSchema is shared by the server's sessions until the version changes
+        with closing(await connect(database="db")) as conn:
+            await query(conn, "SHOW COLUMNS FROM x")
+            assert schema.await_count == 1
+
+            schema_version.return_value = 2
+            assert await query(conn, "SHOW TABLES") == [
+                {"Table_name": "x"},
+                {"Table_name": "y"},
+            ]
+            assert schema.await_count == 2
+
+
+class MyVersionedInfoSchema(VersionedInfoSchema):
+    def __init__(self, databases: Dict[str, dict]) -> None:
+        super().__init__()
+        self.databases = databases
+        self.versions = {db: 1 for db in databases}
+        self.fetched: List[str] = []
+
+    async def version(self) -> Hashable:
+        return tuple(sorted(self.versions.items()))
+
+    async def database_versions(self) -> Dict[str, Hashable]:
+        return dict(self.versions)
+
+    async def database(self, name: str) -> dict | List[Column]:
+        self.fetched.append(name)
+        await asyncio.sleep(0)
+        return self.databases[name]
+
+
+@pytest.mark.asyncio
+async def test_versioned_info_schema() -> None:
+    databases: Dict[str, dict] = {
+        "db": {"x": {"a": "TEXT", "b": "INT"}},
+        "db2": {"y": {"c": "TEXT"}},
+    }
+    schema = MyVersionedInfoSchema(databases)
+    query = sqlglot.parse_one("SELECT * FROM information_schema.columns")
+
+    async def check() -> None:
+        expected = InfoSchema.from_mapping(
+            {db: tables for db, tables in databases.items() if db in schema.versions}
+        )
+        rows, columns = await schema.query(query)  # type: ignore
+        expected_rows, expected_columns = await expected.query(query)  # type: ignore
+        assert columns == expected_columns
+        assert sorted(rows, key=repr) == sorted(expected_rows, key=repr)  # type: ignore
+
+    await check()
+    assert sorted(schema.fetched) == ["db", "db2"]
+
+    compiled = await schema.info_schema()
+    await check()
+    assert await schema.info_schema() is compiled
+    assert len(schema.fetched) == 2
+
+    # Only the database that changed is fetched again
+    databases["db2"] = {"y": {"c": "TEXT", "d": "INT"}}
+    schema.versions["db2"] = 2
+    await check()
+    assert schema.fetched[2:] == ["db2"]
+
+    del schema.versions["db"]
+    await check()
+    assert len(schema.fetched) == 3
+
+
+@pytest.mark.asyncio
+async def test_versioned_info_schema_concurrent() -> None:
+    schema = MyVersionedInfoSchema({"db": {"x": {"a": "TEXT"}}, "db2": {}})
+    compiled = await asyncio.gather(*(schema.info_schema() for _ in range(5)))
+    # Sessions that see a new version at the same time compile it once
+    assert all(c is compiled[0] for c in compiled)
+    assert sorted(schema.fetched) == ["db", "db2"]
+
+
+class MyLazyInfoSchema(LazyInfoSchema):
+    def __init__(self, mapping: dict) -> None:
+        self.all_columns = mapping_to_columns(mapping)
+        self.predicates: List[InfoSchemaFilter] = []
+
+    async def columns(self, predicates: InfoSchemaFilter) -> Iterable[Column]:
+        self.predicates.append(predicates)
+        return [c for c in self.all_columns if predicates.matches(c)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sql, predicates",
+    [
+        ("SHOW TABLES", InfoSchemaFilter(schema="db")),
+        (
+            "SHOW FULL TABLES FROM db2 LIKE 'x%'",
+            InfoSchemaFilter(schema="db2", table_like="x%"),
+        ),
+        ("SHOW COLUMNS FROM x", InfoSchemaFilter(schema="db", table="x")),
+        (
+            "SHOW COLUMNS FROM x FROM db2 LIKE 'd'",
+            InfoSchemaFilter(schema="db2", table="x", column_like="d"),
+        ),
+        ("SHOW DATABASES LIKE 'db_'", InfoSchemaFilter(schema_like="db_")),
+        (
+            "SELECT t.table_name FROM information_schema.tables AS t "
+            "WHERE t.table_schema = 'db' AND (table_name = 'x' OR table_name = 'y') "
+            "ORDER BY 1",
+            InfoSchemaFilter(schema="db"),
+        ),
+        (
+            "SELECT table_name FROM information_schema.tables WHERE table_name = 'x' "
+            "AND (SELECT COUNT(*) FROM information_schema.columns) > 1",
+            InfoSchemaFilter(),
+        ),
+        ("SELECT COUNT(*) FROM information_schema.columns", InfoSchemaFilter()),
+        ("SELECT * FROM information_schema.character_sets", None),
+    ],
+)
+async def test_lazy_info_schema(
+    sql: str, predicates: Optional[InfoSchemaFilter]
+) -> None:
+    mapping = {
+        "db": {"x": {"a": "TEXT", "b": "INT"}, "y": {"c": "TEXT"}},
+        "db2": {"x": {"d": "INT"}, "xx": {"e": "TEXT"}},
+    }
+    schema = MyLazyInfoSchema(mapping)
+    expression = cast(exp.Expression, sqlglot.parse_one(sql, read="mysql"))
+    if isinstance(expression, exp.Show):
+        expression = show_statement_to_info_schema_query(expression, "db")
+
+    result = await schema.query(expression)
+    assert schema.predicates == ([predicates] if predicates else [])
+    assert result == await InfoSchema.from_mapping(mapping).query(expression)
@@ -0,0 +1,149 @@
+import asyncio
+from contextlib import closing
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from mysql_mimic import MysqlServer, Session
+from mysql_mimic.metrics import STAGES
+from mysql_mimic.slow_log import SlowQuery, SlowQueryCallback, SlowQueryFile
+from tests.conftest import ConnectFixture, MockSession, PreparedDictCursor, query
+
+
+@pytest.fixture
+def logged(server: MysqlServer) -> List[SlowQuery]:
+    queries: List[SlowQuery] = []
+    server.slow_log = SlowQueryCallback(queries.append)
+    return queries
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    logged: List[SlowQuery],
+) -> None:
+    session.return_value = ([(i,) for i in range(10)], ["a"])
+    with closing(await connect(user="levon_helm", database="db")) as conn:
+        await query(conn, "SELECT a FROM x WHERE b = 1")
+        assert not logged
+
+        await query(conn, "SET long_query_time = 0")
+        await query(conn, "SELECT a FROM x WHERE b = 1")
+        await query(conn, "SELECT a FROM x WHERE b = %s", PreparedDictCursor, (2,))
+        await asyncio.sleep(0)
+
+    set_query, text_query, prepared_query = logged
+    assert set_query.sql == "SET long_query_time = 0"
+    assert text_query.sql == "SELECT a FROM x WHERE b = 1"
+    assert text_query.digest_text == "SELECT a FROM x WHERE b = ?"
+    assert text_query.digest == prepared_query.digest
+    assert text_query.user == "levon_helm"
+    assert text_query.database == "db"
+    assert text_query.connection_id > 0
+    assert text_query.rows_sent == 10
+    assert text_query.bytes_received > 0
+    assert text_query.bytes_sent > 0
+    assert not text_query.error
+    assert set(text_query.stages) == set(STAGES)
+    assert text_query.query_time >= sum(text_query.stages.values())
+    assert prepared_query.rows_sent == 10
+
+
+@pytest.mark.asyncio
+async def test_global_long_query_time(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    logged: List[SlowQuery],
+) -> None:
+    server.global_variables.set("long_query_time", 0)
+    with closing(await connect()) as conn:
+        await query(conn, "SELECT 1")
+        await query(conn, "SET long_query_time = 10")
+        await query(conn, "SELECT 2")
+        await asyncio.sleep(0)
+
+    sqls = [q.sql for q in logged]
+    assert "SELECT 1" in sqls
+    assert "SELECT 2" not in sqls
+
+
+@pytest.mark.asyncio
+async def test_set_global_long_query_time(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    logged: List[SlowQuery],
+) -> None:
+    with closing(await connect()) as conn:
+        await query(conn, "SET GLOBAL long_query_time = 0")
+        await query(conn, "SELECT 1")
+        await query(conn, "SET long_query_time = 10")
+        await query(conn, "SELECT 2")
+        result = await query(
+            conn, "SELECT @@global.long_query_time AS g, @@long_query_time AS s"
+        )
+        # DEFAULT is the global value
+        await query(conn, "SET long_query_time = DEFAULT")
+        await query(conn, "SELECT 3")
+        await asyncio.sleep(0)
+
+        session.settable_global_variables = set()
+        with pytest.raises(Exception) as ctx:
+            await query(conn, "SET GLOBAL long_query_time = 1")
+        assert "Cannot SET variable long_query_time with scope GLOBAL" in str(ctx.value)
+
+    assert result == [{"g": 0.0, "s": 10.0}]
+    sqls = [q.sql for q in logged]
+    assert sqls[:2] == ["SET GLOBAL long_query_time = 0", "SELECT 1"]
+    assert "SELECT 2" not in sqls
+    assert "SELECT 3" in sqls
+    # Global variables are shared by the server's sessions only
+    assert server.global_variables.get("long_query_time") == 0.0
+    assert MysqlServer().global_variables.get("long_query_time") == 10.0
+    assert Session().variables.get("long_query_time") == 10.0
+
+
+@pytest.mark.asyncio
+async def test_slow_query_rate_limit(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    logged: List[SlowQuery],
+) -> None:
+    with closing(await connect()) as conn:
+        await query(conn, "SET long_query_time = 0, log_slow_rate_limit = 1000000")
+        for _ in range(10):
+            await query(conn, "SELECT 1")
+        await asyncio.sleep(0)
+
+    assert len(logged) < 10
+
+
+@pytest.mark.asyncio
+async def test_slow_query_file(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "slow.log"
+    server.slow_log = SlowQueryFile(str(path), max_bytes=1000, backup_count=2)
+    with closing(await connect(user="levon_helm")) as conn:
+        await query(conn, "SET long_query_time = 0")
+        for i in range(10):
+            await query(conn, f"SELECT {i}")
+    server.slow_log.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "slow.log",
+        "slow.log.1",
+        "slow.log.2",
+    ]
+    log = path.read_text()
+    assert "# User@Host: levon_helm[levon_helm] @ 127.0.0.1 []" in log
+    assert "# Query_time: " in log
+    assert "SELECT 9;" in log
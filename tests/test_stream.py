@@ -1,7 +1,24 @@
+import asyncio
+import struct
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
 import pytest
 
+from mysql_mimic.charset import CharacterSet
 from mysql_mimic.errors import MysqlError
-from mysql_mimic.stream import MysqlStream
+from mysql_mimic.packets import make_binary_resultrow, make_text_resultset_row
+from mysql_mimic.results import ResultColumn
+from mysql_mimic.stream import (
+    MysqlStream,
+    ZlibCompressor,
+    ZstdCompressor,
+    ConnectionClosed,
+    PacketReader,
+)
+from mysql_mimic.types import ColumnType
 
 
 class MockReader:
@@ -145,3 +162,361 @@ async def test_large_write() -> None:
         writer.data == b"\xff\xff\xff\x00" + bytes(0xFFFFFF) + b"\x06\x00\x00\x01kelsin"
     )
     assert next(s.seq) == 2
+
+
+def compressed_packet(payload: bytes, seq_id: int, uncompressed_length: int) -> bytes:
+    return (
+        struct.pack("<I", len(payload) | (seq_id << 24))
+        + struct.pack("<I", uncompressed_length)[:3]
+        + payload
+    )
+
+
+@pytest.mark.asyncio
+async def test_compressed_read() -> None:
+    packet = b"\x06\x00\x00\x00kelsin"
+    reader = MockReader(
+        compressed_packet(zlib.compress(packet), 0, len(packet))
+        + compressed_packet(b"\x01\x00\x00\x00k", 1, 0)
+    )
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    s.enable_compression(ZlibCompressor())
+    assert await s.read() == b"kelsin"
+    s.reset_seq()
+    with pytest.raises(MysqlError):
+        await s.read()
+
+
+@pytest.mark.asyncio
+async def test_compressed_read_spans_packets() -> None:
+    packet = b"\x06\x00\x00\x00kelsin"
+    reader = MockReader(
+        compressed_packet(packet[:5], 0, 0) + compressed_packet(packet[5:], 1, 0)
+    )
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    s.enable_compression(ZlibCompressor())
+    assert await s.read() == b"kelsin"
+    with pytest.raises(ConnectionClosed):
+        await s.read()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("truncate", [3, 10])
+async def test_compressed_read_disconnect(truncate: int) -> None:
+    # The client disconnects in the middle of a compressed header or payload
+    data = compressed_packet(b"\x06\x00\x00\x00kelsin", 0, 0)[:truncate]
+    reader = PacketReader()
+    buf = reader.get_buffer(len(data))
+    buf[: len(data)] = data
+    reader.buffer_updated(len(data))
+    reader.eof_received()
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    s.enable_compression(ZlibCompressor())
+    with pytest.raises(ConnectionClosed):
+        await s.read()
+
+
+@pytest.mark.asyncio
+async def test_compressed_small_write() -> None:
+    writer = MockWriter()
+    s = MysqlStream(reader=None, writer=writer)  # type: ignore
+    s.enable_compression(ZlibCompressor())
+    await s.write(b"kelsin")
+    assert writer.data == compressed_packet(b"\x06\x00\x00\x00kelsin", 0, 0)
+    assert next(s.compressed_seq) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("offload", [False, True])
+async def test_compressed_large_write(offload: bool) -> None:
+    writer = MockWriter()
+    s = MysqlStream(reader=None, writer=writer)  # type: ignore
+    s.enable_compression(ZlibCompressor())
+    if offload:
+        s.compress_offload_threshold = 0
+    await s.write(bytes(0xFFFFFF) + b"kelsin")
+
+    frames = writer.data
+    inflated = b""
+    seq_ids = []
+    while frames:
+        i, lo, hi = struct.unpack("<IHB", frames[:7])
+        length = i & 0xFFFFFF
+        seq_ids.append(i >> 24)
+        payload = frames[7 : 7 + length]
+        inflated += zlib.decompress(payload) if lo | (hi << 16) else payload
+        frames = frames[7 + length :]
+
+    assert seq_ids == [0, 1, 2]
+    assert inflated == b"\xff\xff\xff\x00" + bytes(0xFFFFFF) + b"\x06\x00\x00\x01kelsin"
+
+
+@pytest.mark.asyncio
+async def test_zstd_roundtrip() -> None:
+    pytest.importorskip("zstandard")
+    writer = MockWriter()
+    s = MysqlStream(reader=None, writer=writer)  # type: ignore
+    s.enable_compression(ZstdCompressor())
+    await s.write(b"kelsin" * 100)
+
+    reader = MockReader(writer.data)
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    s.enable_compression(ZstdCompressor())
+    assert await s.read() == b"kelsin" * 100
+
+
+def packet_reader(*chunks: bytes, buffer_size: int = 2**16) -> PacketReader:
+    reader = PacketReader(buffer_size=buffer_size)
+    for chunk in chunks:
+        buf = reader.get_buffer(len(chunk))
+        buf[: len(chunk)] = chunk
+        reader.buffer_updated(len(chunk))
+    reader.eof_received()
+    return reader
+
+
+@pytest.mark.asyncio
+async def test_packet_reader() -> None:
+    reader = packet_reader(b"\x06\x00\x00\x00kel", b"sin\x01\x00\x00\x00k")
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    assert await s.read() == b"kelsin"
+    s.reset_seq()
+    assert await s.read() == b"k"
+    assert reader.at_eof()
+    with pytest.raises(ConnectionClosed):
+        await s.read()
+
+
+@pytest.mark.asyncio
+async def test_packet_reader_reuses_buffer() -> None:
+    packet = b"\x06\x00\x00\x00kelsin"
+    reader = packet_reader(*[packet] * 1000, buffer_size=64)
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    for _ in range(1000):
+        assert await s.read() == b"kelsin"
+        s.reset_seq()
+    assert reader.buffered() == 0
+
+
+@pytest.mark.asyncio
+async def test_packet_reader_large_read() -> None:
+    reader = packet_reader(
+        b"\xff\xff\xff\x00",
+        bytes(0xFFFFFF),
+        b"\xff\xff\xff\x01",
+        bytes(0xFFFFFF),
+        b"\x06\x00\x00\x02kelsin",
+    )
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    assert await s.read() == bytes(0xFFFFFF * 2) + b"kelsin"
+    assert next(s.seq) == 3
+
+
+@pytest.mark.asyncio
+async def test_packet_reader_waits_for_data() -> None:
+    reader = PacketReader()
+    s = MysqlStream(reader=reader, writer=None)  # type: ignore
+    task = asyncio.create_task(s.read())
+    for chunk in [b"\x06\x00", b"\x00\x00kel", b"sin"]:
+        await asyncio.sleep(0)
+        assert not task.done()
+        buf = reader.get_buffer(len(chunk))
+        buf[: len(chunk)] = chunk
+        reader.buffer_updated(len(chunk))
+    assert await task == b"kelsin"
+
+
+def test_write_text_rows() -> None:
+    def encode_double(col: Any, val: Any) -> bytes:
+        return b"%.2f" % val
+
+    columns = [
+        ResultColumn("a", ColumnType.LONGLONG),
+        ResultColumn("b", ColumnType.STRING),
+        ResultColumn("c", ColumnType.STRING, character_set=CharacterSet.latin1),
+        ResultColumn("d", ColumnType.TINY),
+        ResultColumn("e", ColumnType.DOUBLE, text_encoder=encode_double),
+    ]
+    rows = [
+        (1, "♥", "é", True, 1.0),
+        (None, b"\x00", None, 0, None),
+        (2**70, "x" * 300, "y", False, 2.5),
+    ]
+    writer = MockWriter()
+    s = MysqlStream(reader=None, writer=writer)  # type: ignore
+    assert s.write_text_rows(rows, columns) == 3
+
+    expected = b"".join(
+        struct.pack("<I", len(payload) | (i << 24)) + payload
+        for i, payload in enumerate(
+            make_text_resultset_row(row, columns) for row in rows
+        )
+    )
+    assert s._buffer == expected  # pylint: disable=protected-access
+
+
+def test_write_text_rows_mixed_types() -> None:
+    class Name(str):
+        pass
+
+    columns = [
+        ResultColumn("a", ColumnType.LONGLONG),
+        ResultColumn("b", ColumnType.STRING),
+        ResultColumn("c", ColumnType.DOUBLE),
+    ]
+    # Values of any type can follow the first row's
+    rows = [
+        (1, "x", 1.5),
+        (True, 2, 3),
+        (2.5, b"\xff", "4.5"),
+        (Decimal("1.10"), Name("y"), float("inf")),
+        (None, None, None),
+    ]
+    writer = MockWriter()
+    s = MysqlStream(reader=None, writer=writer)  # type: ignore
+    assert s.write_text_rows(rows, columns) == 5
+
+    expected = b"".join(
+        struct.pack("<I", len(payload) | (i << 24)) + payload
+        for i, payload in enumerate(
+            make_text_resultset_row(row, columns) for row in rows
+        )
+    )
+    assert s._buffer == expected  # pylint: disable=protected-access
+
+
+def test_write_text_columns() -> None:
+    columns = [
+        ResultColumn("a", ColumnType.LONGLONG),
+        ResultColumn("b", ColumnType.STRING),
+        ResultColumn("c", ColumnType.TINY),
+    ]
+    rows = [
+        (1, "♥", True),
+        (None, b"\x00", 0),
+        (2**70, "x" * 300, None),
+    ]
+    expected = MysqlStream(reader=None, writer=MockWriter())  # type: ignore
+    expected.write_text_rows(rows, columns)
+
+    s = MysqlStream(reader=None, writer=MockWriter())  # type: ignore
+    assert s.write_text_columns([list(c) for c in zip(*rows)], columns) == 3
+    assert s._buffer == expected._buffer  # pylint: disable=protected-access
+    assert s.seq.value == 3
+
+
+@pytest.mark.parametrize("long_value", [False, True])
+def test_write_text_columns_arrow(long_value: bool) -> None:
+    pa = pytest.importorskip("pyarrow")
+    columns = [
+        ResultColumn("a", ColumnType.LONGLONG),
+        ResultColumn("b", ColumnType.STRING),
+        ResultColumn("c", ColumnType.TINY),
+        ResultColumn("d", ColumnType.DOUBLE),
+        ResultColumn("e", ColumnType.NULL),
+    ]
+    rows = [
+        (
+            i,
+            "x" * (300 if long_value else i) + "♥",
+            [True, False, None][i % 3],
+            i / 2,
+            None,
+        )
+        for i in range(10)
+    ]
+    arrays = [pa.array(c) for c in zip(*rows)]
+
+    expected = MysqlStream(reader=None, writer=MockWriter())  # type: ignore
+    expected.seq.value = 250
+    expected.write_text_rows(rows, columns)
+
+    s = MysqlStream(reader=None, writer=MockWriter())  # type: ignore
+    s.seq.value = 250
+    assert s.write_text_columns(arrays, columns) == 10
+    assert s._buffer == expected._buffer  # pylint: disable=protected-access
+    assert s.seq.value == 4
+
+
+def test_write_binary_rows() -> None:
+    columns = [
+        ResultColumn("a", ColumnType.LONGLONG),
+        ResultColumn("b", ColumnType.STRING),
+        ResultColumn("c", ColumnType.STRING, character_set=CharacterSet.latin1),
+        ResultColumn("d", ColumnType.TINY),
+        ResultColumn("e", ColumnType.DOUBLE),
+        ResultColumn("f", ColumnType.SHORT),
+        ResultColumn("g", ColumnType.DATETIME),
+        ResultColumn("h", ColumnType.TIME),
+        ResultColumn("i", ColumnType.FLOAT),
+        ResultColumn("j", ColumnType.LONG, binary_encoder=lambda col, val: b"\x07"),
+    ]
+    rows = [
+        (1, "♥", "é", True, 1.5, 2, datetime(2021, 1, 1), timedelta(1), 0.5, 3),
+        (None, b"\x00", None, 0, None, None, None, None, None, None),
+        (-(2**63), "x" * 300, 1, False, -2.5, -1, None, timedelta(0), None, 4),
+    ]
+    writer = MockWriter()
+    s = MysqlStream(reader=None, writer=writer)  # type: ignore
+    assert s.write_binary_rows(rows, columns) == 3
+
+    expected = b"".join(
+        struct.pack("<I", len(payload) | (i << 24)) + payload
+        for i, payload in enumerate(make_binary_resultrow(row, columns) for row in rows)
+    )
+    assert s._buffer == expected  # pylint: disable=protected-access
+
+
+class ChunkWriter(MockWriter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks: List[int] = []
+
+    def write(self, data: bytes) -> None:
+        self.chunks.append(len(data))
+        super().write(bytes(data))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("binary", [False, True])
+async def test_write_rows_bounded(binary: bool) -> None:
+    columns = [
+        ResultColumn("a", ColumnType.LONGLONG),
+        ResultColumn("b", ColumnType.STRING),
+    ]
+    rows = [(i, "x" * 100) for i in range(1000)]
+    expected = MysqlStream(reader=None, writer=MockWriter())  # type: ignore
+    if binary:
+        expected.write_binary_rows(rows, columns)
+    else:
+        expected.write_text_rows(rows, columns)
+
+    writer = ChunkWriter()
+    s = MysqlStream(reader=None, writer=writer, max_buffer_size=4096)  # type: ignore
+    assert await s.write_rows(rows, columns, binary) == 1000
+    await s.drain()
+
+    assert writer.data == expected._buffer  # pylint: disable=protected-access
+    assert s.seq.value == expected.seq.value
+    assert len(writer.chunks) > 20
+    # At most one row past the limit
+    assert max(writer.chunks) < 4096 + 120
+
+
+class MockTransport(asyncio.WriteTransport):
+    def __init__(self) -> None:
+        super().__init__()
+        self.limits: Tuple[Optional[int], Optional[int]] = (None, None)
+
+    def set_write_buffer_limits(
+        self, high: Optional[int] = None, low: Optional[int] = None
+    ) -> None:
+        self.limits = (high, low)
+
+
+@pytest.mark.asyncio
+async def test_packet_reader_write_buffer_limits() -> None:
+    transport = MockTransport()
+    reader = PacketReader(write_high_water=100, write_low_water=10)
+    reader.connection_made(transport)
+    assert transport.limits == (100, 10)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+
+from mysql_mimic import MysqlServer, tracing
+from tests.conftest import ConnectFixture, MockSession, PreparedDictCursor, query
+
+
+class MockSpan:
+    def __init__(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]],
+        parent: Optional[MockSpan],
+    ):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+        self.exceptions: List[BaseException] = []
+        self.status: Any = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.exceptions.append(exception)
+
+    def set_status(self, status: Any) -> None:
+        self.status = status
+
+
+class MockTracer:
+    def __init__(self) -> None:
+        self.spans: List[MockSpan] = []
+        self.current: ContextVar[Optional[MockSpan]] = ContextVar(
+            "current", default=None
+        )
+
+    @contextmanager
+    def start_as_current_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[MockSpan]:
+        span = MockSpan(name, attributes, self.current.get())
+        self.spans.append(span)
+        token = self.current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            self.current.reset(token)
+
+    def children(self, span: MockSpan) -> List[MockSpan]:
+        return [s for s in self.spans if s.parent is span]
+
+    def commands(self, command: str) -> List[MockSpan]:
+        return [
+            s
+            for s in self.spans
+            if s.name == "mysql.command" and s.attributes[tracing.COMMAND] == command
+        ]
+
+
+@pytest.fixture(autouse=True)
+def tracer(server: MysqlServer) -> MockTracer:
+    server.tracer = MockTracer()
+    return server.tracer
+
+
+@pytest.mark.asyncio
+async def test_query_spans(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    tracer: MockTracer,
+) -> None:
+    session.return_value = ([(i,) for i in range(10)], ["a"])
+    with closing(await connect(user="levon_helm")) as conn:
+        tracer.spans.clear()
+        await query(conn, "SELECT a FROM x WHERE b = 1")
+
+    (command,) = tracer.commands("COM_QUERY")
+    assert command.parent is None
+    assert command.attributes[tracing.CONNECTION_ID] > 0
+    assert command.attributes[tracing.BYTES_RECEIVED] > 0
+    assert command.attributes[tracing.BYTES_SENT] > 0
+
+    (handler,) = tracer.children(command)
+    assert handler.name == "mysql.handle_query"
+    statement, encode, drain = tracer.children(handler)
+    assert statement.name == "mysql.statement"
+    assert statement.attributes[tracing.DIGEST_TEXT] == "SELECT a FROM x WHERE b = ?"
+    assert len(statement.attributes[tracing.DIGEST]) == 64
+    assert encode.name == "mysql.encode"
+    assert encode.attributes[tracing.ROWS] == 10
+    assert drain.name == "mysql.drain"
+    assert (
+        drain.attributes[tracing.BYTES_SENT] == command.attributes[tracing.BYTES_SENT]
+    )
+
+    # Each middleware is nested in the previous one, down to Session.query
+    middlewares = []
+    span = statement
+    while tracer.children(span):
+        (span,) = tracer.children(span)
+        middlewares.append(span.attributes.get(tracing.MIDDLEWARE, span.name))
+    assert middlewares == [m.__name__ for m in session.middlewares] + [
+        "mysql.session.query"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_prepared_statement_spans(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    tracer: MockTracer,
+) -> None:
+    session.return_value = ([(i,) for i in range(3)], ["a"])
+    with closing(await connect(user="levon_helm")) as conn:
+        tracer.spans.clear()
+        await query(
+            conn, "SELECT a FROM x WHERE b = %s", PreparedDictCursor, params=(1,)
+        )
+
+    (command,) = tracer.commands("COM_STMT_EXECUTE")
+    (handler,) = tracer.children(command)
+    assert handler.name == "mysql.handle_stmt_execute"
+    statement, encode, _ = tracer.children(handler)
+    assert statement.attributes[tracing.DIGEST_TEXT] == "SELECT a FROM x WHERE b = ?"
+    assert encode.attributes[tracing.ROWS] == 3
+
+
+@pytest.mark.asyncio
+async def test_error_spans(
+    session: MockSession,
+    server: MysqlServer,
+    connect: ConnectFixture,
+    tracer: MockTracer,
+) -> None:
+    with closing(await connect(user="levon_helm")) as conn:
+        tracer.spans.clear()
+        with pytest.raises(Exception):
+            await query(conn, "SELECT * FROM")
+
+    (command,) = tracer.commands("COM_QUERY")
+    assert command.attributes[tracing.ERROR_CODE] == 1105
+    assert command.exceptions
+    (handler,) = tracer.children(command)
+    assert handler.exceptions
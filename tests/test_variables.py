@@ -3,8 +3,9 @@ from typing import Dict
 
 import pytest
 
-from mysql_mimic.errors import MysqlError
+from mysql_mimic.errors import ErrorCode, MysqlError
 from mysql_mimic.variables import (
+    Enumeration,
     parse_timezone,
     Variables,
     VariableSchema,
@@ -15,7 +16,10 @@ class TestVars(Variables):
 
     @property
     def schema(self) -> Dict[str, VariableSchema]:
-        return {"foo": (str, "bar", True)}
+        return {
+            "foo": (str, "bar", True),
+            "baz": (Enumeration("FULL", "NONE"), "FULL", True),
+        }
 
 
 def test_parse_timezone() -> None:
@@ -34,7 +38,7 @@ def test_parse_timezone() -> None:
 def test_variable_mapping() -> None:
     test_vars = TestVars()
     assert test_vars
-    assert len(test_vars) == 1
+    assert len(test_vars) == 2
 
     assert test_vars.get_variable("foo") == "bar"
     assert test_vars["foo"] == "bar"
@@ -48,3 +52,14 @@ def test_variable_mapping() -> None:
 
     with pytest.raises(MysqlError):
         test_vars["world"] = "hello"
+
+
+def test_enumeration() -> None:
+    test_vars = TestVars()
+    test_vars["baz"] = "none"
+    assert test_vars["baz"] == "NONE"
+
+    with pytest.raises(MysqlError) as ctx:
+        test_vars["baz"] = "bogus"
+    assert ctx.value.code == ErrorCode.WRONG_VALUE_FOR_VAR
+    assert test_vars["baz"] == "NONE"
@@ -0,0 +1,109 @@
+import socket
+import threading
+import time
+from contextlib import closing
+from typing import Iterator, List
+
+import mysql.connector
+import pytest
+from mysql.connector import DatabaseError
+from mysql.connector.abstracts import MySQLConnectionAbstract
+
+from mysql_mimic import MysqlServer
+from mysql_mimic.workers import WorkerPool
+
+
+def server_factory() -> MysqlServer:
+    return MysqlServer()
+
+
+@pytest.fixture(params=[True, False], ids=["reuse_port", "shared_socket"])
+def pool(request: pytest.FixtureRequest) -> Iterator[WorkerPool]:
+    if request.param and not hasattr(socket, "SO_REUSEPORT"):
+        pytest.skip("SO_REUSEPORT is not supported")
+    pool = WorkerPool(
+        server_factory,
+        workers=2,
+        host="127.0.0.1",
+        port=0,
+        reuse_port=request.param,
+        shutdown_timeout=1,
+    )
+    pool.monitor_interval = 0.05
+    pool.start()
+    thread = threading.Thread(target=pool.serve_forever)
+    thread.start()
+    yield pool
+    pool.close()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert not pool.processes
+
+
+def connect(pool: WorkerPool) -> MySQLConnectionAbstract:
+    return mysql.connector.connect(  # type: ignore
+        host="127.0.0.1", port=pool.port, user="levon_helm", use_pure=True
+    )
+
+
+def test_worker_pool(pool: WorkerPool) -> None:
+    conns: List[MySQLConnectionAbstract] = []
+    try:
+        # Connect until there are connections to each worker
+        workers = set()
+        for _ in range(100):
+            conn = connect(pool)
+            conns.append(conn)
+            workers.add(conn.connection_id >> 16)  # type: ignore[operator]
+            if len(workers) == 2:
+                break
+        if pool.reuse_port:
+            assert len(workers) == 2
+        assert workers <= {pool.base_server_id, pool.base_server_id + 1}
+
+        first = conns[0]
+        other = next(
+            (c for c in conns if c.connection_id >> 16 != first.connection_id >> 16),  # type: ignore[operator]
+            conns[-1],
+        )
+        if other is not first:
+            with closing(first.cursor()) as cursor:
+                cursor.execute(f"KILL {other.connection_id}")
+
+            with pytest.raises(DatabaseError):
+                for _ in range(50):
+                    with closing(other.cursor()) as cursor:
+                        cursor.execute("SELECT 1")
+                        cursor.fetchall()
+                    time.sleep(0.1)
+
+        with closing(first.cursor()) as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchall() == [(1,)]
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def test_worker_pool_restarts_workers(pool: WorkerPool) -> None:
+    crashed = pool.processes[0]
+    crashed.kill()
+    crashed.join()
+
+    for _ in range(100):
+        if pool.processes[0] is not crashed and pool.processes[0].is_alive():
+            break
+        time.sleep(0.05)
+    assert pool.processes[0] is not crashed
+
+    for _ in range(4):
+        for _ in range(50):
+            try:
+                conn = connect(pool)
+                break
+            except DatabaseError:
+                # The new worker may not be accepting connections yet
+                time.sleep(0.1)
+        with closing(conn), closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchall() == [(1,)]